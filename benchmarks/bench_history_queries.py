@@ -0,0 +1,154 @@
+"""History query benchmark.
+
+Builds upload histories of increasing size and measures the hot history queries
+on the schema before the index migration (version 1) and after all migrations,
+printing the query plan SQLite picks for each. Write queries are rolled back, so
+every run sees the same data.
+
+Usage:
+    python benchmarks/bench_history_queries.py [--rows 10000,100000,1000000] [--repeat 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import storage
+from report import percentile
+
+MODES = ["Anonymous", "User", "Litterbox 1h", "Litterbox 12h", "Litterbox 24h", "Litterbox 72h"]
+EXTENSIONS = ["png", "jpg", "gif", "mp4", "webm", "pdf", "zip", "mp3"]
+
+# Rows touched by the bulk delete cases, like a large selection in the history
+BULK_ROWS = 100
+
+def url_for(index):
+    return f"https://files.catbox.moe/{index:08x}.{EXTENSIONS[index % len(EXTENSIONS)]}"
+
+def path_for(index):
+    return f"C:\\Users\\user\\Pictures\\Folder {index % 500}\\file_{index}.{EXTENSIONS[index % len(EXTENSIONS)]}"
+
+def build_history(db_path, rows):
+    """A version 1 database with rows uploads spread over the last three years."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
+    storage.migrate_base_schema(cursor)
+    cursor.execute("PRAGMA user_version = 1")
+
+    now = int(time.time())
+    rng = random.Random(rows)
+
+    def generate():
+        for index in range(rows):
+            mode = MODES[index % len(MODES)]
+            expiry = mode.split(" ")[1] if mode.startswith("Litterbox") else None
+            yield (path_for(index), url_for(index), mode, now - rng.randrange(3 * 365 * 86400), expiry,
+                   rng.randrange(1024, 200 * 1024 * 1024))
+
+    cursor.executemany(
+        "INSERT INTO uploads (file_path, url, mode, timestamp, expiry_duration, file_size) VALUES (?, ?, ?, ?, ?, ?)",
+        generate()
+    )
+    cursor.execute("COMMIT")
+    return conn
+
+def query_cases(rows):
+    """name -> (sql, parameter rows, is a write). Writes run with executemany and are rolled back."""
+    rng = random.Random(0)
+    targets = [rng.randrange(rows) for _ in range(BULK_ROWS)]
+    return {
+        "history (all rows)": (storage.SELECT_UPLOADS, [()], False),
+        "history (first page)": (
+            "SELECT file_path, url, mode, timestamp, expiry_duration, is_deleted, id FROM uploads "
+            "ORDER BY timestamp DESC LIMIT 100", [()], False),
+        f"mark deleted x{BULK_ROWS}": (storage.MARK_DELETED, [(url_for(index),) for index in targets], True),
+        f"remove x{BULK_ROWS}": (storage.DELETE_UPLOAD, [(url_for(index),) for index in targets], True),
+        "by file_path": ("SELECT id, url FROM uploads WHERE file_path = ?", [(path_for(targets[0]),)], False),
+        "litterbox 24h": (
+            "SELECT url, timestamp FROM uploads WHERE mode = ? AND expiry_duration = ?",
+            [("Litterbox 24h", "24h")], False),
+    }
+
+def query_plan(conn, sql, parameters):
+    return "; ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, parameters))
+
+def run_query(conn, sql, parameters, write):
+    start = time.perf_counter()
+    if write:
+        conn.execute("BEGIN")
+        conn.executemany(sql, parameters)
+        elapsed = time.perf_counter() - start
+        conn.execute("ROLLBACK")
+        return elapsed * 1000
+    for row in parameters:
+        conn.execute(sql, row).fetchall()
+    return (time.perf_counter() - start) * 1000
+
+def measure(conn, cases, repeat):
+    results = {}
+    for name, (sql, parameters, write) in cases.items():
+        latencies = [run_query(conn, sql, parameters, write) for _ in range(repeat)]
+        results[name] = {
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "plan": query_plan(conn, sql, parameters[0])
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark upload history queries")
+    parser.add_argument("--rows", default="10000,100000,1000000", help="Comma separated history sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query (default: 5)")
+    parser.add_argument("--json", help="Also write the raw results to this file")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="catbox-bench-")
+    results = {}
+    try:
+        for rows in [int(value) for value in args.rows.split(",")]:
+            print(f"⏳ Generating {rows:,} uploads...")
+            conn = build_history(os.path.join(work_dir, f"history_{rows}.db"), rows)
+            cases = query_cases(rows)
+
+            before = measure(conn, cases, args.repeat)
+            start = time.perf_counter()
+            storage.migrate(conn)
+            migration_s = time.perf_counter() - start
+            after = measure(conn, cases, args.repeat)
+            conn.close()
+            results[rows] = {"migration_s": migration_s, "before": before, "after": after}
+
+            print()
+            print(f"{rows:,} uploads (migration to version {storage.SCHEMA_VERSION} took {migration_s:.2f} s)")
+            header = f"{'query':<24}{'v1 p50':>10}{'v1 p95':>10}{'now p50':>10}{'now p95':>10}"
+            print(header)
+            print("-" * len(header))
+            for name in cases:
+                print(f"{name:<24}{before[name]['p50_ms']:>10.2f}{before[name]['p95_ms']:>10.2f}"
+                      f"{after[name]['p50_ms']:>10.2f}{after[name]['p95_ms']:>10.2f}")
+            print()
+            for name in cases:
+                print(f"  {name}")
+                print(f"    v1:  {before[name]['plan']}")
+                print(f"    now: {after[name]['plan']}")
+            print()
+        print("Latencies in ms.")
+
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            print(f"✅ Raw results written to {args.json}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Thumbnail benchmark.
+
+Generates a corpus of representative files and measures, per file type:
+  - generate_thumbnail latency (p50/p95 over --repeat runs)
+  - peak RSS of a fresh process doing only that work
+  - the history viewer path: a cache lookup on the GUI thread and, on a miss, the
+    ThumbnailLoader's isolated workers. Timed once cold (worker spawn included), then
+    regenerated by the running worker, then as cache hits
+
+Every case runs in its own subprocess so peak memory isn't polluted by earlier cases,
+with caches pointed at a temporary directory. Runs headless (QT_QPA_PLATFORM=offscreen);
+on Linux the Windows-only modules are stubbed inside the benchmark process only.
+
+Usage:
+    python benchmarks/bench_thumbnails.py [--repeat 5] [--corpus DIR] [--types jpeg,pdf] [--json out.json]
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# name -> (file name, generator)
+CORPUS = {}
+
+def corpus_file(name, file_name):
+    def decorator(func):
+        CORPUS[name] = (file_name, func)
+        return func
+    return decorator
+
+def noise_image(width, height, mode="RGB"):
+    """A photo-like image that doesn't compress to nothing."""
+    from PIL import Image
+    tile = Image.merge("RGB", [Image.effect_noise((512, 512), 40 + 20 * i) for i in range(3)])
+    gradient = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    image = Image.new("RGB", (width, height))
+    for x in range(0, width, 512):
+        for y in range(0, height, 512):
+            image.paste(tile, (x, y))
+    return Image.blend(image, gradient, 0.5).convert(mode)
+
+@corpus_file("large_jpeg", "large.jpg")
+def make_large_jpeg(path):
+    noise_image(6000, 4000).save(path, "JPEG", quality=90)
+
+@corpus_file("huge_png", "huge.png")
+def make_huge_png(path):
+    noise_image(9000, 7000, "RGBA").save(path, "PNG", compress_level=1)
+
+@corpus_file("oversized_png", "oversized.png")
+def make_oversized_png(path):
+    # Above thumb.MAX_THUMBNAIL_SOURCE_PIXELS, must never be decoded
+    from PIL import Image
+    Image.new("L", (12000, 9000), 128).save(path, "PNG", compress_level=1)
+
+@corpus_file("animated_gif", "animated.gif")
+def make_animated_gif(path):
+    base = noise_image(800, 600)
+    frames = [base.rotate(i * 6).convert("P", palette=1) for i in range(60)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=40, loop=0)
+
+@corpus_file("multipage_pdf", "multipage.pdf")
+def make_multipage_pdf(path):
+    import pymupdf
+    with pymupdf.open() as doc:
+        for index in range(200):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Page {index + 1}", fontsize=36)
+            page.draw_rect(pymupdf.Rect(72, 120, 520, 700), color=(0, 0, 1), fill=(0.8, 0.9, 1))
+        doc.save(path)
+
+def write_fake_mp3(path, seconds=240):
+    """MPEG-1 Layer III frames of silence (128 kbps, 44.1 kHz), about 1 MB per minute."""
+    frame = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+    with open(path, "wb") as f:
+        f.write(frame * int(seconds * 38.28))
+
+@corpus_file("mp3_with_art", "with_art.mp3")
+def make_mp3_with_art(path):
+    from mutagen.id3 import APIC, ID3
+    write_fake_mp3(path)
+    cover = io.BytesIO()
+    noise_image(1500, 1500).save(cover, "JPEG", quality=90)
+    tags = ID3()
+    tags.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=cover.getvalue()))
+    tags.save(path)
+
+@corpus_file("mp3_without_art", "without_art.mp3")
+def make_mp3_without_art(path):
+    from mutagen.id3 import ID3, TIT2
+    write_fake_mp3(path)
+    tags = ID3()
+    tags.add(TIT2(encoding=3, text="No cover"))
+    tags.save(path)
+
+@corpus_file("video", "video.mp4")
+def make_video(path):
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg not found")
+    subprocess.run([ffmpeg, "-loglevel", "error", "-y", "-f", "lavfi", "-i", "testsrc=duration=120:size=1920x1080:rate=30",
+                    "-g", "120", "-c:v", "libx264", "-preset", "ultrafast", path], check=True)
+
+@corpus_file("unsupported", "archive.zip")
+def make_unsupported(path):
+    with open(path, "wb") as f:
+        f.write(os.urandom(5 * 1024 * 1024))
+
+def build_corpus(corpus_dir, names):
+    """Create missing corpus files, returning {name: path} of the ones available."""
+    os.makedirs(corpus_dir, exist_ok=True)
+    files = {}
+    for name in names:
+        file_name, generator = CORPUS[name]
+        path = os.path.join(corpus_dir, file_name)
+        if not os.path.exists(path):
+            print(f"⏳ Generating {file_name}...")
+            try:
+                generator(path)
+            except Exception as e:
+                print(f"⚠️ Skipping {name}: {e}")
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+        files[name] = path
+    return files
+
+def install_windows_stubs():
+    """Stand-ins for the Windows-only modules history_viewer imports, for this process only."""
+    if "winreg" in sys.modules or sys.platform == "win32":
+        return
+
+    class _Key:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    def _missing(*args, **kwargs):
+        raise FileNotFoundError("Registry is not available")
+
+    winreg = types.ModuleType("winreg")
+    winreg.HKEY_CURRENT_USER = winreg.HKEY_CLASSES_ROOT = 0
+    winreg.KEY_READ = winreg.KEY_WRITE = winreg.REG_SZ = 0
+    winreg.OpenKey = winreg.CreateKey = lambda *args, **kwargs: _Key()
+    winreg.QueryValueEx = winreg.DeleteKey = winreg.EnumKey = _missing
+    winreg.SetValueEx = lambda *args, **kwargs: None
+    sys.modules["winreg"] = winreg
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unsupported."""
+    # On Linux ru_maxrss survives exec, so a child would report the parent's peak from
+    # before it was spawned. VmHWM belongs to the child's own address space.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def load_history_thumbnail(history_viewer, loader, path):
+    """Get a thumbnail the way the history viewer does, returning its QIcon.
+
+    The cache is looked up on the GUI thread and a miss goes through the loader's worker
+    processes, waiting for its thumbnail_ready signal like the viewer's event loop would.
+    """
+    from PyQt6.QtCore import QEventLoop
+    from PyQt6.QtGui import QIcon
+
+    icon = history_viewer.create_thumbnail(path, use_light=False, generate=False)
+    if icon is not None:
+        return icon
+
+    loop = QEventLoop()
+    delivered = []
+
+    def on_ready(file_path, image):
+        if file_path == path:
+            delivered.append(image)
+            loop.quit()
+
+    loader.thumbnail_ready.connect(on_ready)
+    try:
+        loader.request([path])
+        if not delivered:
+            loop.exec()
+    finally:
+        loader.thumbnail_ready.disconnect(on_ready)
+    image = delivered[0]
+    if image is None:
+        return history_viewer.get_themed_icon('del')
+    return QIcon(history_viewer.pil_image_to_qpixmap(image))
+
+def run_case(mode, path, repeat):
+    """Child process entry point, prints one JSON result line."""
+    install_windows_stubs()
+    import thumb
+
+    result = {"import_rss_mb": None, "latencies_ms": []}
+    if mode == "generate":
+        result["import_rss_mb"] = peak_rss_mb()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            thumb.generate_thumbnail(path)
+            result["latencies_ms"].append((time.perf_counter() - start) * 1000)
+    else:
+        from PyQt6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication([])
+        import history_viewer
+        from thumb_cache import thumbnail_cache
+        result["import_rss_mb"] = peak_rss_mb()
+        loader = history_viewer.ThumbnailLoader()
+
+        def timed_load():
+            start = time.perf_counter()
+            load_history_thumbnail(history_viewer, loader, path)
+            return (time.perf_counter() - start) * 1000
+
+        try:
+            result["cold_ms"] = timed_load()
+            result["worker_ms"] = []
+            for _ in range(repeat):
+                shutil.rmtree(thumbnail_cache.cache_dir, ignore_errors=True)
+                result["worker_ms"].append(timed_load())
+            for _ in range(repeat):
+                result["latencies_ms"].append(timed_load())
+        finally:
+            loader.shutdown()
+        result["cache_hits"] = thumbnail_cache.hits
+        result["cache_misses"] = thumbnail_cache.misses
+    result["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(result))
+
+def spawn_case(mode, path, repeat, cache_root):
+    env = dict(os.environ)
+    env["QT_QPA_PLATFORM"] = "offscreen"
+    env["LOCALAPPDATA"] = cache_root  # Fresh icon and thumbnail caches for every case
+    env.pop("CATBOX_TRACE", None)
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--case", mode, path, "--repeat", str(repeat)],
+        capture_output=True, text=True, env=env, cwd=cache_root
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def format_ms(value):
+    return f"{value:.1f}" if value is not None else "-"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thumbnail generation")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case (default: 5)")
+    parser.add_argument("--corpus", help="Corpus directory, kept between runs (default: temporary)")
+    parser.add_argument("--types", help="Comma separated subset of: " + ", ".join(CORPUS))
+    parser.add_argument("--json", help="Also write the raw results to this file")
+    parser.add_argument("--case", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args.case[0], args.case[1], args.repeat)
+        return
+
+    from report import percentile
+
+    names = args.types.split(",") if args.types else list(CORPUS)
+    unknown = [name for name in names if name not in CORPUS]
+    if unknown:
+        parser.error(f"Unknown types: {', '.join(unknown)}")
+
+    work_dir = tempfile.mkdtemp(prefix="catbox-bench-")
+    try:
+        files = build_corpus(args.corpus or os.path.join(work_dir, "corpus"), names)
+
+        results = {}
+        header = (f"{'type':<18}{'size MB':>9}{'gen p50':>9}{'gen p95':>9}{'gen RSS':>9}"
+                  f"{'hist cold':>11}{'hist gen':>10}{'hist warm':>11}{'hist RSS':>10}{'hits/miss':>11}")
+        print()
+        print(header)
+        print("-" * len(header))
+        for name, path in files.items():
+            row = {"file_size_mb": os.path.getsize(path) / (1024 * 1024)}
+            try:
+                generate = spawn_case("generate", path, args.repeat, tempfile.mkdtemp(dir=work_dir))
+                history = spawn_case("history", path, args.repeat, tempfile.mkdtemp(dir=work_dir))
+            except Exception as e:
+                print(f"{name:<18}❌ {e}")
+                continue
+
+            row["generate"] = generate
+            row["history"] = history
+            results[name] = row
+            print(
+                f"{name:<18}{row['file_size_mb']:>9.1f}"
+                f"{format_ms(percentile(generate['latencies_ms'], 50)):>9}"
+                f"{format_ms(percentile(generate['latencies_ms'], 95)):>9}"
+                f"{format_ms(generate['peak_rss_mb']):>9}"
+                f"{format_ms(history['cold_ms']):>11}"
+                f"{format_ms(percentile(history['worker_ms'], 50)):>10}"
+                f"{format_ms(percentile(history['latencies_ms'], 50)):>11}"
+                f"{format_ms(history['peak_rss_mb']):>10}"
+                f"{history['cache_hits']:>6}/{history['cache_misses']:<4}"
+            )
+        print()
+        print("Latencies in ms, RSS is the peak of the process in MB (the viewer's, not its workers').")
+        print("'hist cold' is the first history thumbnail, spawning a worker on an empty cache,")
+        print("'hist gen' the p50 with the cache cleared but the worker running and 'hist warm'")
+        print("the p50 once the thumbnail is cached. Hits and misses are the viewer's lookups.")
+
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            print(f"✅ Raw results written to {args.json}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -5,23 +5,33 @@ import sys
 import time
 import traceback
 import winreg
-import sqlite3
-import shutil
 import json
 import lzstring
-from thumb import generate_thumbnail
-from history_viewer import log_upload
+import multiprocessing
+from urllib.parse import urlparse
+import tracing
+
+# Heavy imports are traced so a slow launch can be attributed to them
+with tracing.span("import.PyQt6"):
+    from PyQt6.QtCore import (Qt, QThread, QTimer, pyqtSignal,
+                              pyqtSlot)
+    from PyQt6.QtGui import QIcon, QAction, QColor, QPainter, QPen
+    from PyQt6.QtWidgets import (QApplication, QDialog, QHBoxLayout, QInputDialog,
+                                 QLabel, QMessageBox, QProgressBar, QPushButton,
+                                 QScrollArea, QTextEdit, QVBoxLayout, QWidget, QMenu)
+with tracing.span("import.requests"):
+    from requests_toolbelt.multipart.encoder import (MultipartEncoder,
+                                                     MultipartEncoderMonitor)
+    from transport import CancellableSession
+with tracing.span("import.thumb"):
+    from thumb_worker import IsolatedThumbnailPool
+with tracing.span("import.history_viewer"):
+    from history_viewer import log_upload, log_upload_failure, load_upload_metrics, load_uploads, pil_image_to_qpixmap, HISTORY_THUMBNAIL_SIZE, UPLOAD_THUMBNAIL_SIZE
+    from thumb_cache import thumbnail_cache
 import pythoncom
-import requests
-import PIL.Image as Image
-from PyQt6.QtCore import (Qt, QThread, QTimer, pyqtSignal,
-                          pyqtSlot)
-from PyQt6.QtGui import QIcon, QImage, QPixmap, QAction, QCursor
-from PyQt6.QtWidgets import (QApplication, QDialog, QHBoxLayout, QInputDialog,
-                             QLabel, QMessageBox, QProgressBar, QPushButton,
-                             QScrollArea, QTextEdit, QVBoxLayout, QWidget, QMenu)
-from requests_toolbelt.multipart.encoder import (MultipartEncoder,
-                                                 MultipartEncoderMonitor)
+from faststart import FaststartSkipped, is_faststart_candidate, open_faststart_stream
+from throughput import ThroughputEstimator, format_eta, format_rate
+from report import build_report
 
 class UploadCancelledException(Exception):
     """Exception raised when upload is cancelled."""
@@ -61,6 +71,20 @@ API_CATBOX = "https://catbox.moe/user/api.php"
 API_LITTERBOX = "https://litterbox.catbox.moe/resources/internals/api.php"
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
 
+# Seconds to establish the upload connection. Sending and the reply have no time
+# limit, large uploads take as long as they take
+CONNECT_TIMEOUT = 15
+
+# Milliseconds closing the window waits for a cancelled upload before hiding instead
+CANCEL_WAIT_MS = 2000
+
+# Size of the thumbnail shown in the upload window
+UPLOAD_WINDOW_THUMBNAIL_SIZE = 120
+
+# Milliseconds a finished upload waits for its thumbnail before it is logged without one.
+# The thumbnail pool's own deadlines normally resolve it well before this
+THUMBNAIL_WAIT_MS = 30000
+
 def read_registry_value(name):
     """Read a value from Windows Registry under HKEY_CURRENT_USER."""
     try:
@@ -144,8 +168,17 @@ parser.add_argument("--anonymous", action="store_true", help="Upload anonymously
 parser.add_argument("--litterbox", choices=["1h", "12h", "24h", "72h"], help="Litterbox with specified expiration time.")
 parser.add_argument("--edit-userhash", action="store_true", help="Edit and save a new userhash.")
 parser.add_argument("--history", action="store_true", help="Show upload history")
-
-args = parser.parse_args()
+parser.add_argument("--report", action="store_true", help="Show upload performance statistics from the history.")
+parser.add_argument("--warm-thumbnails", action="store_true", help="Pre-generate the history thumbnail cache for all uploaded files.")
+parser.add_argument("--trace", nargs="?", const="", metavar="PATH", help="Write a Chrome trace of this run (default: catbox-trace-<pid>.json in %%TEMP%%).")
+parser.add_argument("--faststart", action="store_true", help="Move the moov atom of MP4/MOV files to the front while uploading.")
+
+# Set from the command line and the registry when run as the main program. Thumbnail
+# pool workers are spawned, so they import this module as __mp_main__ and must not
+# parse the parent's arguments, configure tracing or read the registry.
+args = None
+USER_HASH = None
+FASTSTART_ENABLED = False
 
 cwd = os.getcwd()
 icons_dir = os.path.join(application_path, "icons")
@@ -283,145 +316,54 @@ def main():
                 QMessageBox.information(None, "Context Menu Updated", "Context menu buttons have been added & updated with custom icons.")
         sys.exit(0)
 
-# Handle --edit-userhash separately
-if args.edit_userhash:
-    new_userhash = prompt_for_userhash()
-    print(f"Userhash updated: {new_userhash}")
-    sys.exit(0)
-
-# Ensure userhash exists if not in anonymous mode and not in litterbox mode
-USER_HASH = read_registry_value("userhash")
-
-if not USER_HASH and args.file and not args.anonymous and not args.litterbox:
-    USER_HASH = prompt_for_userhash()
-
-def get_database_path():
-    """Get the database path, preferring %APPDATA%/Catbox Uploader/ location."""
-    # New location in %APPDATA%
-    appdata_path = os.path.expandvars(r"%APPDATA%\Catbox Uploader")
-    new_db_path = os.path.join(appdata_path, "catbox.db")
-    
-    # Old location in working directory
-    old_db_path = os.path.join(application_path, "catbox.db")
-    
-    # Create %APPDATA%/Catbox Uploader directory if it doesn't exist
-    os.makedirs(appdata_path, exist_ok=True)
-    
-    # Check if old database exists and new one doesn't
-    if os.path.exists(old_db_path) and not os.path.exists(new_db_path):
-        try:
-            shutil.move(old_db_path, new_db_path)
-            print(f"✅ Migrated database from {old_db_path} to {new_db_path}")
-        except Exception as e:
-            print(f"⚠️ Failed to migrate database: {e}")
-            # Fall back to old location if migration fails
-            return old_db_path
-    
-    return new_db_path
-
-def ensure_database_schema():
-    """Ensure the database exists and has the correct schema."""
-    db_path = get_database_path()
-    
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Check if uploads table exists
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='uploads'
-        """)
-        
-        table_exists = cursor.fetchone() is not None
-        
-        if not table_exists:
-            # Create the uploads table
-            cursor.execute("""
-                CREATE TABLE uploads (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    file_path TEXT,
-                    url TEXT,
-                    mode TEXT,
-                    timestamp INTEGER,
-                    expiry_duration TEXT,
-                    is_deleted INTEGER DEFAULT 0
-                )
-            """)
-            print("✅ Created uploads table")
-        else:
-            # Check if is_deleted column exists (for backward compatibility)
-            cursor.execute("PRAGMA table_info(uploads)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'is_deleted' not in columns:
-                cursor.execute("ALTER TABLE uploads ADD COLUMN is_deleted INTEGER DEFAULT 0")
-                print("✅ Added is_deleted column to uploads table")
-        
-        conn.commit()
-        conn.close()
-        print(f"✅ Database schema validated: {db_path}")
-        return db_path
-        
-    except Exception as e:
-        print(f"❌ Database schema validation failed: {e}")
-        return None
-
-def log_upload(file_path, url, mode, expiry_duration=None):
-    """Log upload information to database."""
-    db_path = ensure_database_schema()
-    if not db_path:
-        return
-        
-    try:
-        file_path = os.path.abspath(file_path)
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO uploads (file_path, url, mode, timestamp, expiry_duration, is_deleted)
-            VALUES (?, ?, ?, ?, ?, 0)
-        """, (
-            file_path,
-            url,
-            mode,
-            int(time.time()),
-            expiry_duration
-        ))
-        conn.commit()
-        conn.close()
-        print(f"✅ Successfully logged upload: {file_path}")
-    except Exception as e:
-        print(f"⚠️ Failed to log upload: {e}")
-
 class UploadWorker(QThread):
     update_progress = pyqtSignal(int)
     update_bytes_uploaded = pyqtSignal(int)
     upload_finished = pyqtSignal(str)
+    remux_status = pyqtSignal(str)
 
-    def __init__(self, file_path, is_anonymous=False, litterbox_time=None):
+    def __init__(self, file_path, is_anonymous=False, litterbox_time=None, faststart=False):
         super().__init__()
         self.file_path = file_path
         self.is_anonymous = is_anonymous
         self.litterbox_time = litterbox_time
+        self.faststart = faststart
         self.total_size = 0
         self.bytes_uploaded = 0
         self._cancelled = False
         self._session = None
+        # Performance telemetry of the last attempt, stored with the upload history
+        self.metrics = {}
+        self._rate_estimator = ThroughputEstimator()
+        self._body_start = None
+        self._body_end = None
+        self._last_sample = None
     
     def cancel(self):
-        """Cancel the upload by closing the session."""
+        """Cancel the upload from the GUI thread.
+
+        Shuts down this upload's sockets so a blocked send or receive fails right away,
+        the worker thread then unwinds and closes the file and session itself.
+        """
         self._cancelled = True
-        if self._session:
-            self._session.close()
+        session = self._session
+        if session:
+            session.abort()
         
     def run(self):
         try:
             # Create a session for this upload
-            self._session = requests.Session()
+            self._session = CancellableSession()
+            if self._cancelled:
+                raise UploadCancelledException("Upload cancelled by user")
             
             # Get file size for progress tracking
             self.total_size = os.path.getsize(self.file_path)
+            self.metrics = {
+                'file_size': self.total_size,
+                'mime_type': mimetypes.guess_type(self.file_path)[0],
+                'endpoint': urlparse(API_LITTERBOX if self.litterbox_time else API_CATBOX).hostname
+            }
             
             # Choose upload method based on parameters
             if self.litterbox_time:
@@ -440,8 +382,24 @@ class UploadWorker(QThread):
         finally:
             if self._session:
                 self._session.close()
+                if self._cancelled:
+                    print(f"🧹 Upload cancelled and cleaned up ({self._session.open_connections()} connection(s) left open)")
                 self._session = None
 
+    def open_upload_file(self):
+        """Open the file to upload, remuxing MP4/MOV files to faststart on the fly if enabled."""
+        if self.faststart and is_faststart_candidate(self.file_path):
+            try:
+                stream = open_faststart_stream(self.file_path)
+                self.remux_status.emit("Faststart: moved moov atom to the front")
+                return stream
+            except Exception as e:
+                # Never fail an upload because of the remux, just send the original file
+                reason = str(e) if isinstance(e, FaststartSkipped) else f"remux error: {e}"
+                print(f"⏩ Skipped faststart remux for {self.file_path}: {reason}")
+                self.remux_status.emit(f"Faststart skipped: {reason}")
+        return open(self.file_path, 'rb')
+
     def create_monitor_callback(self, encoder):
         """Create a callback function for monitoring upload progress."""
         def callback(monitor):
@@ -449,6 +407,17 @@ class UploadWorker(QThread):
             if self._cancelled:
                 raise UploadCancelledException("Upload cancelled by user")
             
+            now = time.monotonic()
+            if self._body_start is None:
+                self._body_start = now
+                self._rate_estimator.reset(now=now)
+                self._last_sample = now
+            elif now - self._last_sample >= 0.5:
+                self._rate_estimator.update(monitor.bytes_read, now=now)
+                self._last_sample = now
+            if self._body_end is None and monitor.bytes_read >= monitor.len:
+                self._body_end = now
+
             self.bytes_uploaded = monitor.bytes_read
             if self.total_size > 0:
                 progress = int((self.bytes_uploaded / self.total_size) * 100)
@@ -456,6 +425,29 @@ class UploadWorker(QThread):
                 self.update_bytes_uploaded.emit(self.bytes_uploaded)
         return callback
 
+    def send_upload(self, url, monitor, headers):
+        """POST the multipart body and record timing telemetry for the attempt."""
+        self._body_start = None
+        self._body_end = None
+        request_start = time.monotonic()
+        trace_start = tracing.now_us()
+        try:
+            with tracing.span("upload.request", url=url, size=self.total_size):
+                return self._session.post(url, data=monitor, headers=headers, timeout=(CONNECT_TIMEOUT, None))
+        finally:
+            response_time = time.monotonic()
+            body_start = self._body_start or request_start
+            body_end = self._body_end or response_time
+            # Monotonic and trace clocks differ, map the body window onto the trace timeline
+            tracing.add_span("upload.body", trace_start + (body_start - request_start) * 1_000_000,
+                             trace_start + (body_end - request_start) * 1_000_000, bytes=self.bytes_uploaded)
+            self.metrics['duration'] = response_time - request_start
+            # Time from the last byte sent until the response headers arrived, i.e. server side latency
+            self.metrics['ttfb'] = response_time - body_end if self._body_end else None
+            if body_end > body_start:
+                self.metrics['avg_throughput'] = self.bytes_uploaded / (body_end - body_start)
+            self.metrics['peak_throughput'] = max(self._rate_estimator.peak_rate, self.metrics.get('avg_throughput') or 0)
+
     def upload_to_catbox(self):
         """Upload file to Catbox."""
         if self._cancelled:
@@ -473,7 +465,7 @@ class UploadWorker(QThread):
             fields['userhash'] = USER_HASH
         
         # Add the file
-        with open(self.file_path, 'rb') as f:
+        with self.open_upload_file() as f:
             fields['fileToUpload'] = (os.path.basename(self.file_path), f, mimetypes.guess_type(self.file_path)[0])
             
             # Create multipart encoder
@@ -486,18 +478,19 @@ class UploadWorker(QThread):
                 'User-Agent': USER_AGENT
             }
             
-            response = self._session.post(url, data=monitor, headers=headers, timeout=None)
+            response = self.send_upload(url, monitor, headers)
             
-        if response.status_code == 200:
-            result = response.text.strip()
-            if result.startswith('http'):
-                return result
-            elif not result:  # Empty response - server bug
-                return "EMPTY_RESPONSE"
+        with tracing.span("upload.parse_response"):
+            if response.status_code == 200:
+                result = response.text.strip()
+                if result.startswith('http'):
+                    return result
+                elif not result:  # Empty response - server bug
+                    return "EMPTY_RESPONSE"
+                else:
+                    return f"❌ Upload failed: {result}"
             else:
-                return f"❌ Upload failed: {result}"
-        else:
-            return f"❌ Upload failed with status code: {response.status_code} \n {response.text.strip()}"
+                return f"❌ Upload failed with status code: {response.status_code} \n {response.text.strip()}"
 
     def upload_to_litterbox(self):
         """Upload file to Litterbox with specified expiration time."""
@@ -510,7 +503,7 @@ class UploadWorker(QThread):
         }
         
         # Add the file
-        with open(self.file_path, 'rb') as f:
+        with self.open_upload_file() as f:
             fields['fileToUpload'] = (os.path.basename(self.file_path), f, mimetypes.guess_type(self.file_path)[0])
             
             # Create multipart encoder
@@ -526,25 +519,19 @@ class UploadWorker(QThread):
             if self._cancelled:
                 return "CANCELLED"
             
-            response = self._session.post(url, data=monitor, headers=headers, timeout=None)
+            response = self.send_upload(url, monitor, headers)
             
-        if response.status_code == 200:
-            result = response.text.strip()
-            if result.startswith('http'):
-                return result
-            elif not result:  # Empty response - server bug
-                return "EMPTY_RESPONSE"
+        with tracing.span("upload.parse_response"):
+            if response.status_code == 200:
+                result = response.text.strip()
+                if result.startswith('http'):
+                    return result
+                elif not result:  # Empty response - server bug
+                    return "EMPTY_RESPONSE"
+                else:
+                    return f"Upload failed: {result}"
             else:
-                return f"Upload failed: {result}"
-        else:
-            return f"Upload failed with status code: {response.status_code}"
-
-def pil_image_to_qpixmap(pil_image: Image.Image) -> QPixmap:
-    if pil_image.mode != "RGBA":
-        pil_image = pil_image.convert("RGBA")
-    data = pil_image.tobytes("raw", "RGBA")
-    qimage = QImage(data, pil_image.width, pil_image.height, QImage.Format.Format_RGBA8888)
-    return QPixmap.fromImage(qimage)
+                return f"Upload failed with status code: {response.status_code}"
 
 def is_video_file(file_path):
     """Check if the file is a video file based on extension."""
@@ -612,8 +599,8 @@ def create_thumbnail(path, deleted=False):
     """Create thumbnail icon, with optional theme-aware fallback icon."""
     if not deleted:
         try:
-            thumb = generate_thumbnail(path)
-            pixmap = QPixmap.fromImage(thumb.toqpixmap().toImage())
+            thumb = thumbnail_cache.get_or_create(path, HISTORY_THUMBNAIL_SIZE)
+            pixmap = pil_image_to_qpixmap(thumb)
             return QIcon(pixmap)
         except:
             pass
@@ -664,8 +651,37 @@ def get_menu_stylesheet(colors: dict) -> str:
         }}
     """
 
+class ThroughputSparkline(QWidget):
+    """Small line graph of the recent throughput samples of an estimator."""
+
+    def __init__(self, estimator, color, parent=None):
+        super().__init__(parent)
+        self.estimator = estimator
+        self.color = QColor(color)
+        self.setFixedSize(90, 20)
+
+    def paintEvent(self, event):
+        samples = list(self.estimator.history)
+        if len(samples) < 2:
+            return
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(self.color, 1.5))
+
+        peak = max(samples) or 1
+        width, height = self.width() - 2, self.height() - 2
+        step = width / (self.estimator.history.maxlen - 1)
+        x_offset = width - step * (len(samples) - 1)
+        points = [(1 + x_offset + i * step, 1 + height - (value / peak) * height) for i, value in enumerate(samples)]
+
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            painter.drawLine(int(x1), int(y1), int(x2), int(y2))
+
 class UploadWindow(QWidget):
-    def __init__(self, file_path, is_anonymous=False, litterbox_time=None):
+    thumbnails_ready = pyqtSignal(object)
+
+    def __init__(self, file_path, is_anonymous=False, litterbox_time=None, faststart=False):
         super().__init__()
         self.file_path = file_path
         self.file_size = os.path.getsize(file_path)
@@ -674,6 +690,8 @@ class UploadWindow(QWidget):
         self.cancelled = False
         self.is_anonymous = is_anonymous
         self.litterbox_time = litterbox_time
+        self.faststart = faststart
+        self.retry_count = 0
         self.start_time = time.time()  # Initialize start_time here
         use_light = is_windows_light_mode()
         theme_colors = light_theme_colors if use_light else dark_theme_colors
@@ -695,10 +713,26 @@ class UploadWindow(QWidget):
         self.setStyleSheet(f"background-color: {theme_colors['bg']};")
         layout = QHBoxLayout()
         self.thumbnail_label = QLabel(self)
-        pixmap = pil_image_to_qpixmap(generate_thumbnail(self.file_path))
-        self.thumbnail_label.setPixmap(pixmap.scaled(120, 120, Qt.AspectRatioMode.KeepAspectRatio))
+        self.thumbnail_label.setFixedSize(UPLOAD_WINDOW_THUMBNAIL_SIZE, UPLOAD_WINDOW_THUMBNAIL_SIZE)
         layout.addWidget(self.thumbnail_label)
 
+        # One decode for this window, the copy stored with the upload and the history row.
+        # It runs in an isolated worker so a file that hangs the thumbnailer can't freeze the window.
+        # A finished upload is only logged once the thumbnail is in (see log_upload_with_thumbnail).
+        self.thumbnail_image = None  # Kept so it can be stored with the upload history
+        self.closing_hidden = False  # See close_later()
+        self.thumbnails_done = False
+        self.pending_upload = None  # log_upload() arguments of an upload waiting for its thumbnail
+        self.thumbnail_wait_timer = QTimer(self)
+        self.thumbnail_wait_timer.setSingleShot(True)
+        self.thumbnail_wait_timer.setInterval(THUMBNAIL_WAIT_MS)
+        self.thumbnail_wait_timer.timeout.connect(self.thumbnail_wait_expired)
+        self.thumbnails_ready.connect(self.show_thumbnails)
+        self.thumbnail_pool = IsolatedThumbnailPool(workers=1)
+        self.thumbnail_pool.submit(
+            self.file_path, [UPLOAD_WINDOW_THUMBNAIL_SIZE, UPLOAD_THUMBNAIL_SIZE, HISTORY_THUMBNAIL_SIZE]
+        ).add_done_callback(self.emit_thumbnails)
+
         right_layout = QVBoxLayout()
 
         # Create file label
@@ -720,8 +754,15 @@ class UploadWindow(QWidget):
 
         right_layout.addWidget(self.progress_bar)
 
+        self.rate_estimator = ThroughputEstimator()
         self.eta_label = QLabel("ETA: Starting...")
-        right_layout.addWidget(self.eta_label)
+        self.sparkline = ThroughputSparkline(self.rate_estimator, theme_colors['chunk'])
+        self.sparkline.setToolTip("Upload speed over the last 30 seconds")
+        eta_layout = QHBoxLayout()
+        eta_layout.addWidget(self.eta_label)
+        eta_layout.addStretch()
+        eta_layout.addWidget(self.sparkline)
+        right_layout.addLayout(eta_layout)
 
         self.cancel_button = QPushButton("Cancel")
         self.cancel_button.setStyleSheet(f"background-color: {theme_colors['chunk']}; color: {theme_colors['text']};")
@@ -732,10 +773,11 @@ class UploadWindow(QWidget):
         self.setLayout(layout)
         self.move_to_bottom_right()
 
-        self.upload_worker = UploadWorker(file_path, is_anonymous, litterbox_time)
+        self.upload_worker = UploadWorker(file_path, is_anonymous, litterbox_time, faststart)
         self.upload_worker.update_progress.connect(self.update_progress)
         self.upload_worker.update_bytes_uploaded.connect(self.update_bytes_uploaded)
         self.upload_worker.upload_finished.connect(self.update_ui_after_upload)
+        self.upload_worker.remux_status.connect(self.show_remux_status)
         self.upload_worker.start()
 
         self.timer = QTimer()
@@ -757,44 +799,46 @@ class UploadWindow(QWidget):
     def update_bytes_uploaded(self, bytes_uploaded):
         self.bytes_uploaded = bytes_uploaded
 
+    def show_remux_status(self, message):
+        """Show whether the faststart remux was applied or skipped."""
+        if self.uploading:
+            self.file_label.setText(f"{self.file_label.text()}\n{message}")
+        self.file_label.setToolTip(message)
+
     def update_eta(self):
-        if hasattr(self, 'start_time') and hasattr(self, 'bytes_uploaded') and self.bytes_uploaded > 0:
-            elapsed_time = time.time() - self.start_time
-            
-            # Check if upload_worker and total_size are available
-            if hasattr(self.upload_worker, 'total_size') and self.upload_worker.total_size > 0:
-                total_bytes = self.upload_worker.total_size
-            else:
-                # Fallback: try to get file size directly
-                try:
-                    total_bytes = os.path.getsize(self.upload_worker.file_path)
-                except:
-                    total_bytes = 0
-            
-            if total_bytes > 0 and elapsed_time > 0:
-                bytes_per_second = self.bytes_uploaded / elapsed_time
-                remaining_bytes = total_bytes - self.bytes_uploaded
-                eta_seconds = remaining_bytes / bytes_per_second
-                
-                # Format ETA with hours, minutes, and seconds
-                if eta_seconds > 3600:  # More than 1 hour
-                    hours = int(eta_seconds // 3600)
-                    minutes = int((eta_seconds % 3600) // 60)
-                    seconds = int(eta_seconds % 60)
-                    eta_text = f"ETA: {hours}h {minutes}m {seconds}s"
-                elif eta_seconds > 60:  # More than 1 minute
-                    minutes = int(eta_seconds // 60)
-                    seconds = int(eta_seconds % 60)
-                    eta_text = f"ETA: {minutes}m {seconds}s"
-                else:  # Less than 1 minute
-                    seconds = int(eta_seconds)
-                    eta_text = f"ETA: {seconds}s"
-                
-                self.eta_label.setText(eta_text)
-            else:
-                self.eta_label.setText("ETA: Calculating...")
-        else:
+        if self.bytes_uploaded <= 0:
             self.eta_label.setText("ETA: Starting...")
+            return
+
+        # Check if upload_worker and total_size are available
+        if hasattr(self.upload_worker, 'total_size') and self.upload_worker.total_size > 0:
+            total_bytes = self.upload_worker.total_size
+        else:
+            # Fallback: try to get file size directly
+            try:
+                total_bytes = os.path.getsize(self.upload_worker.file_path)
+            except:
+                total_bytes = 0
+
+        self.rate_estimator.update(self.bytes_uploaded)
+        self.sparkline.update()
+
+        if total_bytes > 0 and self.bytes_uploaded >= total_bytes:
+            # Everything is sent, any remaining wait is on the server side
+            self.eta_label.setText("Waiting for server response...")
+            return
+
+        eta_seconds = self.rate_estimator.eta(total_bytes - self.bytes_uploaded) if total_bytes > 0 else None
+        if eta_seconds is not None:
+            self.eta_label.setText(f"{format_eta(eta_seconds)} · {format_rate(self.rate_estimator.instant_rate)}")
+            self.eta_label.setToolTip(
+                f"Current: {format_rate(self.rate_estimator.instant_rate)}\n"
+                f"Smoothed: {format_rate(self.rate_estimator.rate)}\n"
+                f"Average: {format_rate(self.rate_estimator.average_rate)}\n"
+                f"Peak: {format_rate(self.rate_estimator.peak_rate)}"
+            )
+        else:
+            self.eta_label.setText("ETA: Calculating...")
 
     @pyqtSlot(str)
     def update_ui_after_upload(self, result):
@@ -812,6 +856,7 @@ class UploadWindow(QWidget):
             self.uploading = False
             self.timer.stop()
         elif result == "EMPTY_RESPONSE":
+            log_upload_failure(self.file_path, self.get_upload_mode(), "Empty response", self.get_upload_metrics())
             self.handle_empty_response()
         elif "http" in result:
             self.file_label.setText(f"<p>✅ Uploaded: <a href='{result}'>{result}</a></p>")
@@ -832,20 +877,18 @@ class UploadWindow(QWidget):
             self.progress_bar.setValue(100)
             self.eta_label.setText("Upload Complete")
 
-            if self.is_anonymous:
-                mode = "Anonymous"
-            elif self.litterbox_time:
-                mode = f"Litterbox {self.litterbox_time}"
-            else:
-                mode = "User"
+            mode = self.get_upload_mode()
 
-            log_upload(file_path=self.file_path, url=result, mode=mode, expiry_duration=getattr(self, 'litterbox_time', None))
+            self.log_upload_with_thumbnail(file_path=self.file_path, url=result, mode=mode,
+                                           expiry_duration=getattr(self, 'litterbox_time', None),
+                                           metrics=self.get_upload_metrics())
             self.uploading = False
             self.timer.stop()  # Stop the timer when the upload is complete
             
             # Force UI to update now
             QApplication.processEvents()
         else:
+            log_upload_failure(self.file_path, self.get_upload_mode(), result, self.get_upload_metrics())
             self.file_label.setText(result)
             self.cancel_button.setText("OK")
             self.progress_bar.setValue(100)
@@ -853,6 +896,18 @@ class UploadWindow(QWidget):
             self.uploading = False
             self.timer.stop()
 
+    def get_upload_mode(self):
+        """Mode label stored in the upload history."""
+        if self.is_anonymous:
+            return "Anonymous"
+        elif self.litterbox_time:
+            return f"Litterbox {self.litterbox_time}"
+        return "User"
+
+    def get_upload_metrics(self):
+        """Telemetry of the last attempt including how often the user had to re-upload."""
+        return {**self.upload_worker.metrics, 'retry_count': self.retry_count}
+
     def show_url_context_menu(self, position):
         """Show context menu for the uploaded URL."""
         url = self.file_label.property("upload_url")
@@ -917,14 +972,8 @@ class UploadWindow(QWidget):
                 except TypeError:
                     pass  # Already disconnected
                 
-                # Cancel the upload worker
+                # Cancel the upload worker, its socket is shut down so it unwinds on its own
                 self.upload_worker.cancel()
-                
-                # Forcefully terminate the thread - requests doesn't support true cancellation
-                # Give it a tiny moment to clean up, then terminate
-                if not self.upload_worker.wait(100):  # Wait 100ms max
-                    self.upload_worker.terminate()
-                    self.upload_worker.wait()  # Wait for termination to complete
             
             # Update UI immediately
             self.file_label.setText("❌ Upload cancelled")
@@ -938,6 +987,75 @@ class UploadWindow(QWidget):
             # If not uploading, just close the window
             self.close()
 
+    def emit_thumbnails(self, future):
+        """Pass the pool's result to the GUI thread, None if it failed."""
+        if future.cancelled():
+            return
+        try:
+            thumbnails = future.result()
+        except Exception as e:
+            print(f"⚠️ Failed to generate thumbnail: {e}")
+            thumbnails = None
+        try:
+            self.thumbnails_ready.emit(thumbnails)
+        except RuntimeError:
+            pass  # Window was deleted in the meantime
+
+    def show_thumbnails(self, thumbnails):
+        if thumbnails is not None:
+            self.thumbnail_image = thumbnails[UPLOAD_THUMBNAIL_SIZE]
+            self.thumbnail_label.setPixmap(pil_image_to_qpixmap(thumbnails[UPLOAD_WINDOW_THUMBNAIL_SIZE]))
+        self.thumbnails_done = True
+        self.flush_pending_upload()
+
+    def log_upload_with_thumbnail(self, **upload):
+        """Log a finished upload once its thumbnail is ready, so the history stores it with the upload."""
+        self.pending_upload = upload
+        if self.thumbnails_done:
+            self.flush_pending_upload()
+        else:
+            self.thumbnail_wait_timer.start()
+
+    def thumbnail_wait_expired(self):
+        print("⚠️ Thumbnail took too long, logging the upload without it")
+        self.flush_pending_upload()
+
+    def flush_pending_upload(self):
+        self.thumbnail_wait_timer.stop()
+        if self.pending_upload is None:
+            return
+        upload, self.pending_upload = self.pending_upload, None
+        log_upload(**upload, thumbnail=self.thumbnail_image)
+
+    def closeEvent(self, event):
+        """Cancel a running upload and wait for the worker to clean up before closing.
+
+        A worker still stuck after CANCEL_WAIT_MS (a connect can't be aborted before it
+        completes) is left to unwind on its own: the window hides and closes once it has.
+        """
+        if hasattr(self, 'upload_worker') and self.upload_worker.isRunning():
+            self.upload_worker.cancel()
+            if not self.upload_worker.wait(CANCEL_WAIT_MS):
+                print("⚠️ Upload is still cancelling, closing once it has stopped")
+                self.close_later(event, self.upload_worker.finished)
+                return
+        if self.pending_upload is not None:
+            # Keep running hidden until the upload has been logged with its thumbnail
+            self.close_later(event, self.thumbnails_ready, self.thumbnail_wait_timer.timeout)
+            return
+        self.thumbnail_pool.shutdown()
+        super().closeEvent(event)
+        if self.closing_hidden and not any(widget.isVisible() for widget in QApplication.topLevelWidgets()):
+            QApplication.quit()  # Closing a hidden window doesn't count as closing the last window
+
+    def close_later(self, event, *signals):
+        """Hide instead of closing, and close once one of signals fires."""
+        self.closing_hidden = True
+        for signal in signals:
+            signal.connect(self.close, Qt.ConnectionType.QueuedConnection)
+        self.hide()
+        event.ignore()
+
     def handle_empty_response(self):
         """Handle empty response from server - known Catbox bug."""
         self.progress_bar.setValue(100)
@@ -1007,14 +1125,18 @@ class UploadWindow(QWidget):
         self.eta_label.setText("ETA: Starting...")
         self.cancel_button.setText("Cancel")
         self.uploading = True
+        self.retry_count += 1
         self.start_time = time.time()
         self.bytes_uploaded = 0
+        self.rate_estimator.reset()
+        self.sparkline.update()
         
         # Create new worker and restart upload
-        self.upload_worker = UploadWorker(self.file_path, self.is_anonymous, self.litterbox_time)
+        self.upload_worker = UploadWorker(self.file_path, self.is_anonymous, self.litterbox_time, self.faststart)
         self.upload_worker.update_progress.connect(self.update_progress)
         self.upload_worker.update_bytes_uploaded.connect(self.update_bytes_uploaded)
         self.upload_worker.upload_finished.connect(self.update_ui_after_upload)
+        self.upload_worker.remux_status.connect(self.show_remux_status)
         self.upload_worker.start()
         
         # Restart timer
@@ -1077,6 +1199,44 @@ class ErrorDialog(QDialog):
 
         self.setLayout(layout)
 
+class ReportDialog(QDialog):
+    def __init__(self, report, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Upload Performance Report")
+        self.setWindowIcon(QIcon(ico_path))
+        self.resize(760, 600)
+
+        layout = QVBoxLayout()
+        self.text_edit = QTextEdit()
+        self.text_edit.setReadOnly(True)
+        self.text_edit.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        self.text_edit.setFontFamily("Consolas")
+        self.text_edit.setPlainText(report)
+        layout.addWidget(self.text_edit)
+
+        self.ok_button = QPushButton("OK")
+        self.ok_button.clicked.connect(self.close)
+        layout.addWidget(self.ok_button)
+
+        self.setLayout(layout)
+
+def warm_thumbnail_cache():
+    """Generate the history thumbnails of every uploaded file that isn't cached yet."""
+    file_paths = sorted({upload[0] for upload in load_uploads()})
+    generated = thumbnail_cache.prewarm(
+        file_paths, HISTORY_THUMBNAIL_SIZE,
+        progress=lambda done, total: print(f"🖼️ {done}/{total}", end="\r")
+    )
+    print(f"\n✅ Thumbnail cache warmed, generated {generated} of {len(file_paths)} thumbnails")
+
+def show_report():
+    """Print the upload performance report and show it in a dialog."""
+    uploads, failures = load_upload_metrics()
+    report = build_report(uploads, failures)
+    print(report)
+    dialog = ReportDialog(report)
+    dialog.exec()
+
 class ErrorHandler:
     """Redirects stderr to a custom scrollable error dialog."""
     def __init__(self, app):
@@ -1128,6 +1288,26 @@ def ensure_icons_directory():
                 pass  # Ignore copy errors
 
 if __name__ == "__main__":
+    # Thumbnail pool workers of the frozen exe start here, before any argument parsing
+    multiprocessing.freeze_support()
+
+    args = parser.parse_args()
+    tracing.configure(args.trace)
+
+    # Handle --edit-userhash separately
+    if args.edit_userhash:
+        new_userhash = prompt_for_userhash()
+        print(f"Userhash updated: {new_userhash}")
+        sys.exit(0)
+
+    # Ensure userhash exists if not in anonymous mode and not in litterbox mode
+    USER_HASH = read_registry_value("userhash")
+    if not USER_HASH and args.file and not args.anonymous and not args.litterbox:
+        USER_HASH = prompt_for_userhash()
+
+    # Faststart remux can be enabled per upload with --faststart or permanently in the registry
+    FASTSTART_ENABLED = args.faststart or read_registry_value("faststart") == "1"
+
     main()
     app = QApplication(sys.argv)
     sys.stderr = ErrorHandler(app)  # Redirect stderr
@@ -1140,13 +1320,21 @@ if __name__ == "__main__":
         if not check_registry_keys():
             add_registry_keys()
 
+        if args.warm_thumbnails:
+            warm_thumbnail_cache()
+            sys.exit(0)
+
+        if args.report:
+            show_report()
+            sys.exit(0)
+
         if args.history:
             from history_viewer import show_history_window
             show_history_window()
             sys.exit(app.exec())
 
         if args.file:  # Ensure a file was provided
-            window = UploadWindow(args.file, is_anonymous=args.anonymous, litterbox_time=args.litterbox)
+            window = UploadWindow(args.file, is_anonymous=args.anonymous, litterbox_time=args.litterbox, faststart=FASTSTART_ENABLED)
             window.show()
             sys.exit(app.exec())
         else:
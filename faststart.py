@@ -0,0 +1,200 @@
+import os
+import struct
+
+# Extensions that use the ISO base media (MP4/QuickTime) container
+FASTSTART_EXTENSIONS = ['.mp4', '.m4v', '.mov']
+
+# Atoms that only contain other atoms on the path down to the chunk offset tables
+CONTAINER_ATOMS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+# Size of the blocks read from the source file while streaming
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+class FaststartSkipped(Exception):
+    """Exception raised when a file can't or doesn't need to be remuxed."""
+    pass
+
+def is_faststart_candidate(file_path):
+    """Check if the file is an MP4/MOV container based on extension."""
+    return any(file_path.lower().endswith(ext) for ext in FASTSTART_EXTENSIONS)
+
+def parse_atom_header(header, offset, parent_end):
+    """Parse an atom header located at offset inside a parent ending at parent_end.
+
+    Returns:
+        A (kind, header_size, size) tuple
+    """
+    if len(header) < 8:
+        raise FaststartSkipped("Truncated atom header")
+
+    size, kind = struct.unpack_from('>I4s', header)
+    header_size = 8
+    if size == 1:
+        if len(header) < 16:
+            raise FaststartSkipped("Truncated 64-bit atom header")
+        size = struct.unpack_from('>Q', header, 8)[0]
+        header_size = 16
+    elif size == 0:
+        # Atom extends to the end of its parent
+        size = parent_end - offset
+
+    if size < header_size or offset + size > parent_end:
+        raise FaststartSkipped(f"Malformed '{kind.decode('latin-1')}' atom")
+    return kind, header_size, size
+
+def read_top_level_atoms(f, file_size):
+    """Walk the top-level atoms of an open file, returning (kind, offset, size) tuples."""
+    atoms = []
+    offset = 0
+    while offset < file_size:
+        f.seek(offset)
+        kind, _, size = parse_atom_header(f.read(16), offset, file_size)
+        atoms.append((kind, offset, size))
+        offset += size
+    return atoms
+
+def patch_chunk_offsets(moov, start, end, shift_offset):
+    """Rewrite every stco/co64 entry inside moov[start:end] in place using shift_offset."""
+    offset = start
+    while offset < end:
+        kind, header_size, size = parse_atom_header(moov[offset:offset + 16], offset, end)
+        body = offset + header_size
+
+        if kind in CONTAINER_ATOMS:
+            patch_chunk_offsets(moov, body, offset + size, shift_offset)
+        elif kind in (b'stco', b'co64'):
+            # Full box: version/flags (4 bytes), entry count (4 bytes), then the table
+            count = struct.unpack_from('>I', moov, body + 4)[0]
+            entry_format = '>%dI' % count if kind == b'stco' else '>%dQ' % count
+            table = body + 8
+            if table + struct.calcsize(entry_format) > offset + size:
+                raise FaststartSkipped(f"Malformed '{kind.decode('latin-1')}' table")
+
+            entries = [shift_offset(entry) for entry in struct.unpack_from(entry_format, moov, table)]
+            if kind == b'stco' and any(entry > 0xFFFFFFFF for entry in entries):
+                raise FaststartSkipped("Chunk offsets would overflow the 32-bit stco table")
+            struct.pack_into(entry_format, moov, table, *entries)
+        elif kind == b'cmov':
+            raise FaststartSkipped("Compressed moov atoms are not supported")
+
+        offset += size
+
+class FaststartStream:
+    """Read-only file-like object that yields the remuxed file without writing it to disk.
+
+    The remuxed layout is described as a list of segments, each either a bytes
+    object (the patched moov) or an (offset, length) range of the source file.
+    """
+
+    def __init__(self, file_path, segments):
+        self.file_path = file_path
+        self.segments = segments
+        self.total_size = sum(len(s) if isinstance(s, (bytes, bytearray)) else s[1] for s in segments)
+        self._file = open(file_path, 'rb')
+        self._segment_index = 0
+        self._segment_pos = 0
+        self._position = 0
+
+    @property
+    def len(self):
+        """Remaining bytes, as expected by requests_toolbelt's MultipartEncoder."""
+        return self.total_size - self._position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.len
+
+        chunks = []
+        while size > 0 and self._segment_index < len(self.segments):
+            segment = self.segments[self._segment_index]
+            if isinstance(segment, (bytes, bytearray)):
+                chunk = bytes(segment[self._segment_pos:self._segment_pos + size])
+                segment_length = len(segment)
+            else:
+                start, segment_length = segment
+                self._file.seek(start + self._segment_pos)
+                chunk = self._file.read(min(size, segment_length - self._segment_pos, STREAM_BLOCK_SIZE))
+                if not chunk:
+                    raise IOError(f"{self.file_path} changed while uploading")
+
+            chunks.append(chunk)
+            size -= len(chunk)
+            self._position += len(chunk)
+            self._segment_pos += len(chunk)
+            if self._segment_pos >= segment_length:
+                self._segment_index += 1
+                self._segment_pos = 0
+
+        return b"".join(chunks)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def plan_faststart(file_path):
+    """Work out how to move the moov atom of an MP4/MOV file in front of its media data.
+
+    Returns:
+        A list of segments suitable for FaststartStream
+
+    Raises:
+        FaststartSkipped: If the file isn't a candidate, is already faststart or can't be remuxed safely
+    """
+    if not is_faststart_candidate(file_path):
+        raise FaststartSkipped("Not an MP4/MOV file")
+
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        atoms = read_top_level_atoms(f, file_size)
+        kinds = [kind for kind, _, _ in atoms]
+
+        if b'moof' in kinds:
+            raise FaststartSkipped("Fragmented MP4 streams progressively already")
+        if b'moov' not in kinds:
+            raise FaststartSkipped("No moov atom found")
+        if b'mdat' not in kinds:
+            raise FaststartSkipped("No mdat atom found")
+
+        moov_index = kinds.index(b'moov')
+        mdat_index = kinds.index(b'mdat')
+        if moov_index < mdat_index:
+            raise FaststartSkipped("Already faststart")
+
+        _, moov_offset, moov_size = atoms[moov_index]
+        _, mdat_offset, _ = atoms[mdat_index]
+        f.seek(moov_offset)
+        moov = bytearray(f.read(moov_size))
+
+    moov_end = moov_offset + moov_size
+
+    def shift_offset(entry):
+        # Data between the first mdat and the old moov moves down by the size of moov,
+        # anything before the first mdat or after the old moov keeps its position
+        if mdat_offset <= entry < moov_offset:
+            return entry + moov_size
+        return entry
+
+    _, moov_header_size, _ = parse_atom_header(moov[:16], 0, moov_size)
+    patch_chunk_offsets(moov, moov_header_size, moov_size, shift_offset)
+
+    segments = []
+    if mdat_offset > 0:
+        segments.append((0, mdat_offset))
+    segments.append(bytes(moov))
+    segments.append((mdat_offset, moov_offset - mdat_offset))
+    if moov_end < file_size:
+        segments.append((moov_end, file_size - moov_end))
+    return segments
+
+def open_faststart_stream(file_path):
+    """Open a streaming faststart view of file_path.
+
+    Raises:
+        FaststartSkipped: See plan_faststart
+    """
+    return FaststartStream(file_path, plan_faststart(file_path))
@@ -1,25 +1,36 @@
+import bisect
 import ctypes
 import os
-import sqlite3
-import re
 import sys
 import time
 import winreg
 from datetime import datetime
-import shutil
 import json
 import lzstring
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QColor, QFont, QIcon, QPixmap, QAction, QCursor
+from requests.adapters import HTTPAdapter
+from PIL import Image
+from PyQt6.QtCore import (Qt, QAbstractTableModel, QEvent, QModelIndex, QObject, QRect,
+                          QRectF, QSize, QThread, QTimer, pyqtSignal)
+from PyQt6.QtGui import (QAbstractTextDocumentLayout, QBrush, QColor, QFont, QIcon, QImage,
+                         QPainter, QPalette, QPen, QPixmap, QAction, QCursor, QTextDocument,
+                         QTextOption)
 from PyQt6.QtWidgets import (QAbstractItemView, QApplication, QHBoxLayout,
                              QHeaderView, QLabel, QMainWindow, QMenu,
-                             QMessageBox, QPushButton, QTableWidget,
-                             QTableWidgetItem, QVBoxLayout, QWidget, QToolTip,
-                             QDialog, QProgressBar, QTextEdit, QCheckBox, QLineEdit)
+                             QMessageBox, QPushButton, QStyle, QStyledItemDelegate,
+                             QStyleOptionButton, QStyleOptionViewItem, QTableView,
+                             QVBoxLayout, QWidget, QToolTip,
+                             QDialog, QProgressBar, QTextEdit, QLineEdit)
 
-from thumb import generate_thumbnail
+from thumb_cache import thumbnail_cache, encode_thumbnail, decode_thumbnail
+from thumb_worker import IsolatedThumbnailPool
+import storage
+import tracing
+from throughput import ThroughputEstimator, format_eta
 
 if getattr(sys, 'frozen', False):
     application_path = os.path.dirname(sys.executable)
@@ -27,8 +38,40 @@ else:
     application_path = os.path.dirname(os.path.abspath(__file__))
 
 # Constants
-DB_NAME = "catbox.db"
+APP_VERSION = "1.1.7"
 EXPIRED_ICON_ID = 16777
+HISTORY_THUMBNAIL_SIZE = 48
+UPLOAD_THUMBNAIL_SIZE = 96  # Stored in the database when the file is uploaded
+
+# History table columns
+(CHECK_COLUMN, ICON_COLUMN, NAME_COLUMN, PATH_COLUMN, MODE_COLUMN,
+ UPLOADED_COLUMN, URL_COLUMN, TIME_LEFT_COLUMN, DELETE_COLUMN) = range(9)
+HISTORY_HEADERS = ["", "Icon", "File Name", "File Path", "Mode", "Uploaded", "URL", "Time Left", ""]
+
+# Uploads loaded from the database each time the history table scrolls near its end
+HISTORY_PAGE_SIZE = 200
+
+# Typing pause before the history is searched
+SEARCH_DEBOUNCE_MS = 150
+
+# How often an open history checks the database for changes
+HISTORY_POLL_MS = 1000
+
+# Decoded history thumbnails kept in memory, others are decoded again when scrolled to
+MAX_HISTORY_ICONS = 512
+
+# Model roles of the history table
+HTML_ROLE = Qt.ItemDataRole.UserRole  # Rich text of the name, path and URL cells
+ROW_ROLE = Qt.ItemDataRole.UserRole + 1  # The row's HistoryRow
+
+# PIL raw packings and the QImage formats they produce, chosen so QPixmap.fromImage can
+# copy the pixels as they are instead of converting them (Windows is little-endian, so
+# Qt's 32-bit formats are laid out as BGRA in memory)
+QIMAGE_FORMATS = {
+    "RGBA": ("BGRa", QImage.Format.Format_ARGB32_Premultiplied),
+    "RGB": ("BGRX", QImage.Format.Format_RGB32),
+    "L": ("L", QImage.Format.Format_Grayscale8)
+}
 SHELL32_DLL = "C:\\WINDOWS\\System32\\SHELL32.dll"
 ico_path = os.path.join(application_path, "icons", "icon.ico")
 REG_PATH = r"Software\CatboxUploader"
@@ -68,77 +111,10 @@ light_theme_colors = {
 API_CATBOX = "https://catbox.moe/user/api.php"
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
 
-def get_database_path():
-    """Get the database path, preferring %APPDATA%/Catbox Uploader/ location."""
-    # New location in %APPDATA%
-    appdata_path = os.path.expandvars(r"%APPDATA%\Catbox Uploader")
-    new_db_path = os.path.join(appdata_path, DB_NAME)
-    
-    # Old location in working directory
-    old_db_path = os.path.join(application_path, DB_NAME)
-    
-    # Create %APPDATA%/Catbox Uploader directory if it doesn't exist
-    os.makedirs(appdata_path, exist_ok=True)
-    
-    # Check if old database exists and new one doesn't
-    if os.path.exists(old_db_path) and not os.path.exists(new_db_path):
-        try:
-            shutil.move(old_db_path, new_db_path)
-            print(f"✅ Migrated database from {old_db_path} to {new_db_path}")
-        except Exception as e:
-            print(f"⚠️ Failed to migrate database: {e}")
-            # Fall back to old location if migration fails
-            return old_db_path
-    
-    return new_db_path
-
-def ensure_database_schema():
-    """Ensure the database exists and has the correct schema."""
-    db_path = get_database_path()
-    
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Check if uploads table exists
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='uploads'
-        """)
-        
-        table_exists = cursor.fetchone() is not None
-        
-        if not table_exists:
-            # Create the uploads table
-            cursor.execute("""
-                CREATE TABLE uploads (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    file_path TEXT,
-                    url TEXT,
-                    mode TEXT,
-                    timestamp INTEGER,
-                    expiry_duration TEXT,
-                    is_deleted INTEGER DEFAULT 0
-                )
-            """)
-            print("✅ Created uploads table")
-        else:
-            # Check if is_deleted column exists (for backward compatibility)
-            cursor.execute("PRAGMA table_info(uploads)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'is_deleted' not in columns:
-                cursor.execute("ALTER TABLE uploads ADD COLUMN is_deleted INTEGER DEFAULT 0")
-                print("✅ Added is_deleted column to uploads table")
-        
-        conn.commit()
-        conn.close()
-        print(f"✅ Database schema validated: {db_path}")
-        return db_path
-        
-    except Exception as e:
-        print(f"❌ Database schema validation failed: {e}")
-        return None
+# Files per deletefiles request of a mass delete, and requests in flight at once
+DELETE_BATCH_SIZE = 50
+DELETE_CONCURRENCY = 4
+DELETE_TIMEOUT = 60
 
 def read_registry_value(name):
     """Read a value from Windows Registry under HKEY_CURRENT_USER."""
@@ -160,14 +136,8 @@ def delete_files(urls, userhash):
         print("❌ No valid Catbox URLs provided.")
         return
 
-    data = {
-        "reqtype": "deletefiles",
-        "userhash": userhash,
-        "files": " ".join(filenames)
-    }
-
     try:
-        response = requests.post(API_CATBOX, data=data, headers={"User-Agent": USER_AGENT})
+        response = request_delete(filenames, userhash)
         if response.status_code == 200:
             print("🗑️ Delete request successful.")
             return response.text.strip()
@@ -176,7 +146,38 @@ def delete_files(urls, userhash):
     except requests.RequestException as e:
         return f"❌ Error while deleting files: {str(e)}"
 
+def request_delete(filenames, userhash, session=requests):
+    """Send one deletefiles request for filenames. Raises requests.RequestException."""
+    data = {
+        "reqtype": "deletefiles",
+        "userhash": userhash,
+        "files": " ".join(filenames)
+    }
+    with tracing.span("delete.request", files=len(filenames)):
+        return session.post(API_CATBOX, data=data, headers={"User-Agent": USER_AGENT}, timeout=DELETE_TIMEOUT)
+
+def delete_result(status_code, text):
+    """Interpret the reply to a deletefiles request.
+
+    Returns:
+        (deleted, symbol, note): whether the files are gone from Catbox, and how to log it.
+    """
+    text_lower = text.lower()
+    if "file doesn't exist" in text_lower or "not found" in text_lower:
+        return True, "✓", "already deleted from Catbox"
+    if "permission denied" in text_lower or "invalid hash" in text_lower:
+        return False, "⚠️", "no permission - different userhash?"
+    if status_code == 200 and "error" not in text_lower:
+        return True, "✓", "deleted"
+    return False, "❌", f"error: {text or status_code}"
+
 class MassDeleteWorker(QThread):
+    """Deletes files from Catbox in batches of DELETE_BATCH_SIZE per request.
+
+    Up to DELETE_CONCURRENCY requests run at once over one pooled session. Catbox
+    answers a batch as a whole, so a batch it rejects is split in half and retried,
+    down to single files, to find out which ones failed.
+    """
     progress_updated = pyqtSignal(int, int, str)  # current, total, message
     finished_signal = pyqtSignal(list)  # list of successfully deleted URLs
 
@@ -185,39 +186,46 @@ class MassDeleteWorker(QThread):
         self.urls = urls
         self.userhash = userhash
         self.deleted_urls = []
+        self.session = None
+
+    def delete_batch(self, urls):
+        """Delete urls, returns a (url, deleted, symbol, note) result per URL."""
+        filenames = [url.strip().split("/")[-1] for url in urls]
+        try:
+            response = request_delete(filenames, self.userhash, self.session)
+        except requests.RequestException as e:
+            return [(url, False, "❌", f"exception: {e}") for url in urls]
+
+        deleted, symbol, note = delete_result(response.status_code, response.text.strip())
+        if len(urls) == 1 or (deleted and note == "deleted"):
+            return [(url, deleted, symbol, note) for url in urls]
+        middle = len(urls) // 2
+        return self.delete_batch(urls[:middle]) + self.delete_batch(urls[middle:])
 
     def run(self):
         total = len(self.urls)
-        for i, url in enumerate(self.urls, 1):
-            filename = os.path.basename(url)
-            self.progress_updated.emit(i, total, f"Deleting {filename}...")
-            
-            try:
-                response = delete_files([url], self.userhash)
-                if response:
-                    # Handle various response cases
-                    response_lower = response.lower()
-                    if "file doesn't exist" in response_lower or "not found" in response_lower:
-                        # File already deleted from Catbox
-                        self.deleted_urls.append(url)
-                        self.progress_updated.emit(i, total, f"✓ {filename} (already deleted from Catbox)")
-                    elif "permission denied" in response_lower or "invalid hash" in response_lower:
-                        # Different userhash or no permission
-                        self.progress_updated.emit(i, total, f"⚠️ {filename} (no permission - different userhash?)")
-                    elif "error" not in response_lower:
-                        # Successfully deleted
+        if not self.userhash:
+            print("❌ Userhash is required to delete files.")
+            self.finished_signal.emit(self.deleted_urls)
+            return
+
+        self.progress_updated.emit(0, total, f"Deleting {total} files...")
+        processed = 0
+        with requests.Session() as self.session, ThreadPoolExecutor(max_workers=DELETE_CONCURRENCY) as executor:
+            self.session.mount("https://", HTTPAdapter(pool_maxsize=DELETE_CONCURRENCY))
+            futures = {executor.submit(self.delete_batch, self.urls[start:start + DELETE_BATCH_SIZE]):
+                       self.urls[start:start + DELETE_BATCH_SIZE] for start in range(0, total, DELETE_BATCH_SIZE)}
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = [(url, False, "❌", f"exception: {e}") for url in futures[future]]
+                for url, deleted, symbol, note in results:
+                    processed += 1
+                    if deleted:
                         self.deleted_urls.append(url)
-                        self.progress_updated.emit(i, total, f"✓ {filename} (deleted)")
-                    else:
-                        # Other error
-                        self.progress_updated.emit(i, total, f"❌ {filename} (error: {response})")
-                else:
-                    self.progress_updated.emit(i, total, f"❌ {filename} (no response)")
-            except Exception as e:
-                self.progress_updated.emit(i, total, f"❌ {filename} (exception: {str(e)})")
-            
-            time.sleep(0.1)  # Small delay to show progress
-        
+                    self.progress_updated.emit(processed, total, f"{symbol} {os.path.basename(url)} ({note})")
+
         self.finished_signal.emit(self.deleted_urls)
 
 class MassDeleteDialog(QDialog):
@@ -243,6 +251,7 @@ class MassDeleteDialog(QDialog):
         layout.addWidget(self.log_text)
         
         self.setLayout(layout)
+        self.rate_estimator = ThroughputEstimator()
         
         # Start the worker
         self.worker = MassDeleteWorker(urls, userhash)
@@ -252,7 +261,12 @@ class MassDeleteDialog(QDialog):
         
     def update_progress(self, current, total, message):
         self.progress_bar.setValue(current)
-        self.status_label.setText(f"{current}/{total} files processed")
+        self.rate_estimator.update(current)
+        eta_seconds = self.rate_estimator.eta(total - current)
+        if eta_seconds is not None and current < total:
+            self.status_label.setText(f"{current}/{total} files processed · {self.rate_estimator.rate:.1f} files/s · {format_eta(eta_seconds)}")
+        else:
+            self.status_label.setText(f"{current}/{total} files processed")
         self.log_text.append(message)
         
     def deletion_finished(self, deleted_urls):
@@ -269,14 +283,10 @@ class MassDeleteDialog(QDialog):
         
         # Update database to mark files as deleted (including already deleted ones)
         if deleted_urls:
-            db_path = ensure_database_schema()
-            if db_path:
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
-                for url in deleted_urls:
-                    cursor.execute("UPDATE uploads SET is_deleted = 1 WHERE url = ?", (url,))
-                conn.commit()
-                conn.close()
+            try:
+                storage.mark_deleted(deleted_urls)
+            except Exception as e:
+                print(f"❌ Failed to mark files as deleted: {e}")
         
         # Add OK button
         ok_button = QPushButton("OK")
@@ -321,49 +331,52 @@ def generate_discord_embed_url(video_url, original_filename=None):
         print(f"⚠️ Failed to generate embed URL: {e}")
         return video_url
 
-def log_upload(file_path, url, mode, expiry_duration=None):
-    db_path = ensure_database_schema()
-    if not db_path:
-        print("❌ Failed to initialize database")
-        return
-        
-    try:
-        file_path = os.path.abspath(file_path)
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO uploads (file_path, url, mode, timestamp, expiry_duration, is_deleted)
-            VALUES (?, ?, ?, ?, ?, 0)
-        """, (
-            file_path,
-            url,
-            mode,
-            int(time.time()),
-            expiry_duration
-        ))
-        conn.commit()
-        conn.close()
-        print(f"✅ Successfully logged upload: {file_path}")
-    except Exception as e:
-        print(f"⚠️ Failed to log upload: {e}")
+def log_upload(file_path, url, mode, expiry_duration=None, metrics=None, thumbnail=None):
+    """Log upload information, its performance telemetry and thumbnail to database.
 
-def load_uploads():
-    db_path = ensure_database_schema()
-    if not db_path:
-        return []
+    The write happens on the storage writer thread, so a database locked by another
+    process never holds up the caller.
+    """
+    file_path = os.path.abspath(file_path)
+    encoded_thumbnail = None
+    if thumbnail is not None:
+        try:
+            encoded_thumbnail = encode_thumbnail(thumbnail, UPLOAD_THUMBNAIL_SIZE)
+        except Exception as e:
+            print(f"⚠️ Failed to store thumbnail: {e}")
+
+    storage.queue_upload(file_path, url, mode, expiry_duration, metrics, encoded_thumbnail, APP_VERSION)
+    print(f"✅ Queued upload for the history: {file_path}")
 
+def log_upload_failure(file_path, mode, error, metrics=None):
+    """Log a failed upload attempt for the performance report."""
+    storage.queue_failure(os.path.abspath(file_path), mode, error, metrics, APP_VERSION)
+
+def load_uploads(include_thumbnails=False):
+    """Load the upload history, newest first.
+
+    Returns:
+        A list of storage.UploadRow (file_path, url, mode, timestamp, expiry_duration,
+        is_deleted, id, thumbnail), thumbnail is the stored image blob or None
+    """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT file_path, url, mode, timestamp, expiry_duration, is_deleted FROM uploads ORDER BY timestamp DESC")
-        rows = cursor.fetchall()
-        conn.close()
-        return rows
+        return storage.query_uploads(include_thumbnails)
     except Exception as e:
         print(f"❌ Failed to load uploads: {e}")
         return []
 
+def load_upload_metrics():
+    """Load the telemetry of successful uploads and of failed attempts for the report.
+
+    Returns:
+        A (uploads, failures) tuple of lists of dicts
+    """
+    try:
+        return storage.query_metrics()
+    except Exception as e:
+        print(f"❌ Failed to load upload metrics: {e}")
+        return [], []
+
 def format_mode(mode, expiry, timestamp):
     if "Litterbox" in mode and expiry:
         hours = int(expiry.replace("h", ""))
@@ -386,15 +399,72 @@ def get_time_left(expiry, timestamp):
     except:
         return "", False
 
-def create_thumbnail(path, deleted=False, use_light=None):
-    """Create thumbnail icon, with optional theme-aware fallback icon."""
+def highlight_html(content, spans, is_strikethrough=False, is_link=False):
+    """Rich text for a history cell with the (start, end) spans of a search highlighted."""
+    if not content:
+        return ""
+
+    display_text = content
+    for start, end in sorted(spans or [], reverse=True):
+        display_text = (f"{display_text[:start]}<span style='background-color: yellow; color: black;'>"
+                        f"{display_text[start:end]}</span>{display_text[end:]}")
+
+    if is_strikethrough:
+        return f"<s><font color='red'>{display_text}</font></s>"
+    elif is_link:
+        return f"<a href='{content}'>{display_text}</a>"
+    else:
+        return display_text
+
+def pil_image_to_qimage(image):
+    """Convert a PIL image to a QImage that owns its pixels.
+
+    PIL keeps pixels in per-line blocks with no public pointer to a contiguous buffer,
+    so tobytes() has to copy them; it packs them straight into the layout Qt paints
+    with (premultiplied BGRA), so QPixmap.fromImage shares the result instead of
+    converting it. That sharing is why the bytes are copied into Qt's memory once more:
+    a pixmap or icon must not point into a Python buffer that gets freed. Modes Qt
+    can't take directly are converted to RGBA first.
+    """
+    if image.mode not in QIMAGE_FORMATS:
+        image = image.convert("RGBA")
+    raw_mode, image_format = QIMAGE_FORMATS[image.mode]
+    data = image.tobytes("raw", raw_mode)
+    bytes_per_line = len(data) // image.height
+    return QImage(data, image.width, image.height, bytes_per_line, image_format).copy()
+
+def pil_image_to_qpixmap(image):
+    """Convert a PIL image to a QPixmap, which shares the QImage's pixels without converting them."""
+    return QPixmap.fromImage(pil_image_to_qimage(image))
+
+def create_thumbnail(path, deleted=False, use_light=None, stored_thumbnail=None, generate=True):
+    """Create thumbnail icon, with optional theme-aware fallback icon.
+
+    A thumbnail stored at upload time is preferred and works even if the file was moved.
+    With generate=False, None is returned if the thumbnail isn't cached yet, so it can
+    be generated in the background by a ThumbnailLoader instead.
+    """
     if use_light is None:
         use_light = is_windows_light_mode()
     
+    if stored_thumbnail:
+        try:
+            thumb = decode_thumbnail(stored_thumbnail)
+            thumb.thumbnail((HISTORY_THUMBNAIL_SIZE, HISTORY_THUMBNAIL_SIZE), Image.LANCZOS)
+            pixmap = pil_image_to_qpixmap(thumb)
+            return QIcon(pixmap)
+        except Exception as e:
+            print(f"⚠️ Failed to decode stored thumbnail for {path}: {e}")
+
     if not deleted:
         try:
-            thumb = generate_thumbnail(path)
-            pixmap = QPixmap.fromImage(thumb.toqpixmap().toImage())
+            if generate:
+                thumb = thumbnail_cache.get_or_create(path, HISTORY_THUMBNAIL_SIZE)
+            else:
+                thumb = thumbnail_cache.get(path, HISTORY_THUMBNAIL_SIZE)
+                if thumb is None:
+                    return None
+            pixmap = pil_image_to_qpixmap(thumb)
             return QIcon(pixmap)
         except:
             pass
@@ -402,6 +472,707 @@ def create_thumbnail(path, deleted=False, use_light=None):
     # Use themed delete icon
     return get_themed_icon('del')
 
+class ThumbnailLoader(QObject):
+    """Generates history thumbnails in isolated worker processes, one per CPU core.
+
+    request() takes file paths in priority order. Work that hasn't started yet and
+    isn't requested again is cancelled, so scrolling away drops it. A file that hangs
+    or exhausts its worker gets its icon instead (see IsolatedThumbnailPool).
+    """
+    thumbnail_ready = pyqtSignal(str, object)  # File path, PIL image or None on failure
+    _finished = pyqtSignal(str, object)  # Emitted from the pool's result thread
+
+    def __init__(self, thumb_size=HISTORY_THUMBNAIL_SIZE, parent=None):
+        super().__init__(parent)
+        self.thumb_size = thumb_size
+        self._pool = None
+        self._futures = {}
+        self._finished.connect(self._on_finished)
+
+    def request(self, file_paths):
+        """Queue thumbnails for file_paths, most important first."""
+        # Cancel everything still queued and resubmit in the new order
+        for path, future in list(self._futures.items()):
+            if future.cancel():
+                del self._futures[path]
+
+        for path in dict.fromkeys(file_paths):
+            if path in self._futures:
+                continue  # Already running
+            try:
+                if self._pool is None:
+                    self._pool = IsolatedThumbnailPool()
+                future = self._pool.submit(path, [self.thumb_size])
+            except Exception as e:
+                print(f"⚠️ Failed to queue thumbnail for {path}: {e}")
+                self.thumbnail_ready.emit(path, None)
+                continue
+            self._futures[path] = future
+            future.add_done_callback(lambda future, path=path: self._emit_finished(path, future))
+
+    def _emit_finished(self, path, future):
+        if future.cancelled():
+            return
+        try:
+            self._finished.emit(path, future)
+        except RuntimeError:
+            pass  # Loader was deleted while the thumbnail was being generated
+
+    def _on_finished(self, path, future):
+        if self._futures.get(path) is future:
+            del self._futures[path]
+        try:
+            image = future.result()[self.thumb_size]
+        except Exception as e:
+            print(f"⚠️ Failed to generate thumbnail for {path}: {e}")
+            image = None
+        self.thumbnail_ready.emit(path, image)
+
+    def shutdown(self):
+        """Drop queued work and stop the workers without waiting for running thumbnails."""
+        self._futures.clear()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+class HistorySearcher(QObject):
+    """Searches the history off the GUI thread while the user types.
+
+    search() is debounced and a search that is superseded is cancelled, or interrupted
+    if its query is already running. Results of stale searches are never emitted. A
+    search extending the previous one (typing more) filters the previous hits in
+    memory instead of querying again (see storage.refine_search).
+    """
+    results_ready = pyqtSignal(str, object)  # Search text, ranked SearchHits or None for no search
+    _finished = pyqtSignal(int, str, object)  # Emitted from the search thread
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-search")
+        self._reader = None  # Connection of the search thread
+        self._future = None
+        self._generation = 0
+        self._text = ""
+        self._last_text = ""
+        self._last_hits = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._timer.timeout.connect(self._start)
+        self._finished.connect(self._on_finished)
+
+    def search(self, text):
+        """Search for text once typing pauses, or show the whole history right away if it's empty."""
+        self._text = text.strip()
+        self._cancel()
+        if not self._text:
+            self._timer.stop()
+            self._last_text, self._last_hits = "", None
+            self.results_ready.emit("", None)
+            return
+        self._timer.start()
+
+    def invalidate(self):
+        """Forget the previous hits, after the history changed."""
+        self._last_text, self._last_hits = "", None
+
+    def _cancel(self):
+        self._generation += 1
+        if self._future is not None and not self._future.cancel() and self._reader is not None:
+            self._reader.interrupt()
+        self._future = None
+
+    def _start(self):
+        self._cancel()
+        generation, text = self._generation, self._text
+        previous_text, previous_hits = self._last_text, self._last_hits
+        self._future = self._executor.submit(self._run, generation, text, previous_text, previous_hits)
+        self._future.add_done_callback(lambda future: self._emit_finished(generation, text, future))
+
+    def _run(self, generation, text, previous_text, previous_hits):
+        if generation != self._generation:
+            return None
+        if storage.can_refine(previous_text, previous_hits, text):
+            return storage.refine_search(previous_hits, text)
+        if self._reader is None:
+            self._reader = storage.open_reader()
+        return storage.search_uploads(text, connection=self._reader)
+
+    def _emit_finished(self, generation, text, future):
+        if future.cancelled():
+            return
+        try:
+            self._finished.emit(generation, text, future)
+        except RuntimeError:
+            pass  # Searcher was deleted during the search
+
+    def _on_finished(self, generation, text, future):
+        if generation != self._generation:
+            return  # Superseded while running
+        self._future = None
+        try:
+            hits = future.result()
+        except Exception as e:
+            print(f"❌ Failed to search uploads: {e}")
+            hits = []
+        else:
+            self._last_text, self._last_hits = text, hits
+        self.results_ready.emit(text, hits)
+
+    def shutdown(self):
+        """Drop pending searches, interrupt the running one and close the search connection."""
+        self._timer.stop()
+        self._cancel()
+        self._executor.shutdown(wait=True)
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+class HistoryWatcher(QObject):
+    """Notices changes to the history, made by this process or any other.
+
+    Polls PRAGMA data_version on a connection of its own, which costs next to nothing
+    while nothing changes. When something did, the ids of the changed uploads are read
+    from the change log (see storage.query_changes).
+    """
+    changed = pyqtSignal(list)  # Ids of the uploads inserted, updated or removed
+    reset = pyqtSignal()  # Too much changed to catch up, everything has to be reloaded
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._reader = None
+        self._version = None
+        self._last_change = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(HISTORY_POLL_MS)
+        self._timer.timeout.connect(self.poll)
+        try:
+            self._reader = storage.open_reader()
+            self._version = storage.data_version(self._reader)
+            self._last_change = storage.last_change(self._reader)
+        except Exception as e:
+            print(f"⚠️ Failed to watch the history for changes: {e}")
+            return
+        self._timer.start()
+
+    def poll(self):
+        """Emit the changes since the last poll, if there are any."""
+        if self._reader is None:
+            return
+        try:
+            version = storage.data_version(self._reader)
+            if version == self._version:
+                return
+            self._version = version
+            self._last_change, upload_ids = storage.query_changes(self._last_change, self._reader)
+        except Exception as e:
+            print(f"⚠️ Failed to check the history for changes: {e}")
+            return
+        if upload_ids is None:
+            self.reset.emit()
+        elif upload_ids:
+            self.changed.emit(upload_ids)
+
+    def shutdown(self):
+        self._timer.stop()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+class HistoryRow:
+    """An upload as shown in the history table, with everything derived from it computed once.
+
+    Search highlights are the exception: they're found when a cell is painted, so only
+    visible rows pay for them.
+    """
+    __slots__ = ("upload", "file_name", "file_exists", "mode_label", "is_expired", "uploaded",
+                 "time_left", "time_left_expired", "search_text")
+
+    def __init__(self, upload, search_text=""):
+        self.upload = upload
+        self.file_name = os.path.basename(upload.file_path)
+        self.file_exists = os.path.exists(upload.file_path)
+        self.mode_label, self.is_expired = format_mode(upload.mode, upload.expiry_duration, upload.timestamp)
+        self.uploaded = datetime.fromtimestamp(upload.timestamp).strftime('%Y-%m-%d %H:%M:%S')
+        self.time_left, self.time_left_expired = (get_time_left(upload.expiry_duration, upload.timestamp)
+                                                  if "Litterbox" in upload.mode else ("", False))
+        self.search_text = search_text
+
+    def highlights(self, value):
+        return storage.find_highlights(self.search_text, value) if self.search_text else None
+
+    def html(self, column):
+        """Rich text of the name, path or URL cell."""
+        if column == NAME_COLUMN:
+            return highlight_html(self.file_name, self.highlights(self.file_name), is_strikethrough=not self.file_exists)
+        if column == PATH_COLUMN:
+            return highlight_html(self.upload.file_path, self.highlights(self.upload.file_path),
+                                  is_strikethrough=not self.file_exists)
+        return highlight_html(self.upload.url, self.highlights(self.upload.url), is_strikethrough=self.is_expired,
+                              is_link=not self.is_expired)
+
+    @property
+    def deletable(self):
+        return self.upload.mode == "User" and not self.upload.is_deleted
+
+class HistoryTableModel(QAbstractTableModel):
+    """The upload history, paged in from storage as the view scrolls.
+
+    Only rows the view has scrolled to are loaded, each page with its stored thumbnails,
+    and thumbnails are decoded when a row is painted, so the history opens as fast for
+    50k uploads as for 50. While searching, the rows are the ranked search hits. The
+    rows checked in select mode are kept by upload id, so the selection survives
+    paging and searching.
+    """
+    selection_changed = pyqtSignal()
+
+    def __init__(self, use_light, parent=None):
+        super().__init__(parent)
+        self.use_light = use_light
+        self.rows = []
+        self.row_of_id = {}
+        self.exhausted = False
+        self.search_text = ""
+        self.search_hits = None  # Ranked SearchHits while searching
+        self.hits_fetched = 0
+        self.select_mode = False
+        self.checked = {}  # Upload id -> storage.SelectionRow
+        self.icons = OrderedDict()  # Upload id -> QIcon, least recently used first
+        self.pending_thumbnails = {}  # File path -> ids of the uploads waiting for it
+        self.pending_ids = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HISTORY_HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return HISTORY_HEADERS[section]
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemFlag.ItemIsEnabled
+        if index.column() == CHECK_COLUMN and self.select_mode:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+
+        if role == ROW_ROLE:
+            return row
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if column == CHECK_COLUMN:
+            if role == Qt.ItemDataRole.CheckStateRole:
+                return Qt.CheckState.Checked if row.upload.id in self.checked else Qt.CheckState.Unchecked
+        elif column == ICON_COLUMN:
+            if role == Qt.ItemDataRole.DecorationRole:
+                return self.icon(row)
+        elif column in (NAME_COLUMN, PATH_COLUMN, URL_COLUMN):
+            if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+                return {NAME_COLUMN: row.file_name, PATH_COLUMN: row.upload.file_path, URL_COLUMN: row.upload.url}[column]
+            if role == HTML_ROLE:
+                return row.html(column)
+        elif column in (MODE_COLUMN, TIME_LEFT_COLUMN):
+            expired = row.is_expired if column == MODE_COLUMN else row.time_left_expired
+            if role == Qt.ItemDataRole.DisplayRole:
+                return row.mode_label if column == MODE_COLUMN else row.time_left
+            if role == Qt.ItemDataRole.ForegroundRole and expired:
+                return QColor("red")
+            if role == Qt.ItemDataRole.FontRole and expired:
+                font = QFont()
+                font.setStrikeOut(True)
+                return font
+        elif column == UPLOADED_COLUMN:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return row.uploaded
+        elif column == DELETE_COLUMN:
+            if role == Qt.ItemDataRole.ToolTipRole and row.upload.mode == "User":
+                return "Delete file from Catbox" if row.deletable else "File Already Deleted"
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if index.column() != CHECK_COLUMN or role != Qt.ItemDataRole.CheckStateRole or not self.select_mode:
+            return False
+        self.set_checked(index.row(), value in (Qt.CheckState.Checked, Qt.CheckState.Checked.value, True))
+        return True
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        with tracing.span("history.fetch_more"):
+            try:
+                if self.search_hits is None:
+                    last = self.rows[-1].upload if self.rows else None
+                    uploads = storage.query_upload_page(HISTORY_PAGE_SIZE, (last.timestamp, last.id) if last else None)
+                    self.exhausted = len(uploads) < HISTORY_PAGE_SIZE
+                    new_rows = [HistoryRow(upload) for upload in uploads]
+                else:
+                    hits = self.search_hits[self.hits_fetched:self.hits_fetched + HISTORY_PAGE_SIZE]
+                    self.hits_fetched += len(hits)
+                    self.exhausted = self.hits_fetched >= len(self.search_hits)
+                    new_rows = [HistoryRow(upload, self.search_text)
+                                for upload in storage.query_uploads_by_id([hit.id for hit in hits])]
+            except Exception as e:
+                print(f"❌ Failed to load uploads: {e}")
+                self.exhausted = True
+                return
+
+            if not new_rows:
+                return
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+            for row in new_rows:
+                self.row_of_id[row.upload.id] = len(self.rows)
+                self.rows.append(row)
+            self.endInsertRows()
+
+    def set_results(self, text, hits):
+        """Show the hits of a search for text, best match first, or the whole history if hits is None."""
+        self.beginResetModel()
+        self.search_text = text if hits is not None else ""
+        self.search_hits = hits
+        self.hits_fetched = 0
+        self.rows = []
+        self.row_of_id = {}
+        self.exhausted = False
+        self.endResetModel()
+        self.fetchMore()  # First page right away rather than on the view's next layout
+
+    def reload(self):
+        self.set_results(self.search_text, self.search_hits)
+
+    def refresh_rows(self):
+        """Recompute what the loaded rows show about the clock and the file system."""
+        if not self.rows:
+            return
+        for index, row in enumerate(self.rows):
+            self.rows[index] = self.updated_row(row, row.upload)
+        self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, DELETE_COLUMN))
+
+    def updated_row(self, row, upload):
+        """A new HistoryRow for upload in place of row, dropping its icon if the file came or went."""
+        new_row = HistoryRow(upload, row.search_text)
+        if new_row.file_exists != row.file_exists:
+            self.icons.pop(upload.id, None)
+        return new_row
+
+    def apply_changes(self, upload_ids):
+        """Update, add or remove the rows of changed uploads, leaving all other rows in place.
+
+        New uploads are only added where they fall among the loaded rows, further down
+        paging loads them. While searching, new matching uploads are added at the top.
+        """
+        try:
+            uploads = {upload.id: upload for upload in storage.query_uploads_by_id(upload_ids)}
+        except Exception as e:
+            print(f"❌ Failed to load changed uploads: {e}")
+            return
+        removed = set(upload_ids) - uploads.keys()
+        selection_changed = any(upload_id in self.checked for upload_id in upload_ids)
+
+        for upload_id in removed:
+            self.checked.pop(upload_id, None)
+            self.icons.pop(upload_id, None)
+        if self.search_hits is not None and removed:
+            self.hits_fetched -= sum(1 for hit in self.search_hits[:self.hits_fetched] if hit.id in removed)
+            self.search_hits = [hit for hit in self.search_hits if hit.id not in removed]
+        indexes = sorted(self.row_of_id[upload_id] for upload_id in removed if upload_id in self.row_of_id)
+        while indexes:
+            last = first = indexes.pop()
+            while indexes and indexes[-1] == first - 1:
+                first = indexes.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.rows[first:last + 1]
+            self.endRemoveRows()
+        self.row_of_id = {row.upload.id: index for index, row in enumerate(self.rows)}
+
+        new_uploads = []
+        for upload_id, upload in uploads.items():
+            index = self.row_of_id.get(upload_id)
+            if index is None:
+                new_uploads.append(upload)
+                continue
+            self.rows[index] = self.updated_row(self.rows[index], upload)
+            self.dataChanged.emit(self.index(index, 0), self.index(index, DELETE_COLUMN))
+            if upload_id in self.checked:
+                self.checked[upload_id] = storage.SelectionRow(upload.id, upload.url, upload.mode, upload.is_deleted)
+
+        new_uploads.sort(key=lambda upload: (upload.timestamp, upload.id), reverse=True)
+        if self.search_hits is not None:
+            hit_ids = {hit.id for hit in self.search_hits}
+            candidates = [storage.SearchHit(upload.id, "", {"name": os.path.basename(upload.file_path),
+                                                            "file_path": upload.file_path, "url": upload.url})
+                          for upload in new_uploads if upload.id not in hit_ids]
+            new_hits = storage.refine_search(candidates, self.search_text)
+            if new_hits:
+                self.beginInsertRows(QModelIndex(), 0, len(new_hits) - 1)
+                self.search_hits = new_hits + self.search_hits
+                self.hits_fetched += len(new_hits)
+                self.rows[:0] = [HistoryRow(uploads[hit.id], self.search_text) for hit in new_hits]
+                self.endInsertRows()
+        else:
+            keys = [(-row.upload.timestamp, -row.upload.id) for row in self.rows]
+            for upload in new_uploads:
+                key = (-upload.timestamp, -upload.id)
+                if not self.exhausted and (not keys or key > keys[-1]):
+                    continue  # Not loaded yet either way
+                position = bisect.bisect(keys, key)
+                self.beginInsertRows(QModelIndex(), position, position)
+                keys.insert(position, key)
+                self.rows.insert(position, HistoryRow(upload))
+                self.endInsertRows()
+        self.row_of_id = {row.upload.id: index for index, row in enumerate(self.rows)}
+
+        if selection_changed:
+            self.checked_changed()
+
+    def icon(self, row):
+        """The row's thumbnail, or None while it still has to be generated."""
+        upload_id = row.upload.id
+        icon = self.icons.get(upload_id)
+        if icon is not None:
+            self.icons.move_to_end(upload_id)
+            return icon
+        if upload_id in self.pending_ids:
+            return None
+
+        # The stored thumbnail came with the row's page and outlives the file itself
+        icon = create_thumbnail(row.upload.file_path, deleted=not row.file_exists, use_light=self.use_light,
+                                stored_thumbnail=row.upload.thumbnail, generate=False)
+        if icon is None:
+            self.pending_thumbnails.setdefault(row.upload.file_path, set()).add(upload_id)
+            self.pending_ids.add(upload_id)
+            return None
+        self.cache_icon(upload_id, icon)
+        return icon
+
+    def cache_icon(self, upload_id, icon):
+        self.icons[upload_id] = icon
+        self.icons.move_to_end(upload_id)
+        while len(self.icons) > MAX_HISTORY_ICONS:
+            self.icons.popitem(last=False)
+
+    def pending_thumbnail_paths(self, rows):
+        """File paths of the given rows whose thumbnails still have to be generated."""
+        return [self.rows[row].upload.file_path for row in rows if self.icon(self.rows[row]) is None]
+
+    def set_generated_thumbnail(self, file_path, image):
+        """Show a thumbnail delivered by the ThumbnailLoader, None shows the fallback icon."""
+        upload_ids = self.pending_thumbnails.pop(file_path, ())
+        if not upload_ids:
+            return
+        if image is not None:
+            icon = QIcon(pil_image_to_qpixmap(image))
+        else:
+            icon = get_themed_icon('del')
+        for upload_id in upload_ids:
+            self.pending_ids.discard(upload_id)
+            self.cache_icon(upload_id, icon)
+            row = self.row_of_id.get(upload_id)
+            if row is not None:
+                index = self.index(row, ICON_COLUMN)
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def set_select_mode(self, enabled):
+        self.select_mode = enabled
+        self.clear_checked()
+
+    def set_checked(self, row, checked):
+        upload = self.rows[row].upload
+        if checked:
+            self.checked[upload.id] = storage.SelectionRow(upload.id, upload.url, upload.mode, upload.is_deleted)
+        else:
+            self.checked.pop(upload.id, None)
+        index = self.index(row, CHECK_COLUMN)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        self.selection_changed.emit()
+
+    def check_all(self):
+        """Check every upload in the history, or every search hit, loaded or not."""
+        ids = None if self.search_hits is None else [hit.id for hit in self.search_hits]
+        try:
+            self.checked = {row.id: row for row in storage.query_selection(ids)}
+        except Exception as e:
+            print(f"❌ Failed to select uploads: {e}")
+        self.checked_changed()
+
+    def clear_checked(self):
+        self.checked = {}
+        self.checked_changed()
+
+    def checked_changed(self):
+        if self.rows:
+            self.dataChanged.emit(self.index(0, CHECK_COLUMN), self.index(len(self.rows) - 1, CHECK_COLUMN),
+                                  [Qt.ItemDataRole.CheckStateRole])
+        self.selection_changed.emit()
+
+    def checked_urls(self, deletable_only=False):
+        return [row.url for row in self.checked.values()
+                if not deletable_only or (row.mode == "User" and not row.is_deleted)]
+
+    def has_deletable_checked(self):
+        return any(row.mode == "User" and not row.is_deleted for row in self.checked.values())
+
+    def mark_deleted(self, urls):
+        """Show uploads as deleted from Catbox after storage.mark_deleted."""
+        urls = set(urls)
+        for index, row in enumerate(self.rows):
+            if row.upload.url in urls:
+                row.upload = row.upload._replace(is_deleted=1)
+                self.dataChanged.emit(self.index(index, 0), self.index(index, DELETE_COLUMN))
+        for upload_id, row in self.checked.items():
+            if row.url in urls:
+                self.checked[upload_id] = row._replace(is_deleted=1)
+        self.selection_changed.emit()
+
+class HistoryDelegate(QStyledItemDelegate):
+    """Base of the history delegates, which draw the cell background the default way."""
+
+    def draw_background(self, painter, option, index):
+        option = QStyleOptionViewItem(option)
+        self.initStyleOption(option, index)
+        option.text = ""
+        option.icon = QIcon()
+        option.features &= ~QStyleOptionViewItem.ViewItemFeature.HasCheckIndicator
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, option, painter, option.widget)
+
+class RichTextDelegate(HistoryDelegate):
+    """Paints the HTML_ROLE markup of a cell: links, strikethrough and search highlights."""
+
+    def paint(self, painter, option, index):
+        self.draw_background(painter, option, index)
+
+        text_option = QTextOption(Qt.AlignmentFlag.AlignCenter)
+        text_option.setWrapMode(QTextOption.WrapMode.NoWrap)
+        document = QTextDocument()
+        document.setDefaultFont(option.font)
+        document.setDefaultTextOption(text_option)
+        document.setDocumentMargin(2)
+        document.setHtml(index.data(HTML_ROLE) or "")
+        document.setTextWidth(option.rect.width())
+
+        context = QAbstractTextDocumentLayout.PaintContext()
+        context.palette.setColor(QPalette.ColorRole.Text, option.palette.color(QPalette.ColorRole.Text))
+        top = (option.rect.height() - document.size().height()) / 2
+        context.clip = QRectF(0, -top, option.rect.width(), option.rect.height())
+
+        painter.save()
+        painter.translate(option.rect.left(), option.rect.top() + top)
+        painter.setClipRect(context.clip)
+        document.documentLayout().draw(painter, context)
+        painter.restore()
+
+class ThumbnailDelegate(HistoryDelegate):
+    """Paints the thumbnail centered at HISTORY_THUMBNAIL_SIZE."""
+
+    def paint(self, painter, option, index):
+        self.draw_background(painter, option, index)
+        icon = index.data(Qt.ItemDataRole.DecorationRole)
+        if icon is not None:
+            rect = QRect(0, 0, HISTORY_THUMBNAIL_SIZE, HISTORY_THUMBNAIL_SIZE)
+            rect.moveCenter(option.rect.center())
+            icon.paint(painter, rect, Qt.AlignmentFlag.AlignCenter)
+
+class CheckBoxDelegate(HistoryDelegate):
+    """Paints the select mode checkbox and toggles it on click."""
+
+    def __init__(self, use_light, parent=None):
+        super().__init__(parent)
+        self.colors = light_theme_colors if use_light else dark_theme_colors
+
+    def paint(self, painter, option, index):
+        self.draw_background(painter, option, index)
+        rect = QRect(0, 0, 20, 20)
+        rect.moveCenter(option.rect.center())
+        checked = index.data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Checked
+        paint_checkbox(painter, rect, checked, self.colors)
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton
+                and index.flags() & Qt.ItemFlag.ItemIsUserCheckable):
+            checked = index.data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Checked
+            model.setData(index, not checked, Qt.ItemDataRole.CheckStateRole)
+            return True
+        return False
+
+class DeleteButtonDelegate(HistoryDelegate):
+    """Paints the delete button of User uploads and reports clicks on it."""
+    clicked = pyqtSignal(QModelIndex)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.icon = get_themed_icon('bin')
+
+    def button_rect(self, option):
+        rect = QRect(0, 0, option.rect.width() - 6, 30)
+        rect.moveCenter(option.rect.center())
+        return rect
+
+    def paint(self, painter, option, index):
+        self.draw_background(painter, option, index)
+        row = index.data(ROW_ROLE)
+        if row is None or row.upload.mode != "User":
+            return
+        button = QStyleOptionButton()
+        button.rect = self.button_rect(option)
+        button.icon = self.icon
+        button.iconSize = QSize(16, 16)
+        button.state = QStyle.StateFlag.State_Raised
+        if row.deletable:
+            button.state |= QStyle.StateFlag.State_Enabled
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            row = index.data(ROW_ROLE)
+            if row is not None and row.deletable and self.button_rect(option).contains(event.position().toPoint()):
+                self.clicked.emit(index)
+                return True
+        return False
+
+def paint_checkbox(painter, rect, checked, colors):
+    """Draw the history's checkbox, with a visible checkmark, into rect."""
+    painter.save()
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    rect = rect.adjusted(1, 1, -1, -1)
+
+    if checked:
+        # Blue background when checked
+        painter.setBrush(QBrush(QColor(colors['checkbox_checked'])))
+        painter.setPen(QPen(QColor(colors['checkbox_checked']), 2))
+    else:
+        # Theme-appropriate background when unchecked
+        painter.setBrush(QBrush(QColor(colors['checkbox_bg'])))
+        painter.setPen(QPen(QColor(colors['checkbox_border']), 2))
+
+    painter.drawRoundedRect(rect, 3, 3)
+
+    # Draw checkmark if checked
+    if checked:
+        painter.setPen(QPen(QColor(255, 255, 255), 2))  # White checkmark
+        check_points = [
+            (rect.left() + 4, rect.center().y()),
+            (rect.center().x() - 1, rect.bottom() - 5),
+            (rect.right() - 4, rect.top() + 4)
+        ]
+
+        for i in range(len(check_points) - 1):
+            painter.drawLine(check_points[i][0], check_points[i][1],
+                             check_points[i+1][0], check_points[i+1][1])
+    painter.restore()
+
 def is_windows_light_mode() -> bool:
     """ Checks if the current Windows theme is light mode
     
@@ -436,9 +1207,9 @@ def get_search_bar_stylesheet(colors: dict) -> str:
     """
 
 def get_table_stylesheet(colors: dict) -> str:
-    """Generate a QSS stylesheet string for QTableWidget and QCheckBox based on color dict."""
+    """Generate a QSS stylesheet string for the history QTableView based on color dict."""
     return f"""
-        QTableWidget {{
+        QTableView {{
             background-color: {colors['bg']};
             alternate-background-color: {colors['alt_bg']};
             color: {colors['text']};
@@ -447,29 +1218,12 @@ def get_table_stylesheet(colors: dict) -> str:
             background-color: {colors['header_bg']};
             color: {colors['header_text']};
         }}
-        QTableWidget::item {{
+        QTableView::item {{
             border: none;
         }}
-        QCheckBox {{
-            spacing: 5px;
-        }}
-        QCheckBox::indicator {{
-            width: 18px;
-            height: 18px;
-            background-color: {colors['checkbox_bg']};
-            border: 2px solid {colors['checkbox_border']};
-            border-radius: 3px;
-        }}
-        QCheckBox::indicator:checked {{
-            background-color: {colors['checkbox_checked']};
-            border: 2px solid {colors['checkbox_checked']};
-        }}
-        QTableWidget::item:selected {{
+        QTableView::item:selected {{
             background-color: {colors['selection_bg']};
         }}
-        QCheckBox::indicator:hover {{
-            border: 2px solid #106ebe;
-        }}
     """
 
 def get_menu_stylesheet(colors: dict) -> str:
@@ -545,7 +1299,7 @@ def show_history_window():
     reload_button.setFixedSize(30, 30)
     reload_button.setToolTip("Reload")
     reload_button.setCursor(Qt.CursorShape.PointingHandCursor)
-    reload_button.clicked.connect(lambda: reload_history(window))
+    reload_button.clicked.connect(lambda: refresh_history())
     window._theme_widgets['reload_button'] = reload_button
 
     # Search Bar
@@ -561,295 +1315,184 @@ def show_history_window():
     top_layout.addStretch()
     top_layout.addWidget(reload_button)
 
-    table = QTableWidget()
+    # Rows are paged in from the database as the table scrolls
+    model = HistoryTableModel(use_light, window)
+    table = QTableView()
+    table.setModel(model)
     QApplication.setEffectEnabled(Qt.UIEffect.UI_General, False)
     table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
     table.customContextMenuRequested.connect(lambda pos: show_context_menu(table, pos))
-    table.setColumnCount(9)  # Add an extra column for checkboxes
-    table.setHorizontalHeaderLabels(["", "Icon", "File Name", "File Path", "Mode", "Uploaded", "URL", "Time Left", ""])
     table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
     table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
     table.verticalHeader().setVisible(False)
+    table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+    table.verticalHeader().setDefaultSectionSize(50)  # Double the default row height
     table.setShowGrid(False)
+    table.setMouseTracking(True)
 
     # Enable alternating row colors
     table.setAlternatingRowColors(True)
     table.setStyleSheet(get_table_stylesheet(colors))
 
-    def filter_table(text):
-        text = text.strip()
-        has_text = bool(text)
-        
-        for row in range(table.rowCount()):
-            name_widget = table.cellWidget(row, 2)
-            file_widget = table.cellWidget(row, 3)
-            url_widget = table.cellWidget(row, 6)
-            
-            if not isinstance(name_widget, QLabel) or not isinstance(file_widget, QLabel) or not isinstance(url_widget, QLabel):
-                continue
-            
-            raw_name = name_widget.property("raw_name") or ""
-            
-            raw_path = file_widget.property("raw_path") or ""
-            file_exists = file_widget.property("file_exists")
-            
-            raw_url = url_widget.property("raw_url") or ""
-            is_expired = url_widget.property("is_expired")
-            
-            match = False
-            if not has_text:
-                match = True
-            elif text.lower() in raw_name.lower():
-                match = True
-            elif text.lower() in raw_path.lower():
-                match = True
-            elif text.lower() in raw_url.lower():
-                match = True
-            
-            table.setRowHidden(row, not match)
-            
-            if not match and has_text:
-                continue
-                
-            # Helper to highlight text
-            def get_highlighted_html(content, term, is_strikethrough=False, is_link=False):
-                if not content: return ""
-                
-                display_text = content
-                if term:
-                    # Escape text for safe regex use
-                    pattern = re.compile(re.escape(term), re.IGNORECASE)
-                    display_text = pattern.sub(lambda m: f"<span style='background-color: yellow; color: black;'>{m.group(0)}</span>", content)
-                
-                if is_strikethrough:
-                    return f"<s><font color='red'>{display_text}</font></s>"
-                elif is_link:
-                    return f"<a href='{content}'>{display_text}</a>"
-                else:
-                    return display_text
-
-            # Update Name Label
-            name_html = get_highlighted_html(raw_name, text if has_text else "", is_strikethrough=not file_exists)
-            name_widget.setText(name_html)
-            
-            # Update File Label
-            file_html = get_highlighted_html(raw_path, text if has_text else "", is_strikethrough=not file_exists)
-            file_widget.setText(file_html)
-            
-            # Update URL Label
-            url_html = get_highlighted_html(raw_url, text if has_text else "", is_strikethrough=is_expired, is_link=not is_expired)
-            url_widget.setText(url_html)
-
-    search_bar.textChanged.connect(filter_table)
+    # Cells are painted by delegates instead of holding a widget each
+    rich_text_delegate = RichTextDelegate(table)
+    delete_delegate = DeleteButtonDelegate(table)
+    table.setItemDelegateForColumn(CHECK_COLUMN, CheckBoxDelegate(use_light, table))
+    table.setItemDelegateForColumn(ICON_COLUMN, ThumbnailDelegate(table))
+    for column in (NAME_COLUMN, PATH_COLUMN, URL_COLUMN):
+        table.setItemDelegateForColumn(column, rich_text_delegate)
+    table.setItemDelegateForColumn(DELETE_COLUMN, delete_delegate)
 
-    def load_table_data():
-        uploads = load_uploads()
-        table.setRowCount(len(uploads))
+    header = table.horizontalHeader()
+    header.setStretchLastSection(False)
+    # Stretch most columns
+    for col in range(DELETE_COLUMN):
+        header.setSectionResizeMode(col, QHeaderView.ResizeMode.Stretch)
 
-        for row_index, (file_path, url, mode, timestamp, expiry, is_deleted) in enumerate(uploads):
-            file_exists = os.path.exists(file_path)
-            mode_label, is_expired = format_mode(mode, expiry, timestamp)
+    # Set fixed width for the delete button column
+    header.setSectionResizeMode(DELETE_COLUMN, QHeaderView.ResizeMode.Fixed)
+    table.setColumnWidth(DELETE_COLUMN, 40)
 
-            # Set row height (double default)
-            table.setRowHeight(row_index, 50)
+    header.setSectionResizeMode(CHECK_COLUMN, QHeaderView.ResizeMode.Fixed)
+    table.setColumnWidth(CHECK_COLUMN, 30)
 
-            # 0. Checkbox
-            checkbox_widget = CustomCheckBox()
-            checkbox_widget.setChecked(False)
-            checkbox_widget.setEnabled(False)  # Initially disabled
-            
-            # Center the checkbox
-            checkbox_container = QWidget()
-            checkbox_layout = QHBoxLayout(checkbox_container)
-            checkbox_layout.addWidget(checkbox_widget)
-            checkbox_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            checkbox_layout.setContentsMargins(0, 0, 0, 0)
-            table.setCellWidget(row_index, 0, checkbox_container)
-
-            # Store checkbox reference for theme updates
-            checkbox_widget._use_light_theme = use_light
-
-            # 1. Thumbnail
-            icon = create_thumbnail(file_path, deleted=not file_exists, use_light=use_light)
-            thumb_label = QLabel()
-            thumb_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            thumb_pixmap = icon.pixmap(48, 48)
-            thumb_label.setPixmap(thumb_pixmap)
-            table.setCellWidget(row_index, 1, thumb_label)
-
-            # 2. File Name
-            file_name = os.path.basename(file_path)
-            display_name = file_name
-            if not file_exists:
-                display_name = f"<s><font color='red'>{file_name}</font></s>"
-
-            name_label = QLabel()
-            name_label.setProperty("raw_name", file_name)
-            name_label.setTextFormat(Qt.TextFormat.RichText)
-            name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            name_label.setText(display_name)
-            name_label.setToolTip(file_name)
-            table.setCellWidget(row_index, 2, name_label)
-
-            # 3. File Path
-            display_path = file_path
-            if not file_exists:
-                display_path = f"<s><font color='red'>{file_path}</font></s>"
-            
-            file_label = QLabel()
-            file_label.setProperty("raw_path", file_path)
-            file_label.setProperty("file_exists", file_exists)
-            file_label.setTextFormat(Qt.TextFormat.RichText)
-            file_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            file_label.setText(display_path)
-            file_label.setToolTip(file_path)
-            
-            # Make file path clickable if file exists
-            if file_exists:
-                file_label.setCursor(Qt.CursorShape.PointingHandCursor)
-                file_label.mousePressEvent = lambda event, path=file_path: open_file_in_default_app(path) if event.button() == Qt.MouseButton.LeftButton else None
-            
-            # Set up custom context menu for file path
-            file_label.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-            file_label.customContextMenuRequested.connect(lambda pos, widget=file_label, path=file_path: show_file_context_menu(widget, pos, path))
-            
-            table.setCellWidget(row_index, 3, file_label)
+    header.setSectionResizeMode(ICON_COLUMN, QHeaderView.ResizeMode.Fixed)
+    table.setColumnWidth(ICON_COLUMN, 60)
 
-            # 4. Mode
-            mode_item = QTableWidgetItem(mode_label)
-            mode_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            if is_expired:
-                font = mode_item.font()
-                font.setStrikeOut(True)
-                mode_item.setForeground(QColor("red"))
-                mode_item.setFont(font)
-            table.setItem(row_index, 4, mode_item)
-
-            # 5. Uploaded
-            time_str = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-            time_item = QTableWidgetItem(time_str)
-            time_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            table.setItem(row_index, 5, time_item)
-
-            # 6. URL
-            url_label = QLabel()
-            url_label.setTextFormat(Qt.TextFormat.RichText)
-            url_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextBrowserInteraction)
-            url_label.setOpenExternalLinks(True)
-            url_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            url_label.setToolTip(url)
-
-            # Set raw URL as a property (for later retrieval)
-            url_label.setProperty("raw_url", url)
-            url_label.setProperty("file_path", file_path)  # Store file path for embed generation
-            url_label.setProperty("is_expired", is_expired)
-            
-            # Set up custom context menu for URL
-            url_label.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-            url_label.customContextMenuRequested.connect(lambda pos, widget=url_label: show_url_context_menu(widget, pos))
+    header.setSectionResizeMode(TIME_LEFT_COLUMN, QHeaderView.ResizeMode.Fixed)
+    table.setColumnWidth(TIME_LEFT_COLUMN, 70)
 
-            # Display formatted text
-            if is_expired:
-                url_text = f"<s><font color='red'>{url}</font></s>"
-            else:
-                url_text = f"<a href='{url}'>{url}</a>"
+    header.setSectionResizeMode(MODE_COLUMN, QHeaderView.ResizeMode.Fixed)
+    table.setColumnWidth(MODE_COLUMN, 85)
 
-            url_label.setText(url_text)
-            table.setCellWidget(row_index, 6, url_label)
+    # Thumbnails that aren't cached yet are generated in the background, visible rows first
+    thumbnail_loader = ThumbnailLoader(HISTORY_THUMBNAIL_SIZE, window)
 
-            # 7. Time Left
-            time_left_str, expired = get_time_left(expiry, timestamp) if "Litterbox" in mode else ("", False)
-            time_left_item = QTableWidgetItem(time_left_str)
-            time_left_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            if expired:
-                font = time_left_item.font()
-                font.setStrikeOut(True)
-                time_left_item.setForeground(QColor("red"))
-                time_left_item.setFont(font)
-            table.setItem(row_index, 7, time_left_item)
-
-            # 8. Delete Button for "User" uploads only
-            if mode == "User":
-                delete_button = QPushButton()
-                delete_button.setIcon(get_themed_icon('bin'))
-                delete_button.setFixedHeight(30)
-                delete_button.setToolTip("Delete file from Catbox")
-                delete_button.setCursor(Qt.CursorShape.PointingHandCursor)
-                delete_button.setEnabled(not is_deleted)
-
-                if not delete_button.isEnabled():
-                    delete_button.setToolTip("File Already Deleted")
-
-                def make_delete_handler(file_url, button):
-                    def handler():
-                        confirm = QMessageBox.question(
-                            window,
-                            "Confirm Deletion",
-                            f"Are you sure you want to delete this file from Catbox?\n\n{file_url}",
-                            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                        )
-                        if confirm == QMessageBox.StandardButton.Yes:
-                            try:
-                                response = delete_files([file_url], read_registry_value("userhash"))
-                                if "error" in response and "File doesn't exist?" not in response:
-                                    QMessageBox.critical(window, "Error", f"❌ Failed to delete:\n{response}")
-                                else:
-                                    # Update DB
-                                    db_path = ensure_database_schema()
-                                    if db_path:
-                                        conn = sqlite3.connect(db_path)
-                                        cursor = conn.cursor()
-                                        cursor.execute("UPDATE uploads SET is_deleted = 1 WHERE url = ?", (file_url,))
-                                        conn.commit()
-                                        conn.close()
-
-                                    # Disable button
-                                    button.setEnabled(False)
-                                    button.setToolTip("File Already Deleted")
-
-                                    msg = "✅ Deleted from Catbox (already deleted)." if "File doesn't exist?" in response else f"✅ Deleted from Catbox:\n{file_url}"
-                                    QMessageBox.information(window, "Success", msg)
-                            except Exception as e:
-                                QMessageBox.critical(window, "Error", f"❌ Exception:\n{e}")
-                    return handler
-
-                delete_button.clicked.connect(make_delete_handler(url, delete_button))
-
-                button_container = QWidget()
-                button_layout = QVBoxLayout(button_container)
-                button_layout.addWidget(delete_button)
-                button_layout.setContentsMargins(0, 0, 0, 0)
-                button_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                table.setCellWidget(row_index, 8, button_container)
-
-            else:
-                table.setCellWidget(row_index, 8, QWidget())  # Empty cell
-
-        table.resizeColumnsToContents()
-        table.horizontalHeader().setStretchLastSection(False)
-
-        header = table.horizontalHeader()
-        # Stretch most columns
-        for col in range(8):
-            header.setSectionResizeMode(col, QHeaderView.ResizeMode.Stretch)
-
-        # Set fixed width for the delete button column
-        header.setSectionResizeMode(8, QHeaderView.ResizeMode.Fixed)
-        table.setColumnWidth(8, 40)
-
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
-        table.setColumnWidth(0, 30)
-
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)
-        table.setColumnWidth(1, 60)
+    def request_visible_thumbnails():
+        """Queue the pending thumbnails of the rows on screen, then of the next page."""
+        first = table.rowAt(0)
+        if first < 0:
+            return
+        last = table.rowAt(table.viewport().height() - 1)
+        if last < 0:
+            last = model.rowCount() - 1
+        prefetch_end = min(last + 1 + (last - first + 1), model.rowCount())
+        thumbnail_loader.request(model.pending_thumbnail_paths(range(first, prefetch_end)))
+
+    thumbnail_loader.thumbnail_ready.connect(model.set_generated_thumbnail)
+
+    # Scrolling and resizing settle before the queue is rebuilt
+    thumbnail_timer = QTimer(window)
+    thumbnail_timer.setSingleShot(True)
+    thumbnail_timer.setInterval(50)
+    thumbnail_timer.timeout.connect(request_visible_thumbnails)
+    table.verticalScrollBar().valueChanged.connect(lambda: thumbnail_timer.start())
+    table.verticalScrollBar().rangeChanged.connect(lambda: thumbnail_timer.start())
+
+    # Searching runs in the background, the table updates when the results are in
+    searcher = HistorySearcher(window)
+
+    # Changes to the history, from here or another process, update just their rows
+    watcher = HistoryWatcher(window)
+
+    def apply_history_changes(upload_ids):
+        """Update the changed rows, keeping the rows on screen where they are."""
+        scroll_bar = table.verticalScrollBar()
+        anchor = table.rowAt(0) if scroll_bar.value() > 0 else -1
+        anchor_id = model.rows[anchor].upload.id if anchor >= 0 else None
+        model.apply_changes(upload_ids)
+        searcher.invalidate()
+        if anchor_id in model.row_of_id:
+            shift = model.row_of_id[anchor_id] - anchor
+            if table.verticalScrollMode() == QAbstractItemView.ScrollMode.ScrollPerPixel:
+                shift *= table.verticalHeader().defaultSectionSize()
+            scroll_bar.setValue(scroll_bar.value() + shift)
+        thumbnail_timer.start()
+
+    def reload_history():
+        searcher.invalidate()
+        if model.search_hits is None:
+            model.reload()
+        else:
+            searcher.search(search_bar.text())
+        thumbnail_timer.start()
+
+    def refresh_history():
+        """Pick up changes right away and update the expiry times and missing files."""
+        watcher.poll()
+        model.refresh_rows()
+
+    watcher.changed.connect(apply_history_changes)
+    watcher.reset.connect(reload_history)
+
+    def close_window(event):
+        thumbnail_timer.stop()
+        thumbnail_loader.shutdown()
+        searcher.shutdown()
+        watcher.shutdown()
+        QMainWindow.closeEvent(window, event)
+
+    window.closeEvent = close_window
+
+    def show_search_results(text, hits):
+        model.set_results(text, hits)
+        thumbnail_timer.start()
+
+    searcher.results_ready.connect(show_search_results)
+    search_bar.textChanged.connect(searcher.search)
+
+    def is_clickable(index):
+        row = index.data(ROW_ROLE)
+        column = index.column()
+        if row is None:
+            return False
+        return ((column == CHECK_COLUMN and model.select_mode)
+                or (column == PATH_COLUMN and row.file_exists)
+                or (column == URL_COLUMN and not row.is_expired)
+                or (column == DELETE_COLUMN and row.deletable))
+
+    def update_cursor(index):
+        if is_clickable(index):
+            table.viewport().setCursor(Qt.CursorShape.PointingHandCursor)
+        else:
+            table.viewport().unsetCursor()
 
-        header.setSectionResizeMode(7, QHeaderView.ResizeMode.Fixed)
-        table.setColumnWidth(7, 70)
+    def open_cell(index):
+        row = index.data(ROW_ROLE)
+        if row is None or not is_clickable(index):
+            return
+        if index.column() == PATH_COLUMN:
+            open_file_in_default_app(row.upload.file_path)
+        elif index.column() == URL_COLUMN:
+            open_url_in_browser(row.upload.url)
+
+    table.entered.connect(update_cursor)
+    table.clicked.connect(open_cell)
+
+    def delete_upload(index):
+        file_url = index.data(ROW_ROLE).upload.url
+        confirm = QMessageBox.question(
+            window,
+            "Confirm Deletion",
+            f"Are you sure you want to delete this file from Catbox?\n\n{file_url}",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if confirm == QMessageBox.StandardButton.Yes:
+            try:
+                response = delete_files([file_url], read_registry_value("userhash"))
+                if "error" in response and "File doesn't exist?" not in response:
+                    QMessageBox.critical(window, "Error", f"❌ Failed to delete:\n{response}")
+                else:
+                    # Update DB and disable the button
+                    storage.mark_deleted([file_url])
+                    model.mark_deleted([file_url])
 
-        header.setSectionResizeMode(4, QHeaderView.ResizeMode.Fixed)
-        table.setColumnWidth(4, 85)
+                    msg = "✅ Deleted from Catbox (already deleted)." if "File doesn't exist?" in response else f"✅ Deleted from Catbox:\n{file_url}"
+                    QMessageBox.information(window, "Success", msg)
+            except Exception as e:
+                QMessageBox.critical(window, "Error", f"❌ Exception:\n{e}")
 
-    load_table_data()
+    delete_delegate.clicked.connect(delete_upload)
 
     layout = QVBoxLayout()
     layout.addLayout(top_layout)
@@ -869,30 +1512,6 @@ def show_history_window():
     remove_selection_button.setVisible(False)
     remove_selection_button.setEnabled(False)
 
-    def get_checkbox_widget(row):
-        """Get the checkbox widget from a table row."""
-        container = table.cellWidget(row, 0)
-        if container:
-            return container.findChild(CustomCheckBox)
-        return None
-
-    def set_checkbox_checked(row, checked):
-        """Set the checkbox state for a table row."""
-        checkbox = get_checkbox_widget(row)
-        if checkbox:
-            checkbox.setChecked(checked)
-
-    def is_checkbox_checked(row):
-        """Check if the checkbox is checked for a table row."""
-        checkbox = get_checkbox_widget(row)
-        return checkbox.isChecked() if checkbox else False
-
-    def set_checkbox_enabled(row, enabled):
-        """Enable or disable the checkbox for a table row."""
-        checkbox = get_checkbox_widget(row)
-        if checkbox:
-            checkbox.setEnabled(enabled)
-
     def toggle_select_mode():
         if select_button.text() == "Select":
             select_button.setText("Cancel")
@@ -900,62 +1519,33 @@ def show_history_window():
             mass_delete_button.setVisible(False)  # Hidden until a User upload is selected
             remove_selection_button.setVisible(True)
             remove_selection_button.setEnabled(True)
-            table.setColumnHidden(0, False)  # Show checkbox column
-            for row in range(table.rowCount()):
-                set_checkbox_checked(row, False)
-                set_checkbox_enabled(row, True)
+            model.set_select_mode(True)
+            table.setColumnHidden(CHECK_COLUMN, False)  # Show checkbox column
         else:
             select_button.setText("Select")
             select_all_button.setVisible(False)
             mass_delete_button.setVisible(False)
             remove_selection_button.setVisible(False)
-            table.setColumnHidden(0, True)  # Hide checkbox column
-            for row in range(table.rowCount()):
-                set_checkbox_checked(row, False)
-                set_checkbox_enabled(row, False)
+            model.set_select_mode(False)
+            table.setColumnHidden(CHECK_COLUMN, True)  # Hide checkbox column
     
     def update_mass_delete_visibility():
         """Show mass delete button only if at least one User upload is selected."""
         if select_button.text() != "Cancel":  # Not in select mode
             return
-        
-        uploads = load_uploads()
-        has_user_upload_selected = False
-        
-        for row in range(table.rowCount()):
-            if is_checkbox_checked(row) and row < len(uploads):
-                file_path, url, mode, timestamp, expiry, is_deleted = uploads[row]
-                if mode == "User" and not is_deleted:
-                    has_user_upload_selected = True
-                    break
-        
-        mass_delete_button.setVisible(has_user_upload_selected)
+        mass_delete_button.setVisible(model.has_deletable_checked())
 
     def select_all():
-        for row in range(table.rowCount()):
-            set_checkbox_checked(row, True)
+        model.check_all()
         remove_selection_button.setEnabled(True)
-        update_mass_delete_visibility()
 
     def clear_selection():
-        for row in range(table.rowCount()):
-            set_checkbox_checked(row, False)
+        model.clear_checked()
         remove_selection_button.setEnabled(False)
-        update_mass_delete_visibility()
 
     def mass_delete_selection():
-        # Get selected User uploads only (skip expired ones)
-        selected_urls = []
-        uploads = load_uploads()
-        
-        for row in range(table.rowCount()):
-            if is_checkbox_checked(row):
-                # Get the original upload data
-                if row < len(uploads):
-                    file_path, url, mode, timestamp, expiry, is_deleted = uploads[row]
-                    # Only include User mode uploads that aren't already deleted
-                    if mode == "User" and not is_deleted:
-                        selected_urls.append(url)
+        # Get selected User uploads only (skip already deleted ones)
+        selected_urls = model.checked_urls(deletable_only=True)
 
         if not selected_urls:
             QMessageBox.warning(window, "No Files", "No User mode files selected for deletion.")
@@ -980,28 +1570,15 @@ def show_history_window():
                 
                 if confirm == QMessageBox.StandardButton.Yes:
                     # Remove only the successfully deleted URLs from database
-                    db_path = ensure_database_schema()
-                    if db_path:
-                        conn = sqlite3.connect(db_path)
-                        cursor = conn.cursor()
-                        for url in dialog.deleted_urls:
-                            cursor.execute("DELETE FROM uploads WHERE url = ?", (url,))
-                        conn.commit()
-                        conn.close()
+                    try:
+                        storage.remove_uploads(dialog.deleted_urls)
+                    except Exception as e:
+                        print(f"❌ Failed to remove uploads: {e}")
                 
-                # Refresh the window
-                window.close()
-                show_history_window()
+                watcher.poll()
 
     def remove_selection():
-        selected_urls = []
-        for row in range(table.rowCount()):
-            if is_checkbox_checked(row):
-                url_widget = table.cellWidget(row, 5)
-                if isinstance(url_widget, QLabel):
-                    raw_url = url_widget.property("raw_url")
-                    if raw_url:
-                        selected_urls.append(raw_url)
+        selected_urls = model.checked_urls()
 
         if selected_urls:
             confirm = QMessageBox.question(
@@ -1011,29 +1588,20 @@ def show_history_window():
                 QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
             )
             if confirm == QMessageBox.StandardButton.Yes:
-                db_path = ensure_database_schema()
-                if db_path:
-                    conn = sqlite3.connect(db_path)
-                    cursor = conn.cursor()
-                    for url in selected_urls:
-                        cursor.execute("DELETE FROM uploads WHERE url = ?", (url,))
-                        print(f"Successfully deleted {url}")
-                    conn.commit()
-                    conn.close()
-                    QMessageBox.information(window, "Success", "Selected items have been removed from the database.")
-                    window.close()
-                    show_history_window()
+                try:
+                    storage.remove_uploads(selected_urls)
+                except Exception as e:
+                    QMessageBox.critical(window, "Error", f"❌ Failed to remove the selected items:\n{e}")
+                    return
+                print(f"Successfully deleted {len(selected_urls)} items")
+                QMessageBox.information(window, "Success", "Selected items have been removed from the database.")
+                watcher.poll()
 
     select_button.clicked.connect(toggle_select_mode)
     select_all_button.clicked.connect(select_all)
     mass_delete_button.clicked.connect(mass_delete_selection)
     remove_selection_button.clicked.connect(remove_selection)
-    
-    # Connect all checkbox signals to update mass delete button visibility
-    for row in range(table.rowCount()):
-        checkbox = get_checkbox_widget(row)
-        if checkbox:
-            checkbox.stateChanged.connect(update_mass_delete_visibility)
+    model.selection_changed.connect(update_mass_delete_visibility)
 
     button_layout.addWidget(select_button)
     button_layout.addWidget(select_all_button)
@@ -1049,66 +1617,34 @@ def show_history_window():
 
     def show_context_menu(table, pos):
         index = table.indexAt(pos)
-        if not index.isValid():
+        row = index.data(ROW_ROLE) if index.isValid() else None
+        if row is None:
             return
 
-        row, column = index.row(), index.column()
-        item = table.item(row, column)
-
-        # Check for a QLabel (for File Path or URL)
-        widget = table.cellWidget(row, column)
-        if isinstance(widget, QLabel):
-            from PyQt6.QtGui import QTextDocument
-            doc = QTextDocument()
-            doc.setHtml(widget.text())
-            text = doc.toPlainText()
-            
-            # Special handling for URL column (column 5)
-            if column == 5:
-                raw_url = widget.property("raw_url")
-                if raw_url:
-                    show_url_context_menu(widget, pos)
-                    return
-            # Special handling for File Path column (column 3)
-            elif column == 3:
-                # This will be handled by the file_label's custom context menu
-                return
-            
-            # Special handling for File Name column (column 2)
-            elif column == 2:
-                # Default context menu for Name column
-                menu = QMenu()
-                menu.setStyleSheet(get_menu_stylesheet(get_current_theme_colors()))
-                copy_action = QAction("Copy", menu)
-                copy_action.triggered.connect(lambda: QApplication.clipboard().setText(text))
-                menu.addAction(copy_action)
-                menu.exec(QCursor.pos())
-                return
-            
-        elif item:
-            text = item.text()
-        else:
+        column = index.column()
+        # Special handling for File Path and URL columns
+        if column == PATH_COLUMN:
+            show_file_context_menu(table.viewport(), pos, row.upload.file_path)
+            return
+        elif column == URL_COLUMN:
+            show_url_context_menu(table.viewport(), pos, row.upload.url, row.upload.file_path)
             return
 
-        # Disable context menu for Thumbnail/Icon column (column 1)
-        if column == 1:
+        # Checkbox, Thumbnail/Icon and delete columns have nothing to copy
+        text = index.data(Qt.ItemDataRole.DisplayRole)
+        if not text:
             return
 
         # Default context menu for other columns
         menu = QMenu()
         menu.setStyleSheet(get_menu_stylesheet(get_current_theme_colors()))
-        copy_action = QAction("Copy")
+        copy_action = QAction("Copy", menu)
         copy_action.triggered.connect(lambda: QApplication.clipboard().setText(text))
         menu.addAction(copy_action)
         menu.exec(QCursor.pos())
 
-    def show_url_context_menu(widget, pos):
-        """Show custom context menu for URL labels."""
-        raw_url = widget.property("raw_url")
-        file_path = widget.property("file_path")
-        if not raw_url:
-            return
-        
+    def show_url_context_menu(widget, pos, raw_url, file_path):
+        """Show custom context menu for URLs."""
         menu = QMenu()
         menu.setStyleSheet(get_menu_stylesheet(get_current_theme_colors()))
         
@@ -1133,8 +1669,11 @@ def show_history_window():
         
         menu.exec(widget.mapToGlobal(pos))
 
-    table.setColumnHidden(0, True)  # Initially hide checkbox column
+    table.setColumnHidden(CHECK_COLUMN, True)  # Initially hide checkbox column
+    with tracing.span("history.load_table_data"):
+        model.fetchMore()
     window.show()
+    thumbnail_timer.start()
 
 def open_url_in_browser(url):
     """Open URL in default browser."""
@@ -1182,75 +1721,6 @@ def show_file_context_menu(widget, pos, file_path):
     
     menu.exec(widget.mapToGlobal(pos))
 
-class CustomCheckBox(QWidget):
-    """Custom checkbox widget with visible checkmark."""
-    stateChanged = pyqtSignal()  # Signal emitted when checkbox state changes
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.checked = False
-        self._use_light_theme = is_windows_light_mode()
-        self.setFixedSize(20, 20)
-        self.setCursor(Qt.CursorShape.PointingHandCursor)
-        
-    def setChecked(self, checked):
-        self.checked = checked
-        self.update()
-        
-    def isChecked(self):
-        return self.checked
-        
-    def setEnabled(self, enabled):
-        super().setEnabled(enabled)
-        self.setCursor(Qt.CursorShape.PointingHandCursor if enabled else Qt.CursorShape.ArrowCursor)
-        
-    def mousePressEvent(self, event):
-        if self.isEnabled() and event.button() == Qt.MouseButton.LeftButton:
-            self.setChecked(not self.checked)
-            self.stateChanged.emit()  # Emit signal when state changes
-            
-    def paintEvent(self, event):
-        from PyQt6.QtGui import QPainter, QPen, QBrush, QFont
-        
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Get theme colors
-        colors = light_theme_colors if self._use_light_theme else dark_theme_colors
-        
-        # Draw the checkbox background
-        rect = self.rect().adjusted(1, 1, -1, -1)
-        
-        if self.checked:
-            # Blue background when checked
-            brush = QBrush(QColor(colors['checkbox_checked']))
-            painter.setBrush(brush)
-            painter.setPen(QPen(QColor(colors['checkbox_checked']), 2))
-        else:
-            # Theme-appropriate background when unchecked
-            brush = QBrush(QColor(colors['checkbox_bg']))
-            painter.setBrush(brush)
-            painter.setPen(QPen(QColor(colors['checkbox_border']), 2))
-            
-        painter.drawRoundedRect(rect, 3, 3)
-        
-        # Draw checkmark if checked
-        if self.checked:
-            painter.setPen(QPen(QColor(255, 255, 255), 2))  # White checkmark
-            # Draw checkmark path
-            check_points = [
-                (rect.left() + 4, rect.center().y()),
-                (rect.center().x() - 1, rect.bottom() - 5),
-                (rect.right() - 4, rect.top() + 4)
-            ]
-            
-            for i in range(len(check_points) - 1):
-                painter.drawLine(check_points[i][0], check_points[i][1], 
-                               check_points[i+1][0], check_points[i+1][1])
-def reload_history(window):
-    window.close()
-    show_history_window()
-
 def refresh_context_menu_icons():
     """Silently refresh context menu icons to match current theme."""
     try:
@@ -1262,6 +1732,8 @@ def refresh_context_menu_icons():
         pass  # Silently ignore errors when refreshing icons
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    tracing.configure()
     app = QApplication(sys.argv)
     refresh_context_menu_icons()  # Refresh icons on launch
     show_history_window()
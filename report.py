@@ -0,0 +1,102 @@
+import math
+from collections import defaultdict
+from datetime import datetime
+
+# Upper bounds (in bytes) and labels of the file size buckets used by the report
+SIZE_BUCKETS = [
+    (1024 ** 2, "< 1 MB"),
+    (10 * 1024 ** 2, "1-10 MB"),
+    (100 * 1024 ** 2, "10-100 MB"),
+    (1024 ** 3, "100 MB-1 GB"),
+    (math.inf, ">= 1 GB")
+]
+
+def percentile(values, pct):
+    """Linearly interpolated percentile of a list of numbers, or None if it's empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * pct / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+def size_bucket(file_size):
+    """Label of the size bucket a file falls into."""
+    if file_size is None:
+        return "unknown"
+    for limit, label in SIZE_BUCKETS:
+        if file_size < limit:
+            return label
+    return SIZE_BUCKETS[-1][1]
+
+def hour_bucket(timestamp):
+    """Local hour of day of a timestamp, e.g. '14:00'."""
+    return f"{datetime.fromtimestamp(timestamp).hour:02d}:00"
+
+def summarize(uploads, failures, key, order=None):
+    """Group uploads and failures by key and compute throughput percentiles and failure rates.
+
+    Groups are sorted by name, or by their position in order if given.
+    """
+    groups = defaultdict(lambda: {"throughputs": [], "ttfbs": [], "uploads": 0, "failures": 0})
+    for upload in uploads:
+        group = groups[key(upload)]
+        group["uploads"] += 1
+        if upload.get("avg_throughput"):
+            group["throughputs"].append(upload["avg_throughput"])
+        if upload.get("ttfb") is not None:
+            group["ttfbs"].append(upload["ttfb"])
+    for failure in failures:
+        groups[key(failure)]["failures"] += 1
+
+    rows = []
+    for name, group in groups.items():
+        attempts = group["uploads"] + group["failures"]
+        rows.append({
+            "name": name,
+            "attempts": attempts,
+            "failure_rate": group["failures"] / attempts if attempts else 0.0,
+            "p50": percentile(group["throughputs"], 50),
+            "p95": percentile(group["throughputs"], 95),
+            "p99": percentile(group["throughputs"], 99),
+            "ttfb_p50": percentile(group["ttfbs"], 50)
+        })
+    if order:
+        return sorted(rows, key=lambda row: order.index(row["name"]) if row["name"] in order else len(order))
+    return sorted(rows, key=lambda row: str(row["name"]))
+
+def format_section(title, rows):
+    """Render one grouped section of the report as a fixed-width text table."""
+    def mbps(value):
+        return f"{value / (1024 * 1024):.2f}" if value is not None else "-"
+
+    def seconds(value):
+        return f"{value:.2f}s" if value is not None else "-"
+
+    lines = [title, "-" * len(title)]
+    lines.append(f"{'':<22}{'attempts':>9}{'fail %':>8}{'p50 MB/s':>10}{'p95 MB/s':>10}{'p99 MB/s':>10}{'TTFB p50':>10}")
+    for row in rows:
+        lines.append(
+            f"{str(row['name'])[:21]:<22}{row['attempts']:>9}{row['failure_rate'] * 100:>7.1f}%"
+            f"{mbps(row['p50']):>10}{mbps(row['p95']):>10}{mbps(row['p99']):>10}{seconds(row['ttfb_p50']):>10}"
+        )
+    return "\n".join(lines)
+
+def build_report(uploads, failures):
+    """Build the plain text performance report from upload and failure telemetry.
+
+    Uploads logged before telemetry existed have no throughput and only count as attempts.
+    """
+    if not uploads and not failures:
+        return "No uploads recorded yet."
+
+    sections = [
+        f"Upload performance report: {len(uploads)} uploads, {len(failures)} failed attempts",
+        format_section("By endpoint", summarize(uploads, failures, lambda r: r.get("endpoint") or "unknown")),
+        format_section("By hour of day", summarize(uploads, failures, lambda r: hour_bucket(r["timestamp"]))),
+        format_section("By file size", summarize(uploads, failures, lambda r: size_bucket(r.get("file_size")),
+                                                 order=[label for _, label in SIZE_BUCKETS])),
+        format_section("By client version", summarize(uploads, failures, lambda r: r.get("client_version") or "unknown"))
+    ]
+    return "\n\n".join(sections)
@@ -0,0 +1,830 @@
+import atexit
+import base64
+import json
+import os
+import queue
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import tracing
+
+DB_NAME = "catbox.db"
+
+# Statements kept prepared on the connection, comfortably more than this module uses
+CACHED_STATEMENTS = 64
+
+# How long a statement waits for another process's write lock before failing (seconds)
+BUSY_TIMEOUT = 5
+
+# Further attempts at a write that still found the database locked, with exponential backoff
+WRITE_RETRIES = 2
+RETRY_BACKOFF = 0.2
+
+# Most queued records written in one transaction
+WRITE_BATCH_SIZE = 100
+
+# Rows per transaction in bulk updates and deletes, so queued uploads get the lock in between
+BULK_BATCH_SIZE = 500
+
+# Records that couldn't be written are kept here, next to the database, until they can be
+SPOOL_NAME = "pending_writes.jsonl"
+
+if getattr(sys, 'frozen', False):
+    application_path = os.path.dirname(sys.executable)
+else:
+    application_path = os.path.dirname(os.path.abspath(__file__))
+
+# Performance telemetry stored with every upload (column name -> SQL type)
+TELEMETRY_COLUMNS = {
+    "file_size": "INTEGER",
+    "mime_type": "TEXT",
+    "duration": "REAL",
+    "ttfb": "REAL",
+    "avg_throughput": "REAL",
+    "peak_throughput": "REAL",
+    "retry_count": "INTEGER",
+    "endpoint": "TEXT",
+    "client_version": "TEXT"
+}
+
+# One row of the upload history, in the column order callers have always unpacked
+UploadRow = namedtuple("UploadRow", "file_path url mode timestamp expiry_duration is_deleted id thumbnail")
+
+INSERT_UPLOAD = """
+    INSERT INTO uploads (file_path, url, mode, timestamp, expiry_duration, is_deleted,
+                         file_size, mime_type, duration, ttfb, avg_throughput,
+                         peak_throughput, retry_count, endpoint, client_version)
+    VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_THUMBNAIL = "INSERT OR REPLACE INTO upload_thumbnails (upload_id, image) VALUES (?, ?)"
+INSERT_FAILURE = """
+    INSERT INTO upload_failures (file_path, mode, timestamp, error, file_size, mime_type,
+                                 duration, retry_count, endpoint, client_version)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SELECT_UPLOADS = """
+    SELECT file_path, url, mode, timestamp, expiry_duration, is_deleted, id, NULL
+    FROM uploads ORDER BY timestamp DESC
+"""
+SELECT_UPLOADS_WITH_THUMBNAILS = """
+    SELECT u.file_path, u.url, u.mode, u.timestamp, u.expiry_duration, u.is_deleted, u.id, t.image
+    FROM uploads u LEFT JOIN upload_thumbnails t ON t.upload_id = u.id
+    ORDER BY u.timestamp DESC
+"""
+SELECT_UPLOAD_METRICS = """
+    SELECT timestamp, file_size, mime_type, duration, ttfb, avg_throughput,
+           peak_throughput, retry_count, endpoint, client_version
+    FROM uploads
+"""
+SELECT_FAILURE_METRICS = """
+    SELECT timestamp, file_size, mime_type, duration, retry_count, endpoint, client_version, error
+    FROM upload_failures
+"""
+SELECT_UPLOAD_PAGE = """
+    SELECT u.file_path, u.url, u.mode, u.timestamp, u.expiry_duration, u.is_deleted, u.id, t.image
+    FROM uploads u LEFT JOIN upload_thumbnails t ON t.upload_id = u.id
+    ORDER BY u.timestamp DESC, u.id DESC LIMIT ?
+"""
+SELECT_UPLOAD_PAGE_AFTER = """
+    SELECT u.file_path, u.url, u.mode, u.timestamp, u.expiry_duration, u.is_deleted, u.id, t.image
+    FROM uploads u LEFT JOIN upload_thumbnails t ON t.upload_id = u.id
+    WHERE (u.timestamp, u.id) < (?, ?) ORDER BY u.timestamp DESC, u.id DESC LIMIT ?
+"""
+SELECT_UPLOADS_BY_ID = """
+    SELECT u.file_path, u.url, u.mode, u.timestamp, u.expiry_duration, u.is_deleted, u.id, t.image
+    FROM uploads u LEFT JOIN upload_thumbnails t ON t.upload_id = u.id
+    WHERE u.id IN ({})
+"""
+SELECT_SELECTION = "SELECT id, url, mode, is_deleted FROM uploads"
+SELECT_SELECTION_BY_ID = "SELECT id, url, mode, is_deleted FROM uploads WHERE id IN ({})"
+MARK_DELETED = "UPDATE uploads SET is_deleted = 1 WHERE url = ?"
+DELETE_UPLOAD = "DELETE FROM uploads WHERE url = ?"
+
+# Most ids bound into one IN (...) list, well under SQLite's variable limit
+MAX_IDS_PER_QUERY = 500
+
+# Shortest search the trigram index can answer, shorter ones fall back to LIKE
+MIN_INDEXED_SEARCH = 3
+
+# Columns of the search index, in order
+SEARCH_COLUMNS = ("name", "file_path", "url")
+
+# Most previous hits a longer search filters in memory instead of querying again
+MAX_REFINE_HITS = 20000
+
+# Changes kept in the change log for open history windows to catch up on
+CHANGE_LOG_SIZE = 10000
+
+# File name of a path in SQL: strip everything up to the last / or \
+BASENAME_SQL = "substr({0}, length(rtrim({0}, replace(replace({0}, '\\', ''), '/', ''))) + 1)"
+
+SEARCH_UPLOADS = """
+    SELECT rowid, name, file_path, url FROM uploads_search WHERE uploads_search MATCH ? ORDER BY rank
+"""
+SEARCH_UPLOADS_LIKE = f"""
+    SELECT id, {BASENAME_SQL.format("file_path")}, file_path, url FROM uploads
+    WHERE file_path LIKE ? ESCAPE '\\' OR url LIKE ? ESCAPE '\\'
+    ORDER BY timestamp DESC
+"""
+
+# What selection-wide actions need to know about an upload
+SelectionRow = namedtuple("SelectionRow", "id url mode is_deleted")
+
+# One search result, values maps each of SEARCH_COLUMNS to the text that was searched.
+# Highlights are left to find_highlights(), for just the hits that get displayed.
+SearchHit = namedtuple("SearchHit", "id text values")
+
+SELECT_CHANGES = "SELECT seq, upload_id FROM upload_changes WHERE seq > ? ORDER BY seq"
+
+def get_database_path():
+    """Get the database path, preferring %APPDATA%/Catbox Uploader/ location."""
+    # New location in %APPDATA%
+    appdata_path = os.path.expandvars(r"%APPDATA%\Catbox Uploader")
+    new_db_path = os.path.join(appdata_path, DB_NAME)
+
+    # Old location in working directory
+    old_db_path = os.path.join(application_path, DB_NAME)
+
+    # Create %APPDATA%/Catbox Uploader directory if it doesn't exist
+    os.makedirs(appdata_path, exist_ok=True)
+
+    # Check if old database exists and new one doesn't
+    if os.path.exists(old_db_path) and not os.path.exists(new_db_path):
+        try:
+            shutil.move(old_db_path, new_db_path)
+            print(f"✅ Migrated database from {old_db_path} to {new_db_path}")
+        except Exception as e:
+            print(f"⚠️ Failed to migrate database: {e}")
+            # Fall back to old location if migration fails
+            return old_db_path
+
+    return new_db_path
+
+def migrate_base_schema(cursor):
+    """Version 1: the schema as it was before versioning.
+
+    Databases of every earlier release are at user_version 0, so this brings any
+    of them up to date, adding only what's missing.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS uploads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_path TEXT,
+            url TEXT,
+            mode TEXT,
+            timestamp INTEGER,
+            expiry_duration TEXT,
+            is_deleted INTEGER DEFAULT 0
+        )
+    """)
+
+    # Columns added over time (for backward compatibility)
+    cursor.execute("PRAGMA table_info(uploads)")
+    columns = [column[1] for column in cursor.fetchall()]
+    missing = {"is_deleted": "INTEGER DEFAULT 0"} if "is_deleted" not in columns else {}
+    missing.update((column, column_type) for column, column_type in TELEMETRY_COLUMNS.items() if column not in columns)
+    for column, column_type in missing.items():
+        cursor.execute(f"ALTER TABLE uploads ADD COLUMN {column} {column_type}")
+
+    # Thumbnails captured at upload time, so history never has to touch the original files
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_thumbnails (
+            upload_id INTEGER PRIMARY KEY,
+            image BLOB
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS delete_upload_thumbnail AFTER DELETE ON uploads
+        BEGIN
+            DELETE FROM upload_thumbnails WHERE upload_id = OLD.id;
+        END
+    """)
+
+    # Failed uploads only feed the performance report, they never show up in the history
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_failures (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_path TEXT,
+            mode TEXT,
+            timestamp INTEGER,
+            error TEXT,
+            file_size INTEGER,
+            mime_type TEXT,
+            duration REAL,
+            retry_count INTEGER,
+            endpoint TEXT,
+            client_version TEXT
+        )
+    """)
+
+def migrate_history_indexes(cursor):
+    """Version 2: indexes for the history's hot predicates.
+
+    url backs marking and removing uploads, timestamp the newest-first history,
+    (mode, expiry_duration) Litterbox expiry lookups and file_path the per-file ones.
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_uploads_url ON uploads (url)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_uploads_timestamp ON uploads (timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_uploads_mode_expiry ON uploads (mode, expiry_duration)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_uploads_file_path ON uploads (file_path)")
+    cursor.execute("ANALYZE uploads")
+
+def migrate_history_search(cursor):
+    """Version 3: full-text index over file name, path and URL.
+
+    The trigram tokenizer makes any substring of at least three characters an index
+    lookup. Triggers keep it in sync with uploads. SQLite builds without FTS5 or the
+    trigram tokenizer skip it, and search falls back to LIKE.
+    """
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS uploads_search USING fts5(name, file_path, url, tokenize='trigram')")
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Full-text search isn't available, searching without an index: {e}")
+        return
+
+    name = BASENAME_SQL.format("NEW.file_path")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS uploads_search_insert AFTER INSERT ON uploads
+        BEGIN
+            INSERT INTO uploads_search (rowid, name, file_path, url) VALUES (NEW.id, {name}, NEW.file_path, NEW.url);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS uploads_search_delete AFTER DELETE ON uploads
+        BEGIN
+            DELETE FROM uploads_search WHERE rowid = OLD.id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS uploads_search_update AFTER UPDATE OF file_path, url ON uploads
+        BEGIN
+            DELETE FROM uploads_search WHERE rowid = OLD.id;
+            INSERT INTO uploads_search (rowid, name, file_path, url) VALUES (NEW.id, {name}, NEW.file_path, NEW.url);
+        END
+    """)
+    # Rebuilt from scratch, so rows a previous run indexed can't collide with the backfill
+    # ('delete-all' only works on contentless and external content tables)
+    cursor.execute("DELETE FROM uploads_search")
+    cursor.execute(f"""
+        INSERT INTO uploads_search (rowid, name, file_path, url)
+        SELECT id, {BASENAME_SQL.format("file_path")}, file_path, url FROM uploads
+    """)
+
+def migrate_change_log(cursor):
+    """Version 4: log the ids of inserted, updated and removed uploads.
+
+    Open history windows read the log to update only the rows that changed. It is
+    pruned to the last CHANGE_LOG_SIZE changes, every 1000 changes.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            upload_id INTEGER NOT NULL
+        )
+    """)
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS upload_changes_{event.lower()} AFTER {event} ON uploads
+            BEGIN
+                INSERT INTO upload_changes (upload_id) VALUES ({row}.id);
+            END
+        """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS upload_changes_prune AFTER INSERT ON upload_changes WHEN NEW.seq % 1000 = 0
+        BEGIN
+            DELETE FROM upload_changes WHERE seq <= NEW.seq - {CHANGE_LOG_SIZE};
+        END
+    """)
+
+# Schema migrations, MIGRATIONS[n] takes the database from user_version n to n + 1.
+# Only ever append to this list.
+MIGRATIONS = [
+    migrate_base_schema,
+    migrate_history_indexes,
+    migrate_history_search,
+    migrate_change_log
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_lock = threading.RLock()
+_connection = None
+_connection_pid = None
+
+# Writes go through their own connection, so waiting out another process's write lock
+# never holds up reads on the shared one
+_write_lock = threading.RLock()
+_write_connection = None
+_write_connection_pid = None
+
+@tracing.traced("db.migrate")
+def migrate(conn):
+    """Apply the migrations the database hasn't seen yet, each in its own transaction.
+
+    The version is read again once the write lock is held, so processes starting
+    together never run a migration twice or set the version back.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version > SCHEMA_VERSION:
+        print(f"⚠️ Database schema version {version} is newer than this version of the app ({SCHEMA_VERSION})")
+        return
+    while version < SCHEMA_VERSION:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                cursor.execute("COMMIT")  # Another process finished the migrations
+                return
+            MIGRATIONS[version](cursor)
+            cursor.execute(f"PRAGMA user_version = {version + 1}")
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        version += 1
+        print(f"✅ Database migrated to schema version {version}")
+
+def connect():
+    """A new connection to the database, shareable between threads."""
+    # Transactions are explicit (see transaction()), so DDL in migrations is atomic too
+    return sqlite3.connect(get_database_path(), timeout=BUSY_TIMEOUT, isolation_level=None,
+                           check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+
+def get_connection():
+    """The process-wide connection for reads, opened and migrated on first use."""
+    global _connection, _connection_pid
+    with _lock:
+        if _connection is not None and _connection_pid == os.getpid():
+            return _connection
+        with tracing.span("db.connect"):
+            conn = connect()
+            enable_wal(conn)
+            migrate(conn)
+        _connection = conn
+        _connection_pid = os.getpid()
+    replay_spool()  # Writes, so it must not hold up reads either
+    return conn
+
+def get_write_connection():
+    """The process-wide connection transactions run on, see transaction()."""
+    global _write_connection, _write_connection_pid
+    get_connection()  # The database must exist and be migrated
+    with _write_lock:
+        if _write_connection is None or _write_connection_pid != os.getpid():
+            _write_connection = connect()
+            _write_connection_pid = os.getpid()
+        return _write_connection
+
+def enable_wal(conn):
+    """Switch to write-ahead logging, so readers and the writer never block each other.
+
+    The journal mode is stored in the database, so this only does work the first time.
+    """
+    try:
+        mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    except sqlite3.OperationalError as e:
+        mode = str(e)
+    if mode.lower() != "wal":
+        print(f"⚠️ Database isn't using WAL journaling: {mode}")
+
+def close_connection():
+    global _connection, _write_connection
+    with _write_lock:
+        if _write_connection is not None:
+            _write_connection.close()
+            _write_connection = None
+    with _lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
+
+def is_locked_error(error):
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error))
+
+def with_retry(write):
+    """Call write(), trying again with backoff while another process holds the write lock.
+
+    Each attempt already waits up to BUSY_TIMEOUT, so write must be a whole transaction.
+    """
+    for attempt in range(WRITE_RETRIES + 1):
+        try:
+            return write()
+        except sqlite3.OperationalError as e:
+            if not is_locked_error(e) or attempt == WRITE_RETRIES:
+                raise
+            print(f"⚠️ Database is locked, retrying ({attempt + 1}/{WRITE_RETRIES})")
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+@contextmanager
+def transaction():
+    """Run the enclosed statements in one write transaction, yielding a cursor.
+
+    BEGIN IMMEDIATE takes the write lock up front, so a transaction either waits for it
+    at the start or not at all, never halfway through. It waits on the write connection,
+    so reads on the shared connection carry on meanwhile.
+    """
+    conn = get_write_connection()
+    with _write_lock:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+
+def query(sql, parameters=(), connection=None):
+    """Run a read-only statement and return all rows, on the shared connection unless one is given."""
+    if connection is not None:
+        return connection.execute(sql, parameters).fetchall()
+    with _lock:
+        return get_connection().execute(sql, parameters).fetchall()
+
+def open_reader():
+    """A separate read-only connection for a background thread.
+
+    With WAL it reads alongside the shared connection instead of waiting for its lock.
+    """
+    get_connection()  # The database must exist and be migrated
+    conn = connect()
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+def query_dicts(sql, parameters=()):
+    """Like query(), with every row as a dict keyed by column name."""
+    with _lock:
+        cursor = get_connection().execute(sql, parameters)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def upload_record(file_path, url, mode, expiry_duration=None, metrics=None, thumbnail=None, client_version=None):
+    """A successful upload, ready to be written now or queued."""
+    metrics = metrics or {}
+    return {
+        "kind": "upload",
+        "row": [
+            file_path,
+            url,
+            mode,
+            int(time.time()),
+            expiry_duration,
+            metrics.get("file_size"),
+            metrics.get("mime_type"),
+            metrics.get("duration"),
+            metrics.get("ttfb"),
+            metrics.get("avg_throughput"),
+            metrics.get("peak_throughput"),
+            metrics.get("retry_count", 0),
+            metrics.get("endpoint"),
+            client_version
+        ],
+        "thumbnail": thumbnail
+    }
+
+def failure_record(file_path, mode, error, metrics=None, client_version=None):
+    """A failed upload attempt, ready to be written now or queued."""
+    metrics = metrics or {}
+    return {
+        "kind": "failure",
+        "row": [
+            file_path,
+            mode,
+            int(time.time()),
+            error,
+            metrics.get("file_size"),
+            metrics.get("mime_type"),
+            metrics.get("duration"),
+            metrics.get("retry_count", 0),
+            metrics.get("endpoint"),
+            client_version
+        ]
+    }
+
+def write_record(cursor, record):
+    """Insert one record inside an open transaction, returning its row id."""
+    if record["kind"] == "failure":
+        cursor.execute(INSERT_FAILURE, record["row"])
+        return cursor.lastrowid
+    cursor.execute(INSERT_UPLOAD, record["row"])
+    upload_id = cursor.lastrowid
+    if record.get("thumbnail") is not None:
+        cursor.execute(INSERT_THUMBNAIL, (upload_id, record["thumbnail"]))
+    return upload_id
+
+@tracing.traced("db.write_records")
+def write_records(records):
+    """Insert records in a single transaction, retrying while the database is locked."""
+    def write():
+        with transaction() as cursor:
+            return [write_record(cursor, record) for record in records]
+    return with_retry(write)
+
+def get_spool_path():
+    return os.path.join(os.path.dirname(get_database_path()), SPOOL_NAME)
+
+@contextmanager
+def spool_lock():
+    """Exclusive lock, across processes, between appending to the spool and claiming it."""
+    with open(get_spool_path() + ".lock", "a+b") as f:
+        if sys.platform == "win32":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def spool(records):
+    """Append records that couldn't be written to the spool file."""
+    try:
+        with spool_lock(), open(get_spool_path(), "a", encoding="utf-8") as f:
+            for record in records:
+                record = dict(record)
+                if record.get("thumbnail") is not None:
+                    record["thumbnail"] = base64.b64encode(record["thumbnail"]).decode("ascii")
+                f.write(json.dumps(record) + "\n")
+        print(f"⚠️ Spooled {len(records)} database writes for later")
+    except OSError as e:
+        print(f"❌ Failed to spool database writes, {len(records)} records lost: {e}")
+
+def replay_spool():
+    """Write records spooled by earlier processes.
+
+    The spool is claimed by renaming it under spool_lock(), so no process is still
+    appending to it and two processes never replay the same records. Records that
+    can't be written now are spooled again, malformed ones are dropped.
+    """
+    spool_path = get_spool_path()
+    claimed_path = f"{spool_path}.{os.getpid()}"
+    try:
+        with spool_lock():
+            os.replace(spool_path, claimed_path)
+    except OSError:
+        return  # Nothing spooled, or another process is replaying
+
+    records = []
+    try:
+        with open(claimed_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    if record.get("thumbnail") is not None:
+                        record["thumbnail"] = base64.b64decode(record["thumbnail"])
+                except Exception:
+                    continue  # A line cut short by a crash
+                records.append(record)
+    except OSError as e:
+        print(f"⚠️ Failed to read spooled database writes: {e}")
+
+    written = dropped = 0
+    try:
+        while written < len(records):
+            batch = records[written:written + WRITE_BATCH_SIZE]
+            try:
+                write_records(batch)
+                written += len(batch)
+            except sqlite3.OperationalError:
+                raise  # Locked or out of space, try again later
+            except Exception:
+                # A malformed record fails its whole batch, find it by writing the batch one by one
+                for record in batch:
+                    try:
+                        write_records([record])
+                    except sqlite3.OperationalError:
+                        raise
+                    except Exception as e:
+                        print(f"❌ Dropped a malformed spooled database write: {e}")
+                        dropped += 1
+                    written += 1
+        print(f"✅ Replayed {written - dropped} spooled database writes")
+    except Exception as e:
+        print(f"⚠️ Failed to replay spooled database writes: {e}")
+        spool(records[written:])
+
+    try:
+        os.remove(claimed_path)
+    except OSError as e:
+        print(f"⚠️ Failed to remove replayed database writes: {e}")
+
+class WriteQueue:
+    """Single writer thread that batches queued records into short transactions.
+
+    Callers never wait on the database. Records that still can't be written after
+    the retries are spooled and replayed by the next process opening the database,
+    so a locked database never costs an upload its history entry.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def put(self, record):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+                self._thread.start()
+                # Runs before daemon threads are stopped, so nothing queued is lost on exit
+                atexit.register(self.close)
+            self._queue.put(record)
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            batch = [record]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._write(batch)
+                    return
+                batch.append(record)
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            write_records(batch)
+        except Exception as e:
+            print(f"❌ Failed to write to the database: {e}")
+            spool(batch)
+
+    def flush(self):
+        """Wait until everything queued so far has been written (or spooled)."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._thread = None
+            self._queue.put(None)
+        thread.join()
+
+    close = flush
+
+# Process-wide writer
+writer = WriteQueue()
+
+def insert_upload(file_path, url, mode, expiry_duration=None, metrics=None, thumbnail=None, client_version=None):
+    """Store a successful upload with its telemetry and optional encoded thumbnail right away.
+
+    Returns:
+        The id of the new upload
+    """
+    return write_records([upload_record(file_path, url, mode, expiry_duration, metrics, thumbnail, client_version)])[0]
+
+def queue_upload(file_path, url, mode, expiry_duration=None, metrics=None, thumbnail=None, client_version=None):
+    """Like insert_upload(), written in the background by the process-wide writer."""
+    writer.put(upload_record(file_path, url, mode, expiry_duration, metrics, thumbnail, client_version))
+
+def insert_failure(file_path, mode, error, metrics=None, client_version=None):
+    """Store a failed upload attempt for the performance report right away."""
+    write_records([failure_record(file_path, mode, error, metrics, client_version)])
+
+def queue_failure(file_path, mode, error, metrics=None, client_version=None):
+    """Like insert_failure(), written in the background by the process-wide writer."""
+    writer.put(failure_record(file_path, mode, error, metrics, client_version))
+
+@tracing.traced("db.query_uploads")
+def query_uploads(include_thumbnails=False):
+    """The upload history as UploadRows, newest first. thumbnail is None unless requested."""
+    rows = query(SELECT_UPLOADS_WITH_THUMBNAILS if include_thumbnails else SELECT_UPLOADS)
+    return [UploadRow(*row) for row in rows]
+
+def query_upload_page(limit, after=None):
+    """A page of the history as UploadRows with their stored thumbnails, newest first.
+
+    Args:
+        limit: Most rows to return
+        after: (timestamp, id) of the last row of the previous page, None for the first page
+    """
+    if after is None:
+        rows = query(SELECT_UPLOAD_PAGE, (limit,))
+    else:
+        rows = query(SELECT_UPLOAD_PAGE_AFTER, (*after, limit))
+    return [UploadRow(*row) for row in rows]
+
+def query_by_ids(sql, ids):
+    """Run an "IN ({})" statement for any number of ids, in chunks."""
+    ids = list(ids)
+    rows = []
+    for start in range(0, len(ids), MAX_IDS_PER_QUERY):
+        chunk = ids[start:start + MAX_IDS_PER_QUERY]
+        rows.extend(query(sql.format(", ".join("?" * len(chunk))), chunk))
+    return rows
+
+def query_uploads_by_id(ids):
+    """UploadRows with their stored thumbnails for ids, in the order given. Ids that no longer exist are skipped."""
+    rows = {row[6]: UploadRow(*row) for row in query_by_ids(SELECT_UPLOADS_BY_ID, ids)}
+    return [rows[upload_id] for upload_id in ids if upload_id in rows]
+
+def query_selection(ids=None):
+    """SelectionRows of the given uploads, or of the whole history."""
+    rows = query(SELECT_SELECTION) if ids is None else query_by_ids(SELECT_SELECTION_BY_ID, ids)
+    return [SelectionRow(*row) for row in rows]
+
+def query_metrics():
+    """Telemetry of successful uploads and of failed attempts as (uploads, failures) lists of dicts."""
+    return query_dicts(SELECT_UPLOAD_METRICS), query_dicts(SELECT_FAILURE_METRICS)
+
+def execute_in_batches(sql, values):
+    """executemany() in transactions of BULK_BATCH_SIZE rows, each retried while locked."""
+    parameters = [(value,) for value in values]
+    for start in range(0, len(parameters), BULK_BATCH_SIZE):
+        batch = parameters[start:start + BULK_BATCH_SIZE]
+
+        def write():
+            with transaction() as cursor:
+                cursor.executemany(sql, batch)
+        with_retry(write)
+
+def mark_deleted(urls):
+    """Flag uploads as deleted from Catbox."""
+    execute_in_batches(MARK_DELETED, urls)
+
+def remove_uploads(urls):
+    """Remove uploads (and their thumbnails) from the history."""
+    execute_in_batches(DELETE_UPLOAD, urls)
+
+def data_version(connection):
+    """Changes whenever another connection commits to the database, see PRAGMA data_version."""
+    return connection.execute("PRAGMA data_version").fetchone()[0]
+
+def last_change(connection=None):
+    return query("SELECT COALESCE(MAX(seq), 0) FROM upload_changes", connection=connection)[0][0]
+
+def query_changes(after, connection=None):
+    """Ids of the uploads changed since the change numbered after, see migrate_change_log().
+
+    Returns:
+        (last change, ids). ids is None if some of the changes were already pruned
+        from the log, and everything has to be reloaded instead.
+    """
+    rows = query(SELECT_CHANGES, (after,), connection)
+    if not rows:
+        return after, []
+    if rows[0][0] > after + 1:
+        return rows[-1][0], None
+    return rows[-1][0], list(dict.fromkeys(upload_id for _, upload_id in rows))
+
+def has_search_index(connection=None):
+    return bool(query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'uploads_search'",
+                      connection=connection))
+
+def find_highlights(text, value):
+    """Offsets of every case-insensitive occurrence of text in value."""
+    return [match.span() for match in re.finditer(re.escape(text), value or "", re.IGNORECASE)]
+
+@tracing.traced("db.search_uploads")
+def search_uploads(text, connection=None):
+    """Search file names, paths and URLs for a substring.
+
+    Returns:
+        A list of SearchHit, best match first. Searches the index can't answer
+        (too short, or no FTS5) use LIKE and come newest first.
+    """
+    text = text.strip()
+    if not text:
+        return []
+
+    if len(text) >= MIN_INDEXED_SEARCH and has_search_index(connection):
+        phrase = '"' + text.replace('"', '""') + '"'
+        rows = query(SEARCH_UPLOADS, (phrase,), connection)
+    else:
+        pattern = "%" + re.sub(r"([\\%_])", r"\\\1", text) + "%"
+        rows = query(SEARCH_UPLOADS_LIKE, (pattern, pattern), connection)
+    return [SearchHit(row[0], text, dict(zip(SEARCH_COLUMNS, row[1:]))) for row in rows]
+
+def can_refine(previous_text, previous_hits, text):
+    """Whether the hits of a search for previous_text contain every hit of text."""
+    return (previous_hits is not None and len(previous_hits) <= MAX_REFINE_HITS
+            and previous_text.strip().lower() in text.strip().lower())
+
+def refine_search(hits, text):
+    """Narrow down hits of an earlier search to those matching text, see can_refine().
+
+    Keeps the order of the earlier search.
+    """
+    text = text.strip()
+    needle = text.lower()
+    return [SearchHit(hit.id, text, hit.values) for hit in hits
+            if any(needle in (value or "").lower() for value in hit.values.values())]
@@ -0,0 +1,80 @@
+import time
+from collections import deque
+
+class ThroughputEstimator:
+    """Exponentially weighted moving average of a transfer rate.
+
+    The smoothing factor is derived from the time between samples, so the estimate
+    reacts the same way no matter how often update() is called. Rates are in units
+    per second, where the unit is whatever the caller counts (bytes, files, ...).
+    """
+
+    def __init__(self, half_life=3.0, history_size=60):
+        self.half_life = half_life
+        self.history = deque(maxlen=history_size)
+        self.reset()
+
+    def reset(self, total=0, now=None):
+        """Forget all samples, e.g. when a transfer is restarted."""
+        self.rate = None
+        self.instant_rate = 0.0
+        self.peak_rate = 0.0
+        self.history.clear()
+        self._start_time = now if now is not None else time.monotonic()
+        self._start_total = total
+        self._last_time = self._start_time
+        self._last_total = total
+
+    def update(self, total, now=None):
+        """Record the running total transferred so far."""
+        now = now if now is not None else time.monotonic()
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            return
+
+        self.instant_rate = max(total - self._last_total, 0) / elapsed
+        if self.rate is None:
+            self.rate = self.instant_rate
+        else:
+            alpha = 1 - 0.5 ** (elapsed / self.half_life)
+            self.rate += alpha * (self.instant_rate - self.rate)
+
+        self.peak_rate = max(self.peak_rate, self.instant_rate)
+        self.history.append(self.instant_rate)
+        self._last_time = now
+        self._last_total = total
+
+    @property
+    def average_rate(self):
+        """Mean rate since the last reset."""
+        elapsed = self._last_time - self._start_time
+        if elapsed <= 0:
+            return 0.0
+        return (self._last_total - self._start_total) / elapsed
+
+    def eta(self, remaining):
+        """Estimated seconds left for the remaining units, or None if unknown."""
+        if not self.rate:
+            return None
+        return max(remaining, 0) / self.rate
+
+def format_eta(eta_seconds):
+    """Format an ETA with hours, minutes, and seconds."""
+    if eta_seconds > 3600:  # More than 1 hour
+        hours = int(eta_seconds // 3600)
+        minutes = int((eta_seconds % 3600) // 60)
+        seconds = int(eta_seconds % 60)
+        return f"ETA: {hours}h {minutes}m {seconds}s"
+    elif eta_seconds > 60:  # More than 1 minute
+        minutes = int(eta_seconds // 60)
+        seconds = int(eta_seconds % 60)
+        return f"ETA: {minutes}m {seconds}s"
+    else:  # Less than 1 minute
+        seconds = int(eta_seconds)
+        return f"ETA: {seconds}s"
+
+def format_rate(bytes_per_second):
+    """Format a byte rate as MB/s or KB/s."""
+    if bytes_per_second >= 1024 * 1024:
+        return f"{bytes_per_second / (1024 * 1024):.2f} MB/s"
+    return f"{bytes_per_second / 1024:.0f} KB/s"
@@ -1,17 +1,42 @@
 import os
 import io
+import hashlib
 import mimetypes
-from PIL import Image
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
 import pymupdf as fitz
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3
-from win32com.shell import shell, shellcon
-import win32api
-import win32con
-import win32ui
-import win32gui
+import base64
+from mutagen.id3 import ID3, ID3NoHeaderError
+from mutagen.aiff import AIFF
+from mutagen.flac import FLAC, Picture
+from mutagen.mp4 import MP4
+from mutagen.oggopus import OggOpus
+from mutagen.oggvorbis import OggVorbis
+from mutagen.wave import WAVE
 import ctypes
 from ctypes import wintypes
+import tracing
+
+# The Shell APIs are only there on Windows, elsewhere thumbnails come from PyAV/ffmpeg
+# and icons are drawn
+try:
+    from win32com.shell import shell, shellcon
+    import win32api
+    import win32con
+    import win32ui
+    import win32gui
+except ImportError:
+    shell = None
+
+try:
+    import av
+except ImportError:
+    av = None
 
 # Define ctypes structures for IShellItemImageFactory
 class GUID(ctypes.Structure):
@@ -28,14 +53,97 @@ IID_IShellItemImageFactory = GUID(0xbcc18b79, 0xba16, 0x442f,
 SIIGBF_THUMBNAILONLY = 0x08
 SIIGBF_BIGGERSIZEOK = 0x01
 
-shell32 = ctypes.windll.shell32
+shell32 = ctypes.windll.shell32 if sys.platform == "win32" else None
+
+# Broken PDFs make MuPDF print warnings, which would end up in the stderr error dialog
+fitz.TOOLS.mupdf_display_errors(False)
+
+# Largest image (in pixels) that is decoded for a thumbnail, bigger ones use the shell thumbnailer
+MAX_THUMBNAIL_SOURCE_PIXELS = 100_000_000
+
+# The cheap first downscale stops at this multiple of the target size, LANCZOS does the rest
+REDUCING_GAP = 2.0
+
+# Modes Image.reduce() handles directly, anything else is converted to RGBA first
+REDUCIBLE_MODES = ("L", "LA", "RGB", "RGBA", "RGBX")
+
+# ID3/FLAC picture type of the front cover
+FRONT_COVER = 3
+
+# Audio files without cover art, so they are only parsed once per process
+MAX_NO_AUDIO_ART_ENTRIES = 4096
+_no_audio_art = set()
+_no_audio_art_lock = threading.Lock()
+
+# Seconds into a video the thumbnail frame is taken from (at most a third of the video),
+# overridable through the environment
+VIDEO_OFFSET_ENV_VAR = "CATBOX_VIDEO_THUMBNAIL_OFFSET"
+DEFAULT_VIDEO_THUMBNAIL_OFFSET = 10.0
+
+# Seconds a PyAV or ffmpeg video thumbnail may take before giving up
+VIDEO_THUMBNAIL_TIMEOUT = 15
+
+# Thumbnail canvas size the icon overlay sizes below are designed for, other sizes scale them
+THUMBNAIL_CANVAS_SIZE = 256
+ICON_OVERLAY_SIZE = 60
+FALLBACK_ICON_SIZE = 120
+ICON_PADDING = 4
+
+# File types whose icon comes from the file itself rather than its extension
+PER_FILE_ICON_EXTENSIONS = {".exe", ".lnk", ".ico", ".cur", ".ani", ".scr", ".url", ".appref-ms"}
 
-def get_image_thumbnail(filepath):
-    return Image.open(filepath)
+# Icons kept in memory, and how long (in seconds) icons on disk are trusted before
+# being extracted again in case the file association changed
+MAX_ICON_CACHE_ENTRIES = 512
+ICON_CACHE_MAX_AGE = 7 * 24 * 60 * 60
 
-def get_video_thumbnail(filepath):
+_icon_cache = OrderedDict()
+_icon_cache_lock = threading.Lock()
+
+def get_cache_dir(name):
+    """Get a cache directory under %LOCALAPPDATA%/Catbox Uploader/, creating it if needed."""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, "Catbox Uploader", name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+@tracing.traced("thumb.get_image_thumbnail")
+def get_image_thumbnail(filepath, max_size=256):
+    """Decode an image at the lowest resolution that still gives a sharp max_size thumbnail.
+
+    JPEGs are decoded at 1/2, 1/4 or 1/8 scale by libjpeg (draft mode), other formats
+    are box-reduced before the final LANCZOS pass. Images above the pixel cap are
+    never decoded so memory stays bounded.
+    """
+    img = Image.open(filepath)
+    width, height = img.size
+    if width * height > MAX_THUMBNAIL_SOURCE_PIXELS:
+        img.close()
+        # The shell thumbnailer has its own cache and never decodes the full image in our process
+        return get_shell_thumbnail(filepath)
+    return reduce_image(img, max_size)
+
+def reduce_image(img, max_size):
+    """Cheaply shrink an opened (not yet decoded) image to about REDUCING_GAP times max_size."""
+    width, height = img.size
+    target = int(max_size * REDUCING_GAP)
+    if img.format == "JPEG":
+        img.draft(None, (target, target))
+        return img
+
+    factor = min(width // target, height // target)
+    if factor >= 2:
+        if img.mode not in REDUCIBLE_MODES:
+            img = img.convert("RGBA")
+        img = img.reduce(factor)
+    return img
+
+@tracing.traced("thumb.get_shell_thumbnail")
+def get_shell_thumbnail(filepath):
     # Use Windows IShellItemImageFactory via ctypes to avoid cv2 dependency
-    
+    if shell32 is None:
+        raise Exception("Shell thumbnails are only available on Windows.")
+
     # Define argtypes
     shell32.SHCreateItemFromParsingName.argtypes = [
         wintypes.LPCWSTR, ctypes.c_void_p, ctypes.POINTER(GUID), ctypes.POINTER(ctypes.c_void_p)
@@ -115,22 +223,272 @@ def get_video_thumbnail(filepath):
         # But we called Release() above explicitly.
         raise e
 
-def get_pdf_thumbnail(filepath):
-    doc = fitz.open(filepath)
-    if len(doc) == 0:
-        raise Exception("Empty PDF.")
-    page = doc.load_page(0)
-    pix = page.get_pixmap()
-    return Image.open(io.BytesIO(pix.tobytes("png")))
-
-def get_mp3_album_art(filepath):
-    audio = MP3(filepath, ID3=ID3)
-    for tag in audio.tags.values():
-        if tag.FrameID == 'APIC':
-            return Image.open(io.BytesIO(tag.data))
-    raise Exception("No album art found.")
+def get_video_offset(duration, offset=None):
+    """Position (in seconds) to take a video thumbnail from.
+
+    Args:
+        duration: Length of the video in seconds, or None if unknown
+        offset: Requested offset, defaults to CATBOX_VIDEO_THUMBNAIL_OFFSET or DEFAULT_VIDEO_THUMBNAIL_OFFSET
+    """
+    if offset is None:
+        try:
+            offset = float(os.environ.get(VIDEO_OFFSET_ENV_VAR, DEFAULT_VIDEO_THUMBNAIL_OFFSET))
+        except ValueError:
+            offset = DEFAULT_VIDEO_THUMBNAIL_OFFSET
+    offset = max(offset, 0.0)
+    if duration:
+        # Short clips use a frame from their first third instead of running past the end
+        offset = min(offset, duration / 3)
+    return offset
+
+@tracing.traced("thumb.get_pyav_thumbnail")
+def get_pyav_thumbnail(filepath, max_size=256, offset=None):
+    """Decode one keyframe near the offset with PyAV, scaled down by the decoder's scaler."""
+    if av is None:
+        raise Exception("PyAV is not installed.")
+
+    deadline = time.monotonic() + VIDEO_THUMBNAIL_TIMEOUT
+    with av.open(filepath, timeout=VIDEO_THUMBNAIL_TIMEOUT) as container:
+        if not container.streams.video:
+            raise Exception("No video stream.")
+        stream = container.streams.video[0]
+        # Only keyframes are decoded, so a thumbnail never decodes a whole GOP
+        stream.codec_context.skip_frame = "NONKEY"
+
+        duration = container.duration / av.time_base if container.duration else None
+        position = get_video_offset(duration, offset)
+        if position:
+            # Seeks to the keyframe at or before the position without decoding up to it
+            container.seek(int(position * av.time_base), backward=True, any_frame=False)
+
+        for packet in container.demux(stream):
+            if time.monotonic() > deadline:
+                raise Exception("PyAV timed out.")
+            for frame in packet.decode():
+                scale = min(max_size / max(frame.width, frame.height), 1)
+                return frame.to_image(width=max(round(frame.width * scale), 1),
+                                      height=max(round(frame.height * scale), 1))
+    raise Exception("No video frame decoded.")
+
+@tracing.traced("thumb.get_ffmpeg_thumbnail")
+def get_ffmpeg_thumbnail(filepath, max_size=256, offset=None):
+    """Grab one keyframe near the offset with an ffmpeg subprocess.
+
+    -ss before -i makes ffmpeg seek in the container, so only the frame at the
+    offset is decoded no matter how large the file is.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise Exception("ffmpeg is not installed.")
+
+    deadline = time.monotonic() + VIDEO_THUMBNAIL_TIMEOUT
+    positions = [get_video_offset(None, offset)]
+    if positions[0]:
+        positions.append(0.0)  # The video may be shorter than the offset
+
+    for position in positions:
+        command = [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin",
+            "-skip_frame", "nokey", "-noaccurate_seek", "-ss", f"{position:.3f}", "-i", filepath,
+            "-map", "0:v:0", "-frames:v", "1",
+            "-vf", f"scale={max_size}:{max_size}:force_original_aspect_ratio=decrease",
+            "-f", "image2pipe", "-c:v", "bmp", "-"
+        ]
+        try:
+            result = subprocess.run(
+                command, capture_output=True, timeout=max(deadline - time.monotonic(), 0.1),
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+            )
+        except subprocess.TimeoutExpired:
+            raise Exception("ffmpeg timed out.")
+        if result.returncode == 0 and result.stdout:
+            img = Image.open(io.BytesIO(result.stdout))
+            img.load()
+            return img
+
+    error = result.stderr.decode("utf-8", "replace").strip()
+    raise Exception(f"ffmpeg failed: {error or 'no frame decoded'}")
+
+# Video thumbnail backends, tried in order. The Shell is fastest and uses Windows' own
+# thumbnail cache, the others work anywhere PyAV or ffmpeg are available.
+VIDEO_BACKENDS = [
+    ("shell", lambda filepath, max_size, offset: get_shell_thumbnail(filepath)),
+    ("pyav", get_pyav_thumbnail),
+    ("ffmpeg", get_ffmpeg_thumbnail)
+]
+
+@tracing.traced("thumb.get_video_thumbnail")
+def get_video_thumbnail(filepath, max_size=256, offset=None):
+    """Get a video thumbnail from the first backend in VIDEO_BACKENDS that succeeds."""
+    errors = []
+    for name, backend in VIDEO_BACKENDS:
+        try:
+            return backend(filepath, max_size, offset)
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+    raise Exception("No video thumbnail backend succeeded (" + "; ".join(errors) + ")")
+
+@tracing.traced("thumb.get_pdf_thumbnail")
+def get_pdf_thumbnail(filepath, max_size=256):
+    """Render the first page of a PDF straight at thumbnail size."""
+    with fitz.open(filepath, filetype="pdf") as doc:
+        if doc.needs_pass:
+            raise Exception("Encrypted PDF.")
+        if doc.page_count == 0:
+            raise Exception("Empty PDF.")
+
+        page = doc.load_page(0)
+        rect = page.rect
+        scale = max_size / max(rect.width, rect.height, 1)
+        pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), colorspace=fitz.csRGB, alpha=False)
+
+    # Wrap the raw RGB samples instead of encoding to PNG and decoding again
+    return Image.frombuffer("RGB", (pix.width, pix.height), pix.samples, "raw", "RGB", pix.stride, 1)
+
+def pick_picture(pictures):
+    """Embedded picture data to use, preferring the front cover."""
+    pictures = list(pictures)
+    if not pictures:
+        return None
+    for picture in pictures:
+        if getattr(picture, "type", None) == FRONT_COVER:
+            return picture.data
+    return pictures[0].data
+
+def id3_art(tags):
+    return pick_picture(tags.getall("APIC")) if tags is not None else None
+
+def read_id3_art(filepath):
+    # Reads only the ID3 tag at the start of the file, never the MPEG frames
+    try:
+        return id3_art(ID3(filepath))
+    except ID3NoHeaderError:
+        return None
+
+def read_flac_art(filepath):
+    return pick_picture(FLAC(filepath).pictures)
 
+def read_mp4_art(filepath):
+    tags = MP4(filepath).tags
+    covers = tags.get("covr") if tags is not None else None
+    return bytes(covers[0]) if covers else None
+
+def read_vorbis_comment_art(audio):
+    # Cover art in Vorbis comments is a base64 encoded FLAC picture block
+    tags = audio.tags
+    if tags is None:
+        return None
+    return pick_picture(Picture(base64.b64decode(value)) for value in tags.get("metadata_block_picture", []))
+
+# Readers that only parse the tag/metadata blocks of each audio format
+AUDIO_ART_READERS = {
+    ".mp3": read_id3_art,
+    ".flac": read_flac_art,
+    ".m4a": read_mp4_art,
+    ".m4b": read_mp4_art,
+    ".ogg": lambda filepath: read_vorbis_comment_art(OggVorbis(filepath)),
+    ".oga": lambda filepath: read_vorbis_comment_art(OggVorbis(filepath)),
+    ".opus": lambda filepath: read_vorbis_comment_art(OggOpus(filepath)),
+    ".wav": lambda filepath: id3_art(WAVE(filepath).tags),
+    ".aif": lambda filepath: id3_art(AIFF(filepath).tags),
+    ".aiff": lambda filepath: id3_art(AIFF(filepath).tags)
+}
+
+@tracing.traced("thumb.get_audio_art")
+def get_audio_art(filepath, max_size=256):
+    """Get the embedded cover art of an audio file.
+
+    Files known to have no art are remembered (by path, size and mtime) so they
+    aren't parsed again.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    stat = os.stat(filepath)
+    key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+    if key in _no_audio_art:
+        raise Exception("No album art found.")
+
+    data = AUDIO_ART_READERS[ext](filepath)
+    if not data:
+        with _no_audio_art_lock:
+            if len(_no_audio_art) >= MAX_NO_AUDIO_ART_ENTRIES:
+                _no_audio_art.clear()
+            _no_audio_art.add(key)
+        raise Exception("No album art found.")
+
+    img = Image.open(io.BytesIO(data))
+    if img.width * img.height > MAX_THUMBNAIL_SOURCE_PIXELS:
+        raise Exception("Album art too large.")
+    return reduce_image(img, max_size)
+
+def icon_cache_key(PATH, size, fallback):
+    """Cache key of a file's icon: its extension, or the file itself for types with per-file icons."""
+    ext = os.path.splitext(PATH)[1].lower()
+    if ext in PER_FILE_ICON_EXTENSIONS:
+        try:
+            mtime = os.stat(PATH).st_mtime_ns
+        except OSError:
+            mtime = 0
+        return ("file", os.path.abspath(PATH).lower(), mtime, size, fallback)
+    return ("ext", ext, size, fallback)
+
+def _icon_disk_path(key):
+    digest = hashlib.sha1(repr(key).encode("utf-8", "surrogatepass")).hexdigest()
+    return os.path.join(get_cache_dir("icons"), digest + ".png")
+
+@tracing.traced("thumb.get_icon")
 def get_icon(PATH, size, fallback=False):
+    """Get the shell icon of a file, cached in memory and on disk.
+
+    Icons are keyed by extension, except for types in PER_FILE_ICON_EXTENSIONS. A copy
+    is returned so callers can modify it freely.
+    """
+    key = icon_cache_key(PATH, size, fallback)
+    with _icon_cache_lock:
+        icon = _icon_cache.get(key)
+        if icon is not None:
+            _icon_cache.move_to_end(key)
+            return icon.copy()
+
+    disk_path = _icon_disk_path(key)
+    icon = None
+    try:
+        if time.time() - os.path.getmtime(disk_path) < ICON_CACHE_MAX_AGE:
+            with Image.open(disk_path) as cached:
+                icon = cached.convert("RGBA")
+    except (OSError, ValueError):
+        pass
+
+    if icon is None:
+        icon = extract_icon(PATH, size, fallback)
+        temp_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            icon.save(temp_path, "PNG")
+            os.replace(temp_path, disk_path)
+        except OSError as e:
+            print(f"⚠️ Failed to cache icon for {PATH}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    with _icon_cache_lock:
+        _icon_cache[key] = icon
+        while len(_icon_cache) > MAX_ICON_CACHE_ENTRIES:
+            _icon_cache.popitem(last=False)
+    return icon.copy()
+
+@tracing.traced("thumb.extract_icon")
+def extract_icon(PATH, size, fallback=False):
+    """Extract a file's icon from the shell (uncached)."""
+    if size == "small":
+        pixels = 16
+    elif fallback:
+        pixels = FALLBACK_ICON_SIZE
+    else:
+        pixels = ICON_OVERLAY_SIZE
+    if shell is None:
+        return draw_generic_icon(PATH, pixels)
+
     SHGFI_ICON = 0x000000100
     SHGFI_ICONLOCATION = 0x000001000
     if size == "small":
@@ -159,64 +517,143 @@ def get_icon(PATH, size, fallback=False):
         bmpstr, "raw", "BGRA", 0, 1
     )
 
-    if size == "small":
-        img = img.resize((16, 16), Image.LANCZOS)
-    elif fallback:
-        img = img.resize((120, 120), Image.LANCZOS)
-    else:
-        img = img.resize((60, 60), Image.LANCZOS)
-    return img
+    return img.resize((pixels, pixels), Image.LANCZOS)
+
+def draw_generic_icon(PATH, pixels):
+    """Draw a plain document icon labelled with the file's extension, for systems without a shell."""
+    scale = 4  # Drawn large and downscaled for smooth edges
+    size = pixels * scale
+    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+
+    left, right = size * 3 // 16, size * 13 // 16
+    top, bottom = size // 16, size * 15 // 16
+    fold = size * 3 // 16
+    outline = max(size // 32, 1)
+    draw.polygon([(left, top), (right - fold, top), (right, top + fold), (right, bottom), (left, bottom)],
+                 fill=(245, 245, 245, 255), outline=(120, 120, 120, 255), width=outline)
+    draw.polygon([(right - fold, top), (right - fold, top + fold), (right, top + fold)],
+                 fill=(200, 200, 200, 255), outline=(120, 120, 120, 255), width=outline)
+
+    label = os.path.splitext(PATH)[1].lstrip(".").upper()[:4]
+    if label and pixels >= 32:
+        try:
+            font = ImageFont.load_default(size=size // 6)
+        except TypeError:  # Pillow < 10.1 only has the small bitmap font
+            font = ImageFont.load_default()
+        draw.rectangle([(left - outline, size * 9 // 16), (right - size // 8, size * 12 // 16)], fill=(70, 110, 170, 255))
+        draw.text(((left + right - size // 8) // 2, size * 21 // 32), label, fill=(255, 255, 255, 255), font=font, anchor="mm")
+
+    return img.resize((pixels, pixels), Image.LANCZOS)
+
+def scaled_icon(icon, canvas_size, reference_size):
+    """Scale an icon made for the reference canvas (THUMBNAIL_CANVAS_SIZE) to another canvas size."""
+    size = max(round(reference_size * canvas_size / THUMBNAIL_CANVAS_SIZE), 1)
+    if icon.size == (size, size):
+        return icon
+    return icon.resize((size, size), Image.LANCZOS)
+
+def compose_thumbnail(thumb, icon, canvas_size):
+    """Center a thumbnail on a transparent square canvas with the file icon at its bottom-right."""
+    thumb_w, thumb_h = thumb.size
+    canvas = Image.new("RGBA", (canvas_size, canvas_size), (255, 255, 255, 0))
+    thumb_x = (canvas_size - thumb_w) // 2
+    thumb_y = (canvas_size - thumb_h) // 2
+    canvas.paste(thumb, (thumb_x, thumb_y))
+
+    icon = scaled_icon(icon, canvas_size, ICON_OVERLAY_SIZE)
+    icon_w, icon_h = icon.size
 
-def generate_thumbnail(filepath) -> Image.Image:
+    # Align icon relative to bottom-right of the thumbnail
+    padding = round(ICON_PADDING * canvas_size / THUMBNAIL_CANVAS_SIZE)
+    icon_x = thumb_x + thumb_w - icon_w + padding
+    icon_y = thumb_y + thumb_h - icon_h + padding
+
+    canvas.paste(icon, (icon_x, icon_y), mask=icon)
+    return canvas
+
+def compose_fallback(icon, canvas_size):
+    """Just the file icon, centered on a transparent square canvas."""
+    icon = scaled_icon(icon, canvas_size, FALLBACK_ICON_SIZE)
+    canvas = Image.new("RGBA", (canvas_size, canvas_size), (255, 255, 255, 0))
+    icon_w, icon_h = icon.size
+    icon_pos = ((canvas_size - icon_w) // 2, (canvas_size - icon_h) // 2)
+    canvas.paste(icon, icon_pos, mask=icon)
+    return canvas
+
+def thumbnail_kind(filepath):
+    """Which thumbnail backend handles a file: 'image', 'video', 'pdf', 'audio', or None for icon only."""
     ext = os.path.splitext(filepath)[1].lower()
     mime, _ = mimetypes.guess_type(filepath)
+    if mime and mime.startswith("image"):
+        return "image"
+    if mime and mime.startswith("video"):
+        return "video"
+    if ext == ".pdf":
+        return "pdf"
+    if ext in AUDIO_ART_READERS:
+        return "audio"
+    return None
 
-    canvas_size = 256
+def fallback_thumbnails(filepath, sizes) -> dict:
+    """Icon-only thumbnails for files whose content can't be previewed."""
+    icon = get_icon(filepath, size="large", fallback=True)
+    return {canvas_size: compose_fallback(icon, canvas_size) for canvas_size in sizes}
 
-    try:
-        # Generate thumbnail image
-        if mime and mime.startswith("image"):
-            thumb = get_image_thumbnail(filepath)
-        elif mime and mime.startswith("video"):
-            thumb = get_video_thumbnail(filepath)
-        elif ext == ".pdf":
-            thumb = get_pdf_thumbnail(filepath)
-        elif ext == ".mp3":
-            thumb = get_mp3_album_art(filepath)
-        else:
-            raise Exception(f"Unsupported file type: {ext}")
+@tracing.traced("thumb.generate_thumbnails")
+def generate_thumbnails(filepath, sizes) -> dict:
+    """Generate square thumbnails of several sizes from a single decode of the file.
 
-        # Resize thumbnail proportionally
-        thumb.thumbnail((canvas_size, canvas_size), Image.LANCZOS)
-        thumb_w, thumb_h = thumb.size
+    Args:
+        filepath: File to generate thumbnails for
+        sizes: Canvas sizes in pixels, e.g. [120, 48]
 
-        # Create 256x256 transparent canvas and center the thumbnail
-        canvas = Image.new("RGBA", (canvas_size, canvas_size), (255, 255, 255, 0))
-        thumb_x = (canvas_size - thumb_w) // 2
-        thumb_y = (canvas_size - thumb_h) // 2
-        canvas.paste(thumb, (thumb_x, thumb_y))
+    Returns:
+        Dict mapping each size to its RGBA thumbnail
 
-        # Get and resize icon
-        icon = get_icon(filepath, size="large")
-        icon_w, icon_h = icon.size
+    Raises:
+        MemoryError: Decoding hit the memory limit, so isolated workers can tell
+    """
+    sizes = sorted(set(sizes), reverse=True)
+    largest = sizes[0]
+    kind = thumbnail_kind(filepath)
 
-        # Align icon relative to bottom-right of the thumbnail
-        padding = 4
-        icon_x = thumb_x + thumb_w - icon_w + padding
-        icon_y = thumb_y + thumb_h - icon_h + padding
+    try:
+        # Decode once, at no more than the largest size needs
+        if kind == "image":
+            source = get_image_thumbnail(filepath, largest)
+        elif kind == "video":
+            source = get_video_thumbnail(filepath, largest)
+        elif kind == "pdf":
+            source = get_pdf_thumbnail(filepath, largest)
+        elif kind == "audio":
+            source = get_audio_art(filepath, largest)
+        else:
+            raise Exception(f"Unsupported file type: {os.path.splitext(filepath)[1].lower()}")
 
-        canvas.paste(icon, (icon_x, icon_y), mask=icon)
-        return canvas
+        icon = get_icon(filepath, size="large")
+        source.thumbnail((largest, largest), Image.LANCZOS, reducing_gap=REDUCING_GAP)
 
+        thumbnails = {}
+        for canvas_size in sizes:
+            # Every size is resized from the decoded source so small ones stay sharp
+            thumb = source
+            if canvas_size != largest:
+                thumb = source.copy()
+                thumb.thumbnail((canvas_size, canvas_size), Image.LANCZOS)
+            thumbnails[canvas_size] = compose_thumbnail(thumb, icon, canvas_size)
+        return thumbnails
+
+    except MemoryError:
+        raise
     except Exception as e:
         print(f"Failed to generate thumbnail for {filepath}: {e}")
         # Fallback to just centered icon
-        icon = get_icon(filepath, size="large", fallback=True)
-        canvas = Image.new("RGBA", (canvas_size, canvas_size), (255, 255, 255, 0))
-        icon_w, icon_h = icon.size
-        icon_pos = ((canvas_size - icon_w) // 2, (canvas_size - icon_h) // 2)
-        canvas.paste(icon, icon_pos, mask=icon)
-        return canvas
+        return fallback_thumbnails(filepath, sizes)
+
+def generate_thumbnail(filepath, size=THUMBNAIL_CANVAS_SIZE) -> Image.Image:
+    """Generate a single size x size thumbnail."""
+    return generate_thumbnails(filepath, [size])[size]
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,200 @@
+import hashlib
+import io
+import os
+import threading
+
+from PIL import Image, features
+
+import tracing
+from thumb import generate_thumbnail, generate_thumbnails, get_cache_dir
+
+# Default byte budget of the on-disk thumbnail cache
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+
+# Evict down to this fraction of the budget so eviction doesn't run on every write
+EVICTION_TARGET = 0.9
+
+# WebP keeps alpha and is a fraction of the size of PNG, PNG is the fallback
+CACHE_FORMAT, CACHE_EXTENSION = ("WEBP", ".webp") if features.check("webp") else ("PNG", ".png")
+
+class ThumbnailCache:
+    """Persistent thumbnail cache with LRU eviction.
+
+    Entries are keyed by (path, file size, mtime, thumbnail size), so a changed file
+    simply misses the cache. Each hit bumps the entry's mtime, which is what the
+    least recently used eviction orders by.
+    """
+
+    def __init__(self, cache_dir=None, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.cache_dir = cache_dir or get_cache_dir("thumbnails")
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # Scanned lazily on the first write
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, file_path, thumb_size):
+        """Cache file for a source file, or None if the source doesn't exist."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        with tracing.span("thumb_cache.hash"):
+            key = f"{os.path.abspath(file_path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0{thumb_size}"
+            digest = hashlib.sha1(key.encode("utf-8", "surrogatepass")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + CACHE_EXTENSION)
+
+    def get(self, file_path, thumb_size):
+        """Return the cached thumbnail or None on a miss. Every call counts one hit or one miss."""
+        entry = self.entry_path(file_path, thumb_size)
+        if entry is None:
+            self.misses += 1
+            return None
+        try:
+            with tracing.span("thumb_cache.read"):
+                image = Image.open(entry)
+                image.load()
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(entry)  # Mark as recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return image
+
+    def put(self, file_path, thumb_size, image):
+        """Store a thumbnail and evict the least recently used entries if over budget."""
+        entry = self.entry_path(file_path, thumb_size)
+        if entry is None:
+            return
+
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        temp_path = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with tracing.span("thumb_cache.write"):
+                image.save(temp_path, CACHE_FORMAT, quality=85)
+                os.replace(temp_path, entry)
+            size = os.path.getsize(entry)
+        except OSError as e:
+            print(f"⚠️ Failed to cache thumbnail for {file_path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self.scan()[1]
+            else:
+                self._total_bytes += size
+            over_budget = self._total_bytes > self.budget_bytes
+        if over_budget:
+            self.evict()
+
+    def get_or_create(self, file_path, thumb_size):
+        """Return a thumbnail of at most thumb_size x thumb_size, generating and caching it on a miss."""
+        return self._get_or_create(file_path, thumb_size)[0]
+
+    def _get_or_create(self, file_path, thumb_size):
+        """Like get_or_create(), also returning whether the thumbnail had to be generated."""
+        image = self.get(file_path, thumb_size)
+        if image is not None:
+            return image, False
+
+        image = generate_thumbnail(file_path, thumb_size)
+        self.put(file_path, thumb_size, image)
+        return image, True
+
+    def scan(self):
+        """List cache entries as (mtime, size, path), returning them with the total size."""
+        entries = []
+        total = 0
+        try:
+            shards = list(os.scandir(self.cache_dir))
+        except OSError:
+            return entries, total
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return entries, total
+
+    def evict(self):
+        """Delete least recently used entries until the cache is back under its budget."""
+        with tracing.span("thumb_cache.evict"):
+            entries, total = self.scan()
+            target = self.budget_bytes * EVICTION_TARGET
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            with self._lock:
+                self._total_bytes = total
+
+    def prewarm(self, file_paths, thumb_size, progress=None):
+        """Generate missing thumbnails ahead of time.
+
+        Args:
+            file_paths: Source files, missing ones are skipped
+            thumb_size: Thumbnail size to warm
+            progress: Optional callback(done, total)
+
+        Returns:
+            Number of thumbnails that had to be generated
+        """
+        generated = 0
+        file_paths = list(file_paths)
+        for index, file_path in enumerate(file_paths, 1):
+            if os.path.exists(file_path):
+                try:
+                    generated += self._get_or_create(file_path, thumb_size)[1]
+                except Exception as e:
+                    print(f"⚠️ Failed to prewarm thumbnail for {file_path}: {e}")
+            if progress:
+                progress(index, len(file_paths))
+        return generated
+
+def encode_thumbnail(image, thumb_size):
+    """Downscale a thumbnail to thumb_size and encode it in the cache format."""
+    image = image.copy()
+    image.thumbnail((thumb_size, thumb_size), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, CACHE_FORMAT, quality=85)
+    return buffer.getvalue()
+
+def decode_thumbnail(data):
+    """Decode a thumbnail produced by encode_thumbnail."""
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+# Process-wide cache instance
+thumbnail_cache = ThumbnailCache()
+
+def generate_cached_thumbnails(file_path, sizes):
+    """Thumbnails of several sizes, taken from the cache where possible.
+
+    The missing sizes are generated from one decode and cached.
+    """
+    thumbnails = {size: thumbnail_cache.get(file_path, size) for size in sizes}
+    missing = [size for size, image in thumbnails.items() if image is None]
+    if missing:
+        for size, image in generate_thumbnails(file_path, missing).items():
+            thumbnail_cache.put(file_path, size, image)
+            thumbnails[size] = image
+    return thumbnails
@@ -0,0 +1,367 @@
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+from thumb import fallback_thumbnails, get_cache_dir, thumbnail_kind
+from thumb_cache import generate_cached_thumbnails
+
+MB = 1024 * 1024
+
+# Seconds a thumbnail job may run before its worker is killed, by thumbnail_kind()
+THUMBNAIL_DEADLINES = {"image": 10, "video": 20, "pdf": 10, "audio": 5, None: 5}
+
+# Memory a worker may allocate on top of its baseline while generating a thumbnail
+THUMBNAIL_MEMORY_LIMITS = {"image": 1536 * MB, "video": 1024 * MB, "pdf": 1024 * MB, "audio": 512 * MB, None: 256 * MB}
+
+# Failures (deadline, memory limit or crash) after which a file is skipped until it changes
+QUARANTINE_THRESHOLD = 2
+MAX_QUARANTINE_ENTRIES = 1000
+
+# Idle workers exit after this many seconds so they don't hold memory forever
+IDLE_WORKER_TIMEOUT = 30
+
+# Workers dying before they are ready this many times in a row disable the pool
+MAX_STARTUP_FAILURES = 3
+
+class ThumbnailQuarantine:
+    """Persistent list of files whose thumbnails keep timing out or crashing workers.
+
+    Entries are keyed by (path, file size, mtime), so a file is tried again once it changes.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir("thumbnails"), "quarantine.json")
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _key(self, file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+                self._entries = entries if isinstance(entries, dict) else {}
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Failed to save thumbnail quarantine: {e}")
+
+    def is_quarantined(self, file_path):
+        key = self._key(file_path)
+        if key is None:
+            return False
+        with self._lock:
+            entry = self._load().get(key)
+        return bool(entry) and entry.get("failures", 0) >= QUARANTINE_THRESHOLD
+
+    def record_failure(self, file_path, reason):
+        """Count a failed attempt, quarantining the file once it reaches QUARANTINE_THRESHOLD."""
+        key = self._key(file_path)
+        if key is None:
+            return
+        with self._lock:
+            entries = self._load()
+            entry = entries.pop(key, {"failures": 0})  # Re-inserted last, oldest entries go first
+            entry["failures"] += 1
+            entry["reason"] = reason
+            entry["time"] = int(time.time())
+            entries[key] = entry
+            while len(entries) > MAX_QUARANTINE_ENTRIES:
+                del entries[next(iter(entries))]
+            self._save()
+        if entry["failures"] >= QUARANTINE_THRESHOLD:
+            print(f"⚠️ Quarantined {file_path} after {entry['failures']} failed thumbnail attempts ({reason})")
+
+    def clear(self, file_path):
+        key = self._key(file_path)
+        if key is None:
+            return
+        with self._lock:
+            entries = self._load()
+            if key in entries:
+                del entries[key]
+                self._save()
+
+def current_memory():
+    """Commit charge (Windows) or address space size (elsewhere) of this process in bytes."""
+    if sys.platform == "win32":
+        import win32api
+        import win32process
+        return win32process.GetProcessMemoryInfo(win32api.GetCurrentProcess())["PagefileUsage"]
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+def set_memory_limit(limit, state):
+    """Cap the memory of the current process: a job object on Windows, RLIMIT_AS elsewhere.
+
+    The limit can be changed again later, state keeps the job object between calls.
+    """
+    if sys.platform == "win32":
+        import win32api
+        import win32job
+        job = state.get("job")
+        if job is None:
+            job = win32job.CreateJobObject(None, "")
+            win32job.AssignProcessToJobObject(job, win32api.GetCurrentProcess())
+            state["job"] = job
+        info = win32job.QueryInformationJobObject(job, win32job.JobObjectExtendedLimitInformation)
+        info["ProcessMemoryLimit"] = limit
+        info["BasicLimitInformation"]["LimitFlags"] |= win32job.JOB_OBJECT_LIMIT_PROCESS_MEMORY
+        win32job.SetInformationJobObject(job, win32job.JobObjectExtendedLimitInformation, info)
+    else:
+        import resource
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
+
+def worker_main(conn):
+    """Worker process loop: receives (file path, sizes) jobs and sends back the thumbnails."""
+    state = {}
+    conn.send(("ready", None))
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+
+        file_path, sizes = job
+        try:
+            kind = thumbnail_kind(file_path)
+            set_memory_limit(current_memory() + THUMBNAIL_MEMORY_LIMITS.get(kind, THUMBNAIL_MEMORY_LIMITS[None]), state)
+        except Exception as e:
+            print(f"⚠️ Failed to limit thumbnail worker memory: {e}")
+
+        try:
+            result = ("ok", generate_cached_thumbnails(file_path, sizes))
+        except MemoryError:
+            result = ("memory", None)
+        except Exception as e:
+            result = ("error", str(e))
+        conn.send(result)
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.job = None  # (future, file path, sizes, deadline)
+        self.idle_since = time.monotonic()
+
+    def stop(self, kill=False):
+        try:
+            if kill:
+                self.process.kill()
+                self.process.join(1)
+            else:
+                self.conn.send(None)  # Exits on its own once the message arrives
+        except (OSError, ValueError):
+            pass
+        self.conn.close()
+
+class IsolatedThumbnailPool:
+    """Worker processes that generate thumbnails with a deadline and memory cap per job.
+
+    submit() returns a concurrent.futures.Future that resolves to {size: image}. A job
+    that runs past its deadline, hits its memory cap or crashes its worker resolves to
+    the icon fallback instead, the worker is replaced and the file counts towards
+    quarantine. Quarantined files get the fallback right away.
+    """
+
+    def __init__(self, workers=None, quarantine=None):
+        self.max_workers = workers or min(os.cpu_count() or 1, 61)
+        self.quarantine = quarantine or thumbnail_quarantine
+        # Spawned like on Windows everywhere, forking a running Qt app isn't safe. Spawned
+        # workers re-import the parent's main module as __mp_main__, with its imports (Qt
+        # included), so entry points keep argument parsing and side effects under their
+        # __main__ guard
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._workers = []
+        self._wakeup_reader, self._wakeup_writer = self._context.Pipe(duplex=False)
+        self._thread = None
+        self._shutdown = False
+        self._startup_failures = 0
+
+    def submit(self, file_path, sizes):
+        future = Future()
+        if self.quarantine.is_quarantined(file_path):
+            future.set_running_or_notify_cancel()
+            future.set_result(fallback_thumbnails(file_path, sizes))
+            return future
+
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Thumbnail pool has been shut down")
+            self._pending.append((future, file_path, list(sizes)))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ThumbnailPool", daemon=True)
+                self._thread.start()
+            self._wakeup_writer.send_bytes(b"")
+        return future
+
+    def shutdown(self):
+        """Stop all workers, killing the ones still busy, and cancel queued jobs."""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            self._wakeup_writer.send_bytes(b"")
+            if self._thread is None:
+                self._close()
+
+    def _run(self):
+        if sys.platform == "win32":
+            import pythoncom
+            pythoncom.CoInitialize()  # The icon fallback uses the Shell from this thread
+
+        while True:
+            with self._lock:
+                if self._shutdown:
+                    self._close()
+                    return
+                self._dispatch()
+                waitables = [self._wakeup_reader]
+                for worker in self._workers:
+                    waitables += [worker.conn, worker.process.sentinel]
+                timeout = self._next_timeout()
+
+            ready = wait(waitables, timeout)
+
+            completed = []
+            with self._lock:
+                while self._wakeup_reader.poll():
+                    self._wakeup_reader.recv_bytes()
+                for worker in list(self._workers):
+                    if worker.conn in ready:
+                        self._receive(worker, completed)
+                    elif worker.process.sentinel in ready:
+                        self._fail(worker, "worker crashed", completed)
+                self._check_timeouts(completed)
+
+            # Outside the lock, callbacks may submit more work
+            for future, result in completed:
+                future.set_result(result)
+
+    def _dispatch(self):
+        # Start workers for the queued jobs, up to max_workers
+        starting = sum(1 for worker in self._workers if not worker.ready)
+        idle = sum(1 for worker in self._workers if worker.ready and worker.job is None)
+        while len(self._workers) < self.max_workers and starting + idle < len(self._pending):
+            self._workers.append(_Worker(self._context))
+            starting += 1
+
+        for worker in self._workers:
+            if not worker.ready or worker.job is not None:
+                continue
+            while self._pending:
+                future, file_path, sizes = self._pending.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue  # Cancelled while queued
+                deadline = THUMBNAIL_DEADLINES.get(thumbnail_kind(file_path), THUMBNAIL_DEADLINES[None])
+                worker.job = (future, file_path, sizes, time.monotonic() + deadline)
+                try:
+                    worker.conn.send((file_path, sizes))
+                except (OSError, ValueError):
+                    pass  # Dead worker, noticed through its sentinel
+                break
+
+    def _next_timeout(self):
+        now = time.monotonic()
+        timeouts = []
+        for worker in self._workers:
+            if worker.job is not None:
+                timeouts.append(worker.job[3] - now)
+            elif worker.ready:
+                timeouts.append(worker.idle_since + IDLE_WORKER_TIMEOUT - now)
+        return max(min(timeouts), 0) if timeouts else None
+
+    def _receive(self, worker, completed):
+        try:
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            self._fail(worker, "worker crashed", completed)
+            return
+
+        if status == "ready":
+            worker.ready = True
+            self._startup_failures = 0
+            return
+
+        future, file_path, sizes, _ = worker.job
+        worker.job = None
+        worker.idle_since = time.monotonic()
+        if status == "ok":
+            completed.append((future, payload))
+            return
+
+        if status == "memory":
+            self.quarantine.record_failure(file_path, "memory limit exceeded")
+        else:
+            print(f"⚠️ Thumbnail worker failed for {file_path}: {payload}")
+        completed.append((future, fallback_thumbnails(file_path, sizes)))
+
+    def _fail(self, worker, reason, completed):
+        """Kill a worker and give its job the fallback."""
+        worker.stop(kill=True)
+        self._workers.remove(worker)
+        if not worker.ready:
+            self._startup_failures += 1
+            if self._startup_failures >= MAX_STARTUP_FAILURES:
+                print("❌ Thumbnail workers keep failing to start, using icons instead")
+                while self._pending:
+                    future, file_path, sizes = self._pending.popleft()
+                    if future.set_running_or_notify_cancel():
+                        completed.append((future, fallback_thumbnails(file_path, sizes)))
+                self._startup_failures = 0
+        if worker.job is not None:
+            future, file_path, sizes, _ = worker.job
+            print(f"⚠️ Thumbnail for {file_path} failed: {reason}")
+            self.quarantine.record_failure(file_path, reason)
+            completed.append((future, fallback_thumbnails(file_path, sizes)))
+
+    def _check_timeouts(self, completed):
+        now = time.monotonic()
+        for worker in list(self._workers):
+            if worker.job is not None and now >= worker.job[3]:
+                kind = thumbnail_kind(worker.job[1])
+                self._fail(worker, f"no thumbnail after {THUMBNAIL_DEADLINES.get(kind, THUMBNAIL_DEADLINES[None])}s", completed)
+            elif worker.ready and worker.job is None and now - worker.idle_since >= IDLE_WORKER_TIMEOUT:
+                worker.stop()
+                self._workers.remove(worker)
+
+    def _close(self):
+        for worker in self._workers:
+            worker.stop(kill=worker.job is not None)
+        self._workers.clear()
+        while self._pending:
+            self._pending.popleft()[0].cancel()
+
+# Process-wide quarantine list
+thumbnail_quarantine = ThumbnailQuarantine()
@@ -0,0 +1,141 @@
+import atexit
+import functools
+import json
+import multiprocessing
+import multiprocessing.spawn
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Set to a file path (or "1" for a file in %TEMP%) to record a Chrome trace from process start
+TRACE_ENV_VAR = "CATBOX_TRACE"
+
+# Spans recorded before configure() decides whether tracing is on are kept up to this many
+MAX_PENDING_EVENTS = 10000
+
+_lock = threading.Lock()
+_events = []
+_enabled = False
+_pending = True
+_trace_path = None
+
+def _now_us():
+    return time.perf_counter() * 1_000_000
+
+def _default_trace_path():
+    return os.path.join(tempfile.gettempdir(), f"catbox-trace-{os.getpid()}.json")
+
+def _is_child_process():
+    """Whether this is a multiprocessing worker, including while it re-imports the parent's main module."""
+    return (multiprocessing.spawn.is_forking(sys.argv) or multiprocessing.parent_process() is not None
+            or multiprocessing.current_process().name != "MainProcess")
+
+def configure(path=None):
+    """Decide whether tracing is enabled, once the command line has been parsed.
+
+    Spans recorded before this call (module imports) are kept if tracing gets
+    enabled and dropped otherwise.
+
+    Args:
+        path: Trace file from --trace, '' to use the default location, or None to
+            fall back to the CATBOX_TRACE environment variable
+
+    Worker processes never trace: they would write over the parent's trace file.
+    """
+    global _enabled, _pending, _trace_path
+    env_value = os.environ.get(TRACE_ENV_VAR)
+    if path is None and env_value:
+        path = "" if env_value == "1" else env_value
+    if _is_child_process():
+        path = None
+
+    with _lock:
+        _pending = False
+        if path is None:
+            _enabled = False
+            _events.clear()
+            return
+        if _enabled:
+            return
+        _enabled = True
+        _trace_path = path or _default_trace_path()
+    atexit.register(write_trace)
+
+def is_enabled():
+    return _enabled
+
+def add_span(name, start_us, end_us, **args):
+    """Record a complete span with explicit start and end times (microseconds, perf_counter based)."""
+    if not (_enabled or _pending):
+        return
+    event = {
+        "name": name,
+        "cat": name.split(".")[0],
+        "ph": "X",
+        "ts": start_us,
+        "dur": max(end_us - start_us, 0),
+        "pid": os.getpid(),
+        "tid": threading.get_ident()
+    }
+    if args:
+        event["args"] = {key: str(value) for key, value in args.items()}
+    with _lock:
+        if _enabled or len(_events) < MAX_PENDING_EVENTS:
+            _events.append(event)
+
+@contextmanager
+def span(name, **args):
+    """Time the enclosed block as a trace span."""
+    if not (_enabled or _pending):
+        yield
+        return
+    start = _now_us()
+    try:
+        yield
+    finally:
+        add_span(name, start, _now_us(), **args)
+
+def traced(name):
+    """Decorator that records every call of the function as a trace span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (_enabled or _pending):
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def now_us():
+    """Current trace timestamp, for spans recorded with add_span."""
+    return _now_us()
+
+def write_trace():
+    """Write the recorded spans as Chrome trace-event JSON (open with chrome://tracing or Perfetto)."""
+    if not _enabled:
+        return None
+    with _lock:
+        events = list(_events)
+
+    metadata = [{
+        "name": "process_name",
+        "ph": "M",
+        "pid": os.getpid(),
+        "args": {"name": "Catbox Uploader"}
+    }]
+    try:
+        with open(_trace_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        print(f"📈 Trace written to {_trace_path}")
+        return _trace_path
+    except Exception as e:
+        print(f"⚠️ Failed to write trace: {e}")
+        return None
+
+# Tracing requested through the environment covers the whole process from here on
+if os.environ.get(TRACE_ENV_VAR):
+    configure()
@@ -0,0 +1,123 @@
+import socket
+import threading
+
+import requests
+import tracing
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+class ConnectionTracker:
+    """Keeps track of the live connections opened through an adapter."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections = set()
+        self.aborted = False
+
+    def register(self, connection):
+        with self._lock:
+            self._connections.add(connection)
+            aborted = self.aborted
+        # A connection that finished connecting after abort() must not be used either
+        if aborted:
+            shutdown_connection(connection)
+
+    def unregister(self, connection):
+        with self._lock:
+            self._connections.discard(connection)
+
+    def abort(self):
+        """Shut down every live socket so blocked sends and receives return immediately."""
+        with self._lock:
+            self.aborted = True
+            connections = list(self._connections)
+        for connection in connections:
+            shutdown_connection(connection)
+
+    def open_connections(self):
+        with self._lock:
+            return len(self._connections)
+
+def shutdown_connection(connection):
+    """Shut down the socket of a urllib3 connection without closing it from this thread."""
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        return
+    try:
+        # Use the plain socket implementation so an SSL socket's state isn't touched
+        # while the owning thread may still be inside a write
+        socket.socket.shutdown(sock, socket.SHUT_RDWR)
+    except OSError:
+        pass  # Already closed or never fully connected
+
+class TrackedConnectionMixin:
+    tracker = None
+
+    def connect(self):
+        with tracing.span("http.connect", host=self.host):
+            super().connect()
+        self.tracker.register(self)
+
+    def close(self):
+        self.tracker.unregister(self)
+        super().close()
+
+class CancellableHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose in-flight requests can be aborted from another thread.
+
+    Only the connections opened through this adapter are affected, so aborting one
+    upload never touches the pooled connections of any other session.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.tracker = ConnectionTracker()
+        super().__init__(*args, **kwargs)
+
+    def _tracked_pool_classes(self):
+        http_connection = type("TrackedHTTPConnection", (TrackedConnectionMixin, HTTPConnection), {"tracker": self.tracker})
+        https_connection = type("TrackedHTTPSConnection", (TrackedConnectionMixin, HTTPSConnection), {"tracker": self.tracker})
+        return {
+            "http": type("TrackedHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http_connection}),
+            "https": type("TrackedHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": https_connection}),
+        }
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._tracked_pool_classes()
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        # SOCKS managers use their own connection classes, leave those alone
+        if not proxy.lower().startswith("socks"):
+            manager.pool_classes_by_scheme = self._tracked_pool_classes()
+        return manager
+
+    def abort(self):
+        self.tracker.abort()
+
+    def __setstate__(self, state):
+        self.tracker = ConnectionTracker()
+        super().__setstate__(state)
+
+class CancellableSession(requests.Session):
+    """requests.Session that can be aborted from a control thread."""
+
+    def __init__(self):
+        super().__init__()
+        self.mount("https://", CancellableHTTPAdapter())
+        self.mount("http://", CancellableHTTPAdapter())
+
+    def abort(self):
+        """Abort all in-flight requests of this session.
+
+        Blocked socket operations fail right away in the thread that owns them, which
+        then unwinds normally and closes its files and connections.
+        """
+        for adapter in self.adapters.values():
+            if isinstance(adapter, CancellableHTTPAdapter):
+                adapter.abort()
+
+    def open_connections(self):
+        return sum(adapter.tracker.open_connections() for adapter in self.adapters.values()
+                   if isinstance(adapter, CancellableHTTPAdapter))